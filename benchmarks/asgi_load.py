@@ -0,0 +1,152 @@
+"""Load comparison: gunicorn sync workers (WSGI views) vs uvicorn (async views).
+
+Starts each server on a scratch copy of the database. It opens --slow
+connections that trickle their request headers and never finish them, like
+phones on a bad network during a peak event. Meanwhile --clients fast
+clients hammer the leaderboard for --seconds. A sync worker is stuck with a
+slow client until it finishes or times out; the event loop just keeps the
+socket open.
+
+    python benchmarks/asgi_load.py --slow 200 --clients 20 --seconds 10
+
+Needs gunicorn and uvicorn (requirements.txt).
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    # name: (command, path of the leaderboard endpoint)
+    "gunicorn-sync": (["gunicorn", "mysite.wsgi:application", "--workers", "{workers}", "--bind", "127.0.0.1:{port}"],
+                      "/api/leaderboard/"),
+    "uvicorn-async": (["uvicorn", "mysite.asgi:application", "--workers", "1", "--port", "{port}", "--no-access-log"],
+                      "/api/async/leaderboard/"),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def slow_client(port, path, interval, stop):
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n".encode())
+        i = 0
+        while not stop.is_set():
+            await asyncio.sleep(interval)
+            writer.write(f"X-Slow-{i}: 1\r\n".encode())  # Never sends the final blank line
+            await writer.drain()
+            i += 1
+        writer.close()
+    except OSError:
+        pass  # Dropped by the server
+
+
+async def request(port, path, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+        status = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return status.split()[1] == b"200"
+    finally:
+        writer.close()
+
+
+async def fast_client(port, path, timeout, stop, samples):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            ok = await request(port, path, timeout)
+        except (OSError, asyncio.TimeoutError, IndexError):
+            ok = False
+        samples.append((time.perf_counter() - start, ok))
+
+
+async def load(port, path, args):
+    await wait_ready(port)
+    stop = asyncio.Event()
+    samples = []
+    slow = [asyncio.create_task(slow_client(port, path, args.slow_interval, stop)) for _ in range(args.slow)]
+    await asyncio.sleep(1)  # Let the slow clients take their seats
+    query = f"{path}?limit=20"
+    fast = [asyncio.create_task(fast_client(port, query, args.timeout, stop, samples)) for _ in range(args.clients)]
+    await asyncio.sleep(args.seconds)
+    stop.set()
+    await asyncio.gather(*fast, *slow)
+    return samples
+
+
+def run(name, args, db_path):
+    command, path = SERVERS[name]
+    port = free_port()
+    command = [part.format(workers=args.workers, port=port) for part in command]
+    env = {**os.environ, "SQLITE_PATH": str(db_path), "DJANGO_SETTINGS_MODULE": "mysite.settings"}
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        samples = asyncio.run(load(port, path, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(t for t, ok in samples if ok)
+    return {
+        "server": name,
+        "requests_per_sec": round(len(latencies) / args.seconds, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p99_ms": round(statistics.quantiles(latencies, n=100)[98] * 1000, 1) if len(latencies) > 1 else None,
+        "failed": sum(1 for _, ok in samples if not ok),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leaderboard throughput with slow clients connected, WSGI vs ASGI.")
+    parser.add_argument("servers", nargs="*", default=list(SERVERS), help=", ".join(SERVERS))
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn sync workers")
+    parser.add_argument("--slow", type=int, default=200, help="slow connections held open")
+    parser.add_argument("--slow-interval", type=float, default=2.0, help="seconds between header lines of a slow client")
+    parser.add_argument("--clients", type=int, default=20, help="concurrent fast clients")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=5.0, help="fast request timeout (counted as failed)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "load.sqlite3"
+        shutil.copy(ROOT / "db.sqlite3", db_path)
+        subprocess.run([sys.executable, "manage.py", "migrate", "--verbosity", "0"], cwd=ROOT, check=True,
+                       env={**os.environ, "SQLITE_PATH": str(db_path)})
+
+        print(f"{args.slow} slow connections, {args.clients} fast clients, {args.seconds:g} s")
+        print(f"{'server':<16} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+        for name in args.servers:
+            r = run(name, args, db_path)
+            print(f"{r['server']:<16} {r['requests_per_sec']:>8} {r['p50_ms']!s:>8} {r['p99_ms']!s:>8} {r['failed']:>7}")
+
+
+if __name__ == "__main__":
+    main()
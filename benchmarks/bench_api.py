@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+PAYLOAD = json.dumps({
+    "score": 2048,
+    "start_time": "2025-11-28T10:00:00",
+    "end_time": "2025-11-28T10:05:00",
+    "duration": 300.0,
+    "game_mode": "EASY",
+})
+
+
+@pytest.fixture
+def player_client(client, django_user_model):
+    user = django_user_model.objects.create_user(username="bench", password="bench-password")
+    client.force_login(user)
+    return client
+
+
+@pytest.mark.django_db
+def bench_save_score_api(benchmark, player_client):
+    def post():
+        return player_client.post("/api/save_score/", PAYLOAD, content_type="application/json")
+
+    response = benchmark(post)
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
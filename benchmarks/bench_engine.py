@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from conftest import BOARDS, NEARLY_FULL, load_board, main
+
+
+@pytest.mark.parametrize("board", sorted(BOARDS))
+@pytest.mark.parametrize("direction", ["left", "right", "up", "down"])
+def bench_move_tiles(benchmark, game, board, direction):
+    random.seed(0)
+
+    def setup():
+        load_board(game, BOARDS[board])
+        return (direction, None), {}
+
+    benchmark.pedantic(game.move_tiles, setup=setup, rounds=2000)
+
+
+def bench_get_random_pos_nearly_full(benchmark, game):
+    load_board(game, NEARLY_FULL)
+    row, col = benchmark(game.get_random_pos)
+    assert (row, col) == (3, 3)
+
+
+def bench_end_move(benchmark, game):
+    random.seed(0)
+
+    def setup():
+        load_board(game, BOARDS["mid"])
+        return (), {}
+
+    benchmark.pedantic(game.end_move, setup=setup, rounds=2000)
+
+
+@pytest.mark.parametrize("board", sorted(BOARDS))
+def bench_end_move_hard(benchmark, board):
+    # HARD mode spawn: alpha-beta search, has to stay well inside a 16 ms frame
+    game = main.Game2048(100, 100, 600, 600, is_ai=False, name="Player", hard=True)
+
+    def setup():
+        load_board(game, BOARDS[board])
+        return (), {}
+
+    benchmark.pedantic(game.end_move, setup=setup, rounds=50)
+
+
+def _midgame_boards(spec, count=100):
+    # Boards from random games of this size, after a few dozen moves
+    rng = random.Random(spec.size)
+    boards = []
+    while len(boards) < count:
+        board = spec.new_board(rng)
+        for _ in range(rng.randrange(20, 80)):
+            legal = spec.legal_moves(board)
+            if not legal:
+                break
+            board = spec.spawn(spec.move(board, rng.choice(legal))[0], rng)[0]
+        boards.append(board)
+    return boards
+
+
+@pytest.mark.parametrize("size", range(main.engine.MIN_SIZE, main.engine.MAX_SIZE + 1))
+def bench_move_by_size(benchmark, size):
+    # 4 moves on 100 mid-game boards: engine throughput per board size (row memo warm after the first round)
+    spec = main.engine.board_spec(size)
+    boards = _midgame_boards(spec)
+
+    def moves():
+        for board in boards:
+            for direction in main.engine.DIRECTIONS:
+                spec.move(board, direction)
+
+    benchmark(moves)
+
+
+@pytest.mark.parametrize("size", range(main.engine.MIN_SIZE, main.engine.MAX_SIZE + 1))
+def bench_move_tiles_by_size(benchmark, size):
+    # Whole player move on the pygame side: engine move, spawn, Tile sync
+    game = main.Game2048(100, 100, 600, 600, is_ai=False, name="Player", size=size)
+    boards = _midgame_boards(game.spec, 20)
+    state = {"i": 0}
+
+    def setup():
+        game.board = boards[state["i"] % len(boards)]
+        game.sync_tiles()
+        state["i"] += 1
+        direction = next(iter(game.spec.legal_moves(game.board)), "left")
+        return (direction, None), {}
+
+    benchmark.pedantic(game.move_tiles, setup=setup, rounds=500)
@@ -0,0 +1,78 @@
+import pygame
+import pytest
+
+import main
+from conftest import BOARDS, load_board
+
+
+@pytest.mark.parametrize("board", sorted(BOARDS))
+def bench_draw_offscreen(benchmark, game, board):
+    load_board(game, BOARDS[board])
+    surface = pygame.Surface((main.WIDTH, main.HEIGHT))
+    benchmark(game.draw, surface)
+
+
+def bench_draw_ai_match(benchmark):
+    # The two 370x370 boards of AI_MATCH mode
+    games = [
+        main.Game2048(20, 200, 370, 370, is_ai=False, name="You"),
+        main.Game2048(410, 200, 370, 370, is_ai=False, name="AI Bot"),
+    ]
+    for g in games:
+        load_board(g, BOARDS["mid"])
+    surface = pygame.Surface((main.WIDTH, main.HEIGHT))
+
+    def draw_frame():
+        for g in games:
+            g.draw(surface)
+
+    benchmark(draw_frame)
+
+
+def bench_draw_dirty_idle(benchmark, game):
+    # Nothing changed since the last frame: should be close to free
+    load_board(game, BOARDS["mid"])
+    surface = pygame.Surface((main.WIDTH, main.HEIGHT))
+    game.draw(surface)
+    assert benchmark(game.draw_dirty, surface) == []
+
+
+def bench_draw_dirty_after_move(benchmark, game):
+    surface = pygame.Surface((main.WIDTH, main.HEIGHT))
+
+    def setup():
+        load_board(game, BOARDS["mid"])
+        game.draw(surface)
+        game.move_tiles("left", None)
+        return (surface,), {}
+
+    benchmark.pedantic(game.draw_dirty, setup=setup, rounds=500)
+
+
+def bench_animation_frame_ai_match(benchmark):
+    # One 60 FPS frame of AI_MATCH with both boards mid-animation, at every point of the tweens
+    games = [
+        main.Game2048(20, 200, 370, 370, is_ai=False, name="You", animated=True),
+        main.Game2048(410, 200, 370, 370, is_ai=False, name="AI Bot", animated=True),
+    ]
+    surface = pygame.Surface((main.WIDTH, main.HEIGHT))
+    scheduler = main.animation.Scheduler()
+    frames = round((main.animation.SLIDE_TIME + main.animation.POP_TIME) * main.FPS)
+    rounds = iter(range(10**9))
+
+    def setup():
+        frame = next(rounds) % frames
+        for g in games:
+            load_board(g, BOARDS["mid"])
+            g.draw(surface)
+            g.move_tiles("left", None)
+        for _ in range(frame):
+            scheduler.update(1 / main.FPS, [g.animation for g in games])
+        return (), {}
+
+    def draw_frame():
+        scheduler.update(1 / main.FPS, [g.animation for g in games if g.animation])
+        for g in games:
+            g.draw_dirty(surface, scheduler.alpha)
+
+    benchmark.pedantic(draw_frame, setup=setup, rounds=550)
@@ -0,0 +1,60 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+GAME_DIR = ROOT / "game_source"
+
+# Headless pygame: no window, no sound
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(GAME_DIR))
+
+import main  # noqa: E402
+
+# Representative boards (tile values, 0 = empty)
+BOARDS = {
+    "early": [
+        [2, 0, 0, 0],
+        [0, 0, 4, 0],
+        [0, 2, 0, 0],
+        [0, 0, 0, 2],
+    ],
+    "mid": [
+        [128, 64, 16, 4],
+        [32, 16, 8, 2],
+        [4, 8, 0, 0],
+        [2, 0, 0, 2],
+    ],
+    "late": [
+        [1024, 512, 256, 128],
+        [8, 16, 32, 64],
+        [4, 2, 8, 4],
+        [2, 4, 2, 0],
+    ],
+}
+
+# 15 tiles, no merges possible except via the last free cell
+NEARLY_FULL = [
+    [2, 4, 8, 16],
+    [16, 8, 4, 2],
+    [2, 4, 8, 16],
+    [16, 8, 4, 0],
+]
+
+
+def load_board(game, grid):
+    """Put a game into a known position."""
+    game.board = main.engine.from_grid(grid)
+    game.score = 0
+    game.won = game.lost = game.over = False
+    game.sync_tiles()
+
+
+@pytest.fixture
+def game():
+    return main.Game2048(100, 100, 600, 600, is_ai=False, name="Player")
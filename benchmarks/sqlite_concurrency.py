@@ -0,0 +1,172 @@
+"""Concurrent score writes on SQLite: default settings vs DB_PROFILE=production.
+
+Simulates a gunicorn deployment: --workers processes x --threads threads post
+scores to /api/save_score/ through the Django test client (full middleware
+and view path), while --readers threads per process page through the
+leaderboard. Each configuration gets a fresh scratch database.
+
+    python benchmarks/sqlite_concurrency.py --workers 4 --threads 4 --requests 100
+
+Prints writes/sec, write p50/p99 latency, failed writes ("database is
+locked" ends up as a 500) and read p99 for each configuration.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CONFIGS = {
+    "default": {"DB_PROFILE": "default", "SCORE_WRITER": "0"},
+    "production": {"DB_PROFILE": "production", "SCORE_WRITER": "0"},
+    "production+writer": {"DB_PROFILE": "production", "SCORE_WRITER": "1"},
+}
+
+PAYLOAD = {
+    "start_time": "2025-11-28T10:00:00",
+    "end_time": "2025-11-28T10:05:00",
+    "duration": 300.0,
+    "game_mode": "EASY",
+}
+
+
+def setup_django(env):
+    os.environ.update(env)
+    os.environ["DJANGO_SETTINGS_MODULE"] = "mysite.settings"
+    sys.path.insert(0, str(ROOT))
+    import django
+    django.setup()
+
+
+def prepare(env, players):
+    """Migrate the scratch database and log in one player per thread. Returns the session keys."""
+    setup_django(env)
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.test import Client
+
+    call_command("migrate", verbosity=0)
+    keys = []
+    for i in range(players):
+        client = Client()
+        client.force_login(User.objects.create_user(f"player{i}", password="bench-password"))
+        keys.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+    return keys
+
+
+def worker(env, session_keys, requests, readers, barrier, results):
+    setup_django(env)
+    from django.conf import settings
+    from django.test import Client
+
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)  # Failed writes are counted, not logged
+    samples = []
+    stop = threading.Event()
+
+    def client_for(key):
+        client = Client(raise_request_exception=False)
+        client.cookies[settings.SESSION_COOKIE_NAME] = key
+        return client
+
+    def write(key):
+        client = client_for(key)
+        for i in range(requests):
+            body = json.dumps({**PAYLOAD, "score": (i * 7919) % 100000})
+            start = time.perf_counter()
+            response = client.post("/api/save_score/", body, content_type="application/json")
+            samples.append(("write", time.perf_counter() - start, response.status_code == 200))
+
+    def read(key):
+        client = client_for(key)
+        while not stop.is_set():
+            start = time.perf_counter()
+            # A cursor skips the cached top, so every read hits the table
+            response = client.get("/api/leaderboard/", {"limit": 50, "after": "1000000:0"})
+            samples.append(("read", time.perf_counter() - start, response.status_code == 200))
+
+    writers = [threading.Thread(target=write, args=(key,)) for key in session_keys]
+    reading = [threading.Thread(target=read, args=(session_keys[0],)) for _ in range(readers)]
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in writers + reading:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in reading:
+        thread.join()
+    results.put((elapsed, samples))
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def run(name, workers, threads, requests, readers):
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**CONFIGS[name], "SQLITE_PATH": str(Path(tmp) / "bench.sqlite3")}
+        with context.Pool(1) as pool:
+            keys = pool.apply(prepare, (env, workers * threads))
+
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(env, keys[i * threads:(i + 1) * threads], requests, readers,
+                                                 barrier, results))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    elapsed = max(e for e, _ in collected)
+    samples = [s for _, batch in collected for s in batch]
+    writes = sorted(t for kind, t, ok in samples if kind == "write" and ok)
+    failed = sum(1 for kind, _, ok in samples if kind == "write" and not ok)
+    reads = sorted(t for kind, t, ok in samples if kind == "read" and ok)
+    return {
+        "config": name,
+        "writes_per_sec": round(len(writes) / elapsed, 1),
+        "write_p50_ms": round(percentile(writes, 50) * 1000, 1),
+        "write_p99_ms": round(percentile(writes, 99) * 1000, 1),
+        "failed_writes": failed,
+        "reads": len(reads),
+        "read_p99_ms": round(percentile(reads, 99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent score writes on SQLite, per database profile.")
+    parser.add_argument("configs", nargs="*", default=list(CONFIGS), help=", ".join(CONFIGS))
+    parser.add_argument("--workers", type=int, default=4, help="processes (gunicorn workers)")
+    parser.add_argument("--threads", type=int, default=4, help="writing threads per process")
+    parser.add_argument("--requests", type=int, default=100, help="scores posted per thread")
+    parser.add_argument("--readers", type=int, default=1, help="leaderboard reading threads per process")
+    args = parser.parse_args()
+
+    print(f"{'config':<20} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7} {'reads':>7} {'read p99':>9}")
+    for name in args.configs:
+        r = run(name, args.workers, args.threads, args.requests, args.readers)
+        print(f"{r['config']:<20} {r['writes_per_sec']:>9} {r['write_p50_ms']:>8} {r['write_p99_ms']:>8} "
+              f"{r['failed_writes']:>7} {r['reads']:>7} {r['read_p99_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,89 @@
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
 from .models import GameScore
+from .verification import replay
+
+REPLAY_CACHE_SECONDS = 3600
+MAX_FRAMES = 1000  # Positions per frames request
+
 
 @admin.register(GameScore)
 class GameScoreAdmin(admin.ModelAdmin):
-    list_display = ('user', 'score', 'game_mode', 'duration_seconds', 'created_at')
-    list_filter = ('created_at', 'game_mode')
-    search_fields = ('user__username',)
\ No newline at end of file
+    list_display = ('user', 'score', 'game_mode', 'board_size', 'duration_seconds', 'verification', 'created_at', 'replay_link')
+    list_filter = ('created_at', 'game_mode', 'board_size', 'verification')
+    search_fields = ('user__username',)
+
+    def get_urls(self):
+        view = self.admin_site.admin_view
+        return [
+            path('<int:pk>/replay/', view(self.replay_view), name='core_gamescore_replay'),
+            path('<int:pk>/replay/frames/', view(self.replay_frames), name='core_gamescore_replay_frames'),
+            path('<int:pk>/replay/download/', view(self.replay_download), name='core_gamescore_replay_download'),
+        ] + super().get_urls()
+
+    @admin.display(description='Replay')
+    def replay_link(self, obj):
+        if obj.move_log is None:
+            return '-'
+        return format_html('<a href="{}">Replay</a>', reverse('admin:core_gamescore_replay', args=[obj.pk]))
+
+    def get_replay(self, request, pk):
+        """Keyframed replay of a recorded game, packed in the cache so seeking never replays from move 0."""
+        # admin_view only checks is_staff; the cached copy must not skip the permission check
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        key = f'replay:{replay.REPLAY_VERSION}:{pk}'
+        packed = cache.get(key)
+        if packed is not None:
+            return replay.Replay.unpack(packed)
+        game_score = self.get_object(request, str(pk))
+        if game_score is None or game_score.move_log is None:
+            raise Http404("No recorded game")
+        if not self.has_view_permission(request, game_score):
+            raise PermissionDenied
+        try:
+            recorded = replay.Replay(game_score.seed, replay.decode(bytes(game_score.move_log)),
+                                     hard=game_score.game_mode == 'HARD', size=game_score.board_size)
+        except replay.ReplayError as e:
+            raise Http404(f"Unplayable move log: {e}")
+        cache.set(key, recorded.pack(), REPLAY_CACHE_SECONDS)
+        return recorded
+
+    def replay_view(self, request, pk):
+        recorded = self.get_replay(request, pk)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Replay #{pk}',
+            'game_score': self.get_object(request, str(pk)),
+            'moves': len(recorded),
+            'size': recorded.size,
+            'bits': recorded.spec.bits,
+            'frames_url': reverse('admin:core_gamescore_replay_frames', args=[pk]),
+            'download_url': reverse('admin:core_gamescore_replay_download', args=[pk]),
+        }
+        return TemplateResponse(request, 'admin/core/gamescore/replay.html', context)
+
+    def replay_frames(self, request, pk):
+        """?from=n&count=k: boards (hex, cell 0 in the lowest bits) and scores of positions n .. n + k - 1."""
+        recorded = self.get_replay(request, pk)
+        try:
+            start = max(0, int(request.GET.get('from', 0)))
+            count = min(MAX_FRAMES, max(1, int(request.GET.get('count', 256))))
+        except ValueError:
+            return JsonResponse({'error': 'from and count must be integers'}, status=400)
+        digits = (recorded.spec.bits * recorded.spec.cells + 3) // 4
+        frames = [[f'{board:0{digits}x}', score] for board, score in recorded.positions(start, start + count)]
+        return JsonResponse({'moves': len(recorded), 'from': start, 'frames': frames})
+
+    def replay_download(self, request, pk):
+        # File for the desktop client: python main.py --replay FILE
+        response = HttpResponse(self.get_replay(request, pk).pack(), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="game-{pk}.replay"'
+        return response
@@ -0,0 +1,74 @@
+"""Async versions of the score, leaderboard and stats APIs (served under /api/async/).
+
+Same parameters and responses as the views in views.py, written against the
+async ORM and cache API. Under an ASGI server (uvicorn / daphne, see
+mysite/asgi.py) a request waiting on a slow client or on the database does
+not hold a worker thread, so one process can keep thousands of connections
+open. Under WSGI they still work, Django runs them in an event loop per request.
+"""
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
+
+from . import leaderboard, ranking, scores
+from .models import GAME_MODES
+
+
+@login_required
+@require_POST
+async def save_score_api(request):
+    """Bản async của views.save_score_api"""
+    try:
+        fields = scores.parse_score(json.loads(request.body))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    pk, created = await scores.asave_score(await request.auser(), fields)
+    return JsonResponse({'status': 'success', 'id': pk, 'duplicate': not created})
+
+
+@require_GET
+async def leaderboard_api(request):
+    """Bản async của views.leaderboard_api"""
+    mode = request.GET.get('mode', 'EASY')
+    window = request.GET.get('window', 'all')
+    if mode not in GAME_MODES or window not in leaderboard.WINDOWS:
+        return JsonResponse({'status': 'error', 'message': 'invalid mode or window'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', 10))
+        after = request.GET.get('after')
+        after = leaderboard.parse_cursor(after) if after else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'invalid limit or cursor'}, status=400)
+
+    entries, next_cursor = await leaderboard.atop_scores(mode, window, limit, after)
+    return JsonResponse({'mode': mode, 'window': window, 'results': entries, 'next': next_cursor})
+
+
+@login_required
+@require_GET
+async def my_best_api(request):
+    """Bản async của views.my_best_api"""
+    user = await request.auser()
+    return JsonResponse({'best': {mode: await leaderboard.auser_best(user, mode) for mode in GAME_MODES}})
+
+
+@require_GET
+async def rank_api(request):
+    """Bản async của views.rank_api"""
+    mode = request.GET.get('mode', 'EASY')
+    period = request.GET.get('period', ranking.PERIOD_ALL)
+    if period == 'day':
+        period = ranking.day_period(timezone.now())
+    try:
+        score = int(request.GET['score'])
+        if period != ranking.PERIOD_ALL:
+            ranking.day_range(period)
+    except (KeyError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'invalid score or period'}, status=400)
+    if mode not in GAME_MODES:
+        return JsonResponse({'status': 'error', 'message': 'invalid mode'}, status=400)
+
+    return JsonResponse({'mode': mode, 'period': period, 'score': score, **await ranking.arank(mode, score, period)})
@@ -0,0 +1,62 @@
+"""Authentication backend that caches the user lookup of authenticated requests.
+
+AuthenticationMiddleware loads request.user through the backend's get_user()
+on every request. CachedModelBackend keeps the user row in the Django cache,
+but the fields authentication and authorization depend on (password, which
+the session hash is checked against, is_active, is_staff, is_superuser) are
+read again from the database on every request, one narrow query by primary
+key. The cache is per process by default and QuerySet.update() sends no
+signal, so the cached copy can be stale for up to CACHE_TIMEOUT: only the
+display fields (username, names, email) may lag behind. Saving or deleting
+a user still drops the entry in this process's cache.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+CACHE_TIMEOUT = 600  # seconds
+AUTH_FIELDS = ('password', 'is_active', 'is_staff', 'is_superuser')  # Never taken from the cache
+
+
+def _user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    def _auth_fields(self, user_id):
+        return get_user_model()._default_manager.filter(pk=user_id).values_list(*AUTH_FIELDS)
+
+    def _refresh(self, user, fields):
+        if fields is None:  # Deleted
+            return None
+        for name, value in zip(AUTH_FIELDS, fields):
+            setattr(user, name, value)
+        return user if self.user_can_authenticate(user) else None
+
+    def get_user(self, user_id):
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, CACHE_TIMEOUT)
+            return user
+        return self._refresh(user, self._auth_fields(user_id).first())
+
+    async def aget_user(self, user_id):
+        key = _user_key(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(key, user, CACHE_TIMEOUT)
+            return user
+        return self._refresh(user, await self._auth_fields(user_id).afirst())
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def forget_user(sender, instance, **kwargs):
+    cache.delete(_user_key(instance.pk))
@@ -0,0 +1,240 @@
+"""Leaderboard queries and their cache.
+
+Every read goes through one of the composite indexes on GameScore:
+- global top per mode: (game_mode, -score, id), keyset-paginated on (score, id)
+- per-user best: (user, game_mode, -score)
+- daily / weekly top: (game_mode, created_at)
+
+The first CACHED_TOP_N rows of each board live in the Django cache. When a
+new score is committed, record_score() inserts it into the cached boards it
+qualifies for instead of invalidating them, so reads never hit the table
+between writes. With the default per-process LocMemCache another worker
+picks the change up when its entry expires (CACHE_TIMEOUT); use a shared
+cache backend if that matters.
+
+The a-prefixed functions are the same operations on the async ORM and
+cache API, for the views in async_views.py.
+
+Only games on the standard 4x4 board are ranked: bigger boards make much
+higher scores and would push every 4x4 game off the board.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import GameScore, REJECTED, STANDARD_BOARD_SIZE
+
+CACHED_TOP_N = 100
+MAX_LIMIT = 100
+CACHE_TIMEOUT = 300  # seconds
+WINDOWS = ('all', 'daily', 'weekly')
+
+ENTRY_FIELDS = ('id', 'user__username', 'score', 'game_mode', 'duration_seconds', 'created_at')
+
+
+def window_start(window, now=None):
+    """Start of the current window (UTC midnight / Monday), None for all time."""
+    if window == 'all':
+        return None
+    now = now or timezone.now()
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == 'weekly':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def _cache_key(mode, window, start):
+    return f"leaderboard:{mode}:{window}:{start.date().isoformat() if start else 'all'}"
+
+
+def _user_key(user_id, mode):
+    return f"leaderboard:best:{user_id}:{mode}"
+
+
+def to_entry(row):
+    return {
+        'id': row['id'],
+        'username': row['user__username'],
+        'score': row['score'],
+        'game_mode': row['game_mode'],
+        'duration': row['duration_seconds'],
+        'created_at': row['created_at'].isoformat(),
+    }
+
+
+def _sort_key(entry):
+    return (-entry['score'], entry['id'])
+
+
+def ranked_games(**filters):
+    """Games that count on the boards: not rejected, on the standard board."""
+    return GameScore.objects.filter(board_size=STANDARD_BOARD_SIZE, **filters).exclude(verification=REJECTED)
+
+
+def _query(mode, start=None, after=None):
+    qs = ranked_games(game_mode=mode)
+    if start is not None:
+        qs = qs.filter(created_at__gte=start)
+    if after is not None:
+        score, pk = after
+        qs = qs.filter(Q(score__lt=score) | Q(score=score, id__gt=pk))
+    return qs.order_by('-score', 'id').values(*ENTRY_FIELDS)
+
+
+def cached_top(mode, window='all'):
+    """Top CACHED_TOP_N entries of a board, from the cache when possible."""
+    start = window_start(window)
+    key = _cache_key(mode, window, start)
+    entries = cache.get(key)
+    if entries is None:
+        entries = [to_entry(row) for row in _query(mode, start)[:CACHED_TOP_N]]
+        cache.set(key, entries, CACHE_TIMEOUT)
+    return entries
+
+
+async def acached_top(mode, window='all'):
+    start = window_start(window)
+    key = _cache_key(mode, window, start)
+    entries = await cache.aget(key)
+    if entries is None:
+        entries = [to_entry(row) async for row in _query(mode, start)[:CACHED_TOP_N]]
+        await cache.aset(key, entries, CACHE_TIMEOUT)
+    return entries
+
+
+def top_scores(mode, window='all', limit=10, after=None):
+    """One page of a board. ``after`` is the (score, id) of the last entry of the previous page.
+
+    Returns (entries, next_cursor); next_cursor is None on the last page.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    if after is None and limit <= CACHED_TOP_N:
+        top = cached_top(mode, window)
+        entries = top[:limit]
+        more = len(top) > limit
+    else:
+        rows = list(_query(mode, window_start(window), after)[:limit + 1])
+        entries = [to_entry(row) for row in rows[:limit]]
+        more = len(rows) > limit
+    return entries, _next_cursor(entries, more)
+
+
+async def atop_scores(mode, window='all', limit=10, after=None):
+    limit = max(1, min(limit, MAX_LIMIT))
+    if after is None and limit <= CACHED_TOP_N:
+        top = await acached_top(mode, window)
+        entries = top[:limit]
+        more = len(top) > limit
+    else:
+        rows = [row async for row in _query(mode, window_start(window), after)[:limit + 1]]
+        entries = [to_entry(row) for row in rows[:limit]]
+        more = len(rows) > limit
+    return entries, _next_cursor(entries, more)
+
+
+def _next_cursor(entries, more):
+    return f"{entries[-1]['score']}:{entries[-1]['id']}" if more and entries else None
+
+
+def parse_cursor(cursor):
+    """'score:id' -> (score, id). Raises ValueError on bad input."""
+    score, pk = cursor.split(':')
+    return int(score), int(pk)
+
+
+def user_best(user, mode):
+    key = _user_key(user.pk, mode)
+    best = cache.get(key)
+    if best is None:
+        row = (ranked_games(user=user, game_mode=mode)
+               .order_by('-score', 'id').values(*ENTRY_FIELDS).first())
+        # {} = "no score yet", so players without scores are cached too
+        best = to_entry(row) if row else {}
+        cache.set(key, best, CACHE_TIMEOUT)
+    return best or None
+
+
+async def auser_best(user, mode):
+    key = _user_key(user.pk, mode)
+    best = await cache.aget(key)
+    if best is None:
+        row = await (ranked_games(user=user, game_mode=mode)
+                     .order_by('-score', 'id').values(*ENTRY_FIELDS).afirst())
+        best = to_entry(row) if row else {}
+        await cache.aset(key, best, CACHE_TIMEOUT)
+    return best or None
+
+
+def _new_entry(game_score):
+    return {
+        'id': game_score.pk,
+        'username': game_score.user.username,
+        'score': game_score.score,
+        'game_mode': game_score.game_mode,
+        'duration': game_score.duration_seconds,
+        'created_at': game_score.created_at.isoformat(),
+    }
+
+
+def _board_keys(game_score):
+    return [_cache_key(game_score.game_mode, window, window_start(window, game_score.created_at))
+            for window in WINDOWS]
+
+
+def _with_entry(entries, entry):
+    """A cached board with ``entry`` added, None if it is unchanged."""
+    if entries is None:
+        return None  # Not cached: the next read builds it from the index
+    if len(entries) >= CACHED_TOP_N and _sort_key(entry) >= _sort_key(entries[-1]):
+        return None  # Below the cached cutoff
+    return sorted(entries + [entry], key=_sort_key)[:CACHED_TOP_N]
+
+
+def _improves(best, entry):
+    return best is not None and (not best or _sort_key(entry) < _sort_key(best))
+
+
+def record_score(game_score):
+    """Update the cached boards after a new GameScore was saved."""
+    if game_score.board_size != STANDARD_BOARD_SIZE:
+        return
+    entry = _new_entry(game_score)
+    for key in _board_keys(game_score):
+        entries = _with_entry(cache.get(key), entry)
+        if entries is not None:
+            cache.set(key, entries, CACHE_TIMEOUT)
+
+    user_key = _user_key(game_score.user_id, game_score.game_mode)
+    if _improves(cache.get(user_key), entry):
+        cache.set(user_key, entry, CACHE_TIMEOUT)
+
+
+def record_scores(game_scores):
+    """record_score() for each GameScore of a batch."""
+    for game_score in game_scores:
+        record_score(game_score)
+
+
+async def arecord_score(game_score):
+    if game_score.board_size != STANDARD_BOARD_SIZE:
+        return
+    entry = _new_entry(game_score)
+    for key in _board_keys(game_score):
+        entries = _with_entry(await cache.aget(key), entry)
+        if entries is not None:
+            await cache.aset(key, entries, CACHE_TIMEOUT)
+
+    user_key = _user_key(game_score.user_id, game_score.game_mode)
+    if _improves(await cache.aget(user_key), entry):
+        await cache.aset(user_key, entry, CACHE_TIMEOUT)
+
+
+def forget_score(game_score):
+    """Drop a rejected GameScore from the cached boards (they are rebuilt on the next read)."""
+    for key in _board_keys(game_score):
+        entries = cache.get(key)
+        if entries and any(entry['id'] == game_score.pk for entry in entries):
+            cache.delete(key)
+    cache.delete(_user_key(game_score.user_id, game_score.game_mode))
@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import io
+import json
+import re
+import shutil
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, we only skip the .br files
+    brotli = None
+
+HASH_LENGTH = 12
+COMPRESS_SUFFIXES = {'.apk', '.html', '.js', '.json'}
+MIN_COMPRESSION_GAIN = 0.05  # Don't ship a .gz/.br that is not at least 5% smaller
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def repack_stored(data):
+    # pygbag deflates every apk entry separately; stored entries let gzip/brotli work across the
+    # whole archive (smaller download) and the browser no longer inflates each file on mount
+    source = zipfile.ZipFile(io.BytesIO(data))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as target:
+        for info in source.infolist():
+            content = source.read(info)
+            info.compress_type = zipfile.ZIP_STORED
+            target.writestr(info, content)
+    return buffer.getvalue()
+
+
+def hashed_name(name, data):
+    path = Path(name)
+    return f"{path.stem}.{content_hash(data)}{path.suffix}"
+
+
+class Command(BaseCommand):
+    help = ("Copy the pygbag build (game_source/build/web) to static/game_dist with content-hashed "
+            "file names, a manifest.json and precompressed .gz/.br variants.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.BASE_DIR / 'game_source' / 'build' / 'web'))
+        parser.add_argument('--dest', default=str(settings.BASE_DIR / 'static' / 'game_dist'))
+        parser.add_argument('--no-repack', action='store_true', help="keep the apk exactly as pygbag wrote it")
+
+    def handle(self, *args, **options):
+        source = Path(options['source'])
+        dest = Path(options['dest'])
+        index_path = source / 'index.html'
+        if not index_path.exists():
+            raise CommandError(f"{index_path} not found, run pygbag first")
+
+        manifest = {}
+        files = {}  # hashed name -> content
+
+        # Assets first: index.html references them, so its own hash depends on theirs
+        for path in sorted(source.iterdir()):
+            if path.is_file() and path.name != 'index.html':
+                data = path.read_bytes()
+                if path.suffix == '.apk' and not options['no_repack']:
+                    data = repack_stored(data)
+                manifest[path.name] = hashed_name(path.name, data)
+                files[manifest[path.name]] = data
+
+        index = index_path.read_text(encoding='utf-8')
+        for name, hashed in manifest.items():
+            # pygbag loads the apk via `apk = "game_source.apk"` (maybe with a ?v= buster), the rest via src/href
+            index = re.sub(rf'(["\']){re.escape(name)}(\?[^"\']*)?\1', rf'\g<1>{hashed}\g<1>', index)
+        data = index.encode('utf-8')
+        manifest['index.html'] = hashed_name('index.html', data)
+        files[manifest['index.html']] = data
+
+        # Fresh output: old hashed files are never referenced again
+        if dest.exists():
+            shutil.rmtree(dest)
+        dest.mkdir(parents=True)
+
+        for name, data in files.items():
+            (dest / name).write_bytes(data)
+            line = f"{name}: {len(data):,} B"
+            if Path(name).suffix in COMPRESS_SUFFIXES:
+                variants = [('gz', 'gzip', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+                if brotli:
+                    variants.append(('br', 'brotli', lambda d: brotli.compress(d, quality=11)))
+                for suffix, label, compress in variants:
+                    compressed = compress(data)
+                    if len(compressed) <= len(data) * (1 - MIN_COMPRESSION_GAIN):
+                        (dest / f"{name}.{suffix}").write_bytes(compressed)
+                        line += f", {label} {len(compressed):,} B"
+                    else:
+                        line += f", {label} skipped (no gain)"
+            self.stdout.write(line)
+
+        (dest / 'manifest.json').write_text(json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"Game bundle written to {dest}"))
@@ -0,0 +1,155 @@
+import argparse
+import ast
+import json
+import math
+import os
+import re
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, only used to squeeze the PNGs a bit more
+    Image = None
+
+GAME_DIR = settings.BASE_DIR / 'game_source'
+PNG_LITERAL = re.compile(r'["\']([^"\']+\.png)["\']')
+
+
+def local_imports(entry):
+    """Modules of game_source imported (directly or not) by the entry module."""
+    found = []
+    pending = [entry]
+    while pending:
+        name = pending.pop()
+        if name in found or not (GAME_DIR / f"{name}.py").exists():
+            continue
+        found.append(name)
+        tree = ast.parse((GAME_DIR / f"{name}.py").read_text(encoding='utf-8'))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module.split('.')[0])
+    return sorted(found)
+
+
+def board(value):
+    """'600' (a board drawn at every size) or '370x4' (one size only) -> (width in px, cells per side or None)."""
+    width, _, cells = value.partition('x')
+    try:
+        return int(width), int(cells) if cells else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected PX or PXxCELLS, got {value!r}")
+
+
+def save_png(surface, path):
+    import pygame
+    pygame.image.save(surface, str(path))
+    if Image is not None:
+        Image.open(path).save(path, optimize=True)
+
+
+class Command(BaseCommand):
+    help = ("Build a trimmed pygbag source folder: only the modules main.py imports, only the images the "
+            "game loads, tiles pre-scaled to the board sizes we draw (optionally packed into sprite sheets).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dest', default=str(GAME_DIR / 'build' / 'bundle' / 'game_source'))
+        parser.add_argument('--board-sizes', type=board, nargs='+', default=[(600, None), (370, 4)],
+                            help="board widths in px, PXxCELLS for a single grid (600 = EASY, HARD and replay "
+                                 "boards at every size from 4x4 to 8x8, 370x4 = AI_MATCH boards)")
+        parser.add_argument('--atlas', action='store_true', help="pack each tile size into one sprite sheet")
+        parser.add_argument('--keep-originals', action='store_true',
+                            help="also ship the full-size images (fallback for other sizes)")
+
+    def handle(self, *args, **options):
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        try:
+            import pygame
+            from game_source import assets, engine
+        except ImportError as e:
+            raise CommandError(f"pygame is required to pack the assets: {e}")
+
+        dest = Path(options['dest'])
+        if dest.exists():
+            shutil.rmtree(dest)
+        (dest / 'assets').mkdir(parents=True)
+
+        # Code: main.py and what it imports, nothing else (tools like tournament.py stay out)
+        modules = local_imports('main')
+        for name in modules:
+            shutil.copy2(GAME_DIR / f"{name}.py", dest / f"{name}.py")
+
+        # Images: every tile the asset manager can ask for + any other .png named in the code
+        tile_values = [assets.BACKGROUND] + assets.VALUES
+        tile_names = {assets.image_name(v) for v in tile_values}
+        other_names = set()
+        for name in modules:
+            for literal in PNG_LITERAL.findall((GAME_DIR / f"{name}.py").read_text(encoding='utf-8')):
+                base = os.path.basename(literal)
+                if base not in tile_names and os.path.exists(os.path.join(assets.ASSET_DIR, base)):
+                    other_names.add(base)
+
+        # Cell size of every board the game can draw (Game2048.tile_width = width // cells)
+        grids = range(engine.MIN_SIZE, engine.MAX_SIZE + 1)
+        sizes = sorted({(px // cells, px // cells)
+                        for px, only in options['board_sizes'] for cells in ([only] if only else grids)})
+        sheets = {}
+        for width, height in sizes:
+            images = {}
+            for value in tile_values:
+                if os.path.exists(assets.image_path(value)):
+                    original = pygame.image.load(assets.image_path(value))
+                    images[value] = pygame.transform.scale(original, (width, height))
+
+            if options['atlas']:
+                columns = math.ceil(math.sqrt(len(images)))
+                rows = math.ceil(len(images) / columns)
+                sheet = pygame.Surface((columns * width, rows * height), pygame.SRCALPHA)
+                tiles = {}
+                for i, (value, image) in enumerate(images.items()):
+                    x, y = (i % columns) * width, (i // columns) * height
+                    sheet.blit(image, (x, y))
+                    tiles[str(value)] = [x, y, width, height]
+                sheet_name = f"sheet_{width}x{height}.png"
+                save_png(sheet, dest / 'assets' / sheet_name)
+                sheets[f"{width}x{height}"] = {'file': sheet_name, 'tiles': tiles}
+            else:
+                (dest / 'assets' / f"{width}x{height}").mkdir()
+                for value, image in images.items():
+                    save_png(image, dest / 'assets' / f"{width}x{height}" / assets.image_name(value))
+
+        if sheets:
+            (dest / 'assets' / 'sheets.json').write_text(json.dumps(sheets, sort_keys=True))
+
+        copy_names = set(other_names)
+        if options['keep_originals']:
+            copy_names |= {n for n in tile_names if os.path.exists(os.path.join(assets.ASSET_DIR, n))}
+        for name in copy_names:
+            shutil.copy2(os.path.join(assets.ASSET_DIR, name), dest / 'assets' / name)
+
+        self.report(dest, modules, assets.ASSET_DIR, tile_names | other_names)
+
+    def report(self, dest, modules, source_assets, referenced):
+        rows = []
+        for path in sorted(dest.rglob('*')):
+            if path.is_file():
+                rows.append((str(path.relative_to(dest)), path.stat().st_size))
+        dropped = sorted(n for n in os.listdir(source_assets) if n not in referenced)
+
+        width = max(len(name) for name, _ in rows)
+        for name, size in rows:
+            self.stdout.write(f"{name:<{width}}  {size:>10,} B")
+        total = sum(size for _, size in rows)
+        before = sum(os.path.getsize(os.path.join(source_assets, n)) for n in os.listdir(source_assets))
+        before += sum((GAME_DIR / f).stat().st_size for f in os.listdir(GAME_DIR) if f.endswith('.py'))
+        self.stdout.write(f"{'TOTAL':<{width}}  {total:>10,} B (source folder: {before:,} B)")
+        self.stdout.write(f"Modules: {', '.join(modules)}")
+        self.stdout.write(f"Not referenced by the game (dropped): {', '.join(dropped)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Bundle source written to {dest}. Next: pygbag {dest}, then "
+            f"manage.py build_game_dist --source {dest / 'build' / 'web'}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import ranking
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ScoreHistogram rows (all-time and per day) from the existing GameScore rows."
+
+    def handle(self, *args, **options):
+        games = ranking.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Score histogram rebuilt from {games} games."))
@@ -0,0 +1,54 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core import verification
+from core.models import GameScore, PENDING
+
+
+def _moves(data):
+    # A corrupt log was rejected by the replay, it just adds nothing to the move count
+    try:
+        return len(verification.replay.decode(data))
+    except verification.replay.ReplayError:
+        return 0
+
+
+class Command(BaseCommand):
+    help = ("Replay recorded games and check their scores: the ones still pending (e.g. after a restart), "
+            "or every recorded game with --all. Prints the throughput.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="also re-check verified and rejected games")
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processes (0 = this process)")
+        parser.add_argument('--chunk', type=int, default=verification.CHUNK, help="games per task")
+
+    def handle(self, *args, **options):
+        games = GameScore.objects.filter(move_log__isnull=False)
+        if not options['all']:
+            games = games.filter(verification=PENDING)
+        # store() only moves pending games to verified, and never rejects a game twice
+        jobs = verification.jobs_for(games.only('id', 'seed', 'move_log', 'score', 'game_mode', 'board_size'))
+
+        chunks = [jobs[i:i + options['chunk']] for i in range(0, len(jobs), options['chunk'])]
+        start = time.perf_counter()
+        results = []
+        if options['workers']:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(options['workers'], mp_context=context) as pool:
+                for chunk_results in pool.map(verification.replay.verify_all, chunks):
+                    results.extend(chunk_results)
+        else:
+            for chunk in chunks:
+                results.extend(verification.replay.verify_all(chunk))
+        elapsed = time.perf_counter() - start
+
+        rejected = verification.store(results)
+        moves = sum(_moves(job[2]) for job in jobs)
+        rate = len(jobs) / elapsed if elapsed else 0
+        self.stdout.write(f"{len(jobs)} games ({moves} moves) replayed in {elapsed:.2f} s: "
+                          f"{rate:,.0f} games/s, {moves / elapsed if elapsed else 0:,.0f} moves/s")
+        self.stdout.write(self.style.SUCCESS(f"{len(jobs) - rejected} verified, {rejected} rejected."))
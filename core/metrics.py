@@ -0,0 +1,195 @@
+"""Per-view request metrics kept in process memory (settings.METRICS_ENABLED).
+
+For every request MetricsMiddleware measures wall time, number and total
+time of DB queries, template render time and response size. The last
+WINDOW requests of each view are kept for the p50/p95/p99 quantiles, and
+running totals give the Prometheus _sum / _count. Each process only sees
+its own requests: scrape every worker, or run a single one.
+
+Queries and templates are measured by hooks installed once, when the
+middleware is enabled: a wrapper added to every DB connection and a wrapper
+around django.template.base.Template.render. The hooks find the request
+being measured through a context variable, so they also work inside
+sync_to_async threads, and cost one lookup outside of a request.
+"""
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+WINDOW = 1000  # Requests per view kept for the quantiles
+QUANTILES = (0.5, 0.95, 0.99)
+
+# name: (help text, index in a sample)
+SERIES = {
+    'request_duration_seconds': ("Wall time of the request", 0),
+    'db_queries': ("DB queries per request", 1),
+    'db_duration_seconds': ("Time spent in DB queries per request", 2),
+    'template_duration_seconds': ("Template render time per request", 3),
+    'response_bytes': ("Response body size", 4),
+}
+
+_current = ContextVar('request_metrics', default=None)
+_views = {}
+_lock = threading.Lock()
+_installed = False
+
+
+class Measure:
+    __slots__ = ('start', 'queries', 'db_time', 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+class ViewStats:
+    __slots__ = ('samples', 'count', 'sums')
+
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW)
+        self.count = 0
+        self.sums = [0.0] * len(SERIES)
+
+
+# --- HOOKS ---
+
+def _record_query(execute, sql, params, many, context):
+    measure = _current.get()
+    if measure is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        measure.queries += 1
+        measure.db_time += time.perf_counter() - start
+
+
+def _add_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _timed(render):
+    def timed_render(self, context):
+        measure = _current.get()
+        if measure is None:
+            return render(self, context)
+        # {% extends %} / {% include %} render nested templates: only time the outermost one
+        measure.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            measure.template_depth -= 1
+            if not measure.template_depth:
+                measure.template_time += time.perf_counter() - start
+    return timed_render
+
+
+def install():
+    """Install the DB and template hooks (once per process)."""
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        connection_created.connect(_add_wrapper)
+        for connection in connections.all(initialized_only=True):
+            _add_wrapper(connection)
+        Template.render = _timed(Template.render)
+        _installed = True
+
+
+# --- RECORDING ---
+
+def start():
+    """Start measuring the current request. Returns the token for finish()."""
+    return _current.set(Measure())
+
+
+def finish(token, request, response):
+    measure = _current.get()
+    _current.reset(token)
+    wall = time.perf_counter() - measure.start
+
+    size = len(response.content) if not response.streaming else int(response.get('Content-Length', 0))
+    sample = (wall, measure.queries, measure.db_time, measure.template_time, size)
+    label = view_label(request)
+    with _lock:
+        stats = _views.get(label)
+        if stats is None:
+            stats = _views[label] = ViewStats()
+        stats.samples.append(sample)
+        stats.count += 1
+        for i, value in enumerate(sample):
+            stats.sums[i] += value
+
+    response['Server-Timing'] = ', '.join([
+        f'app;dur={wall * 1000:.1f}',
+        f'db;dur={measure.db_time * 1000:.1f};desc="{measure.queries} queries"',
+        f'tpl;dur={measure.template_time * 1000:.1f}',
+    ])
+    return response
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'  # 404s, static files
+    if match.namespaces:
+        return match.namespaces[0]  # 'admin' for every admin page, keeps the label set small
+    return match.view_name or match._func_path
+
+
+# --- EXPORT ---
+
+def quantile(values, q):
+    """Nearest-rank quantile of sorted values."""
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def snapshot():
+    """{view: {'count', series: {'sum', 'p50', 'p95', 'p99'}}} for the requests seen so far."""
+    result = {}
+    with _lock:
+        views = [(view, list(stats.samples), stats.count, list(stats.sums)) for view, stats in _views.items()]
+    for view, samples, count, sums in views:
+        if not samples:
+            continue
+        entry = {'count': count}
+        for name, (_, index) in SERIES.items():
+            values = sorted(sample[index] for sample in samples)
+            entry[name] = {'sum': sums[index], **{f'p{round(q * 100)}': quantile(values, q) for q in QUANTILES}}
+        result[view] = entry
+    return result
+
+
+def prometheus():
+    """The snapshot in the Prometheus text exposition format (one summary per series)."""
+    data = snapshot()
+    lines = []
+    for name, (help_text, _) in SERIES.items():
+        metric = f'django_{name}'
+        lines.append(f'# HELP {metric} {help_text} (quantiles over the last {WINDOW} requests)')
+        lines.append(f'# TYPE {metric} summary')
+        for view in sorted(data):
+            entry = data[view]
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            for q in QUANTILES:
+                lines.append(f'{metric}{{view="{label}",quantile="{q}"}} {entry[name][f"p{round(q * 100)}"]:.6g}')
+            lines.append(f'{metric}_sum{{view="{label}"}} {entry[name]["sum"]:.6g}')
+            lines.append(f'{metric}_count{{view="{label}"}} {entry["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _views.clear()
@@ -0,0 +1,33 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+
+
+class MetricsMiddleware:
+    """Đo thời gian, số query / thời gian DB, thời gian render template và kích thước response
+    của từng request (core/metrics.py). Tắt (METRICS_ENABLED = False) thì Django bỏ hẳn middleware này."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        metrics.install()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = metrics.start()
+        response = self.get_response(request)
+        return metrics.finish(token, request, response)
+
+    async def __acall__(self, request):
+        token = metrics.start()
+        response = await self.get_response(request)
+        return metrics.finish(token, request, response)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_gamescore_game_mode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamescore',
+            index=models.Index(fields=['game_mode', '-score', 'id'], name='score_mode_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamescore',
+            index=models.Index(fields=['user', 'game_mode', '-score'], name='score_user_best_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamescore',
+            index=models.Index(fields=['game_mode', 'created_at'], name='score_mode_time_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_gamescore_leaderboard_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_mode', models.CharField(choices=[('EASY', 'Easy'), ('HARD', 'Hard'), ('AI_MATCH', 'AI Match')], max_length=20)),
+                ('period', models.CharField(max_length=10)),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('game_mode', 'period', 'bucket'), name='unique_histogram_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_scorehistogram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamescore',
+            name='client_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='gamescore',
+            constraint=models.UniqueConstraint(fields=('user', 'client_id'), name='unique_client_score'),
+        ),
+    ]
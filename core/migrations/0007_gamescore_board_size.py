@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_gamescore_replay'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamescore',
+            name='board_size',
+            field=models.PositiveSmallIntegerField(choices=[(4, '4x4'), (5, '5x5'), (6, '6x6'), (7, '7x7'), (8, '8x8')], default=4),
+        ),
+    ]
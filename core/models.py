@@ -1,6 +1,23 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+GAME_MODE_CHOICES = [('EASY', 'Easy'), ('HARD', 'Hard'), ('AI_MATCH', 'AI Match')]
+GAME_MODES = [mode for mode, _ in GAME_MODE_CHOICES]
+
+# Kích thước bàn cờ (game_source/engine.py: MIN_SIZE..MAX_SIZE), bảng xếp hạng chỉ tính bàn 4x4
+STANDARD_BOARD_SIZE = 4
+BOARD_SIZE_CHOICES = [(size, f'{size}x{size}') for size in range(4, 9)]
+BOARD_SIZES = [size for size, _ in BOARD_SIZE_CHOICES]
+
+# Kết quả chơi lại ván đã ghi (core/verification.py)
+UNVERIFIED, PENDING, VERIFIED, REJECTED = 'unverified', 'pending', 'verified', 'rejected'
+VERIFICATION_CHOICES = [
+    (UNVERIFIED, 'Unverified'),  # Không có move log
+    (PENDING, 'Pending'),
+    (VERIFIED, 'Verified'),
+    (REJECTED, 'Rejected'),
+]
+
 class GameScore(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     score = models.IntegerField()
@@ -9,10 +26,46 @@ class GameScore(models.Model):
     duration_seconds = models.FloatField(help_text="Thời gian chơi tính bằng giây")
     game_mode = models.CharField(
         max_length=20, 
-        choices=[('EASY', 'Easy'), ('HARD', 'Hard'), ('AI_MATCH', 'AI Match')],
+        choices=GAME_MODE_CHOICES,
         default='EASY'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Khóa idempotency do client tạo (UUID), gửi lại cùng khóa không tạo thêm bản ghi
+    client_id = models.CharField(max_length=64, null=True, blank=True)
+    # Ván đã ghi: seed của bộ sinh số ngẫu nhiên + các nước đi đã nén (game_source/replay.py)
+    seed = models.BigIntegerField(null=True, blank=True)
+    move_log = models.BinaryField(null=True, blank=True)
+    verification = models.CharField(max_length=10, choices=VERIFICATION_CHOICES, default=UNVERIFIED)
+    board_size = models.PositiveSmallIntegerField(choices=BOARD_SIZE_CHOICES, default=STANDARD_BOARD_SIZE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='unique_client_score'),
+        ]
+        indexes = [
+            # Bảng xếp hạng theo mode (phân trang keyset theo score giảm dần, id)
+            models.Index(fields=['game_mode', '-score', 'id'], name='score_mode_rank_idx'),
+            # Điểm cao nhất của từng người chơi
+            models.Index(fields=['user', 'game_mode', '-score'], name='score_user_best_idx'),
+            # Bảng xếp hạng theo ngày / tuần
+            models.Index(fields=['game_mode', 'created_at'], name='score_mode_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - Score: {self.score}"
+
+
+class ScoreHistogram(models.Model):
+    """Số ván theo khoảng điểm (bucket), cho từng mode: period='all' hoặc theo ngày 'YYYY-MM-DD'"""
+    game_mode = models.CharField(max_length=20, choices=GAME_MODE_CHOICES)
+    period = models.CharField(max_length=10)
+    bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['game_mode', 'period', 'bucket'], name='unique_histogram_bucket'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - Score: {self.score}"
\ No newline at end of file
+        return f"{self.game_mode} {self.period} #{self.bucket}: {self.count}"
@@ -0,0 +1,166 @@
+"""Approximate rank / percentile from a bucketed score histogram.
+
+Scores are grouped in logarithmic buckets (BUCKETS_PER_OCTAVE per doubling),
+one ScoreHistogram row per (mode, period, bucket) with period 'all' or a
+UTC day. save_score_api bumps two counters per game, and a rank lookup
+reads at most a few dozen rows, whatever the size of GameScore. Inside a
+bucket the position is interpolated. Near the top, where players compare
+exact positions, the rank is counted exactly on the (game_mode, -score)
+index instead, which only touches the few rows above the score.
+Like the leaderboard, only 4x4 games are counted (leaderboard.ranked_games).
+"""
+import math
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .leaderboard import ranked_games
+from .models import ScoreHistogram, STANDARD_BOARD_SIZE
+
+BUCKETS_PER_OCTAVE = 4
+EXACT_RANK_TOP = 1000  # Approximate ranks up to this are recounted exactly
+PERIOD_ALL = 'all'
+
+
+def bucket_of(score):
+    # Bucket 0 holds scores <= 0, bucket b >= 1 holds [2 ** ((b - 1) / k), 2 ** (b / k))
+    if score <= 0:
+        return 0
+    return int(math.log2(score) * BUCKETS_PER_OCTAVE) + 1
+
+
+def bucket_bounds(bucket):
+    if bucket == 0:
+        return 0.0, 1.0
+    return 2 ** ((bucket - 1) / BUCKETS_PER_OCTAVE), 2 ** (bucket / BUCKETS_PER_OCTAVE)
+
+
+def day_period(dt):
+    return dt.astimezone(timezone.utc).date().isoformat()
+
+
+def day_range(period):
+    start = datetime.combine(date.fromisoformat(period), time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def bump(game_mode, period, bucket, amount=1):
+    updated = (ScoreHistogram.objects
+               .filter(game_mode=game_mode, period=period, bucket=bucket)
+               .update(count=F('count') + amount))
+    if not updated:
+        try:
+            with transaction.atomic():
+                ScoreHistogram.objects.create(game_mode=game_mode, period=period, bucket=bucket, count=amount)
+        except IntegrityError:
+            # Another request created the row first
+            bump(game_mode, period, bucket, amount)
+
+
+def record_score(game_score):
+    """Count a newly saved GameScore in the all-time and daily histograms."""
+    if game_score.board_size != STANDARD_BOARD_SIZE:
+        return
+    bucket = bucket_of(game_score.score)
+    bump(game_score.game_mode, PERIOD_ALL, bucket)
+    bump(game_score.game_mode, day_period(game_score.created_at), bucket)
+
+
+def forget_score(game_score):
+    """Take a rejected GameScore back out of the histograms."""
+    if game_score.board_size != STANDARD_BOARD_SIZE:
+        return
+    bucket = bucket_of(game_score.score)
+    for period in (PERIOD_ALL, day_period(game_score.created_at)):
+        ScoreHistogram.objects.filter(game_mode=game_score.game_mode, period=period, bucket=bucket,
+                                      count__gt=0).update(count=F('count') - 1)
+
+
+def record_scores(game_scores):
+    """record_score() for a batch: one bump per distinct histogram row."""
+    counts = {}
+    for game_score in game_scores:
+        if game_score.board_size != STANDARD_BOARD_SIZE:
+            continue
+        bucket = bucket_of(game_score.score)
+        for period in (PERIOD_ALL, day_period(game_score.created_at)):
+            key = (game_score.game_mode, period, bucket)
+            counts[key] = counts.get(key, 0) + 1
+    for (game_mode, period, bucket), amount in counts.items():
+        bump(game_mode, period, bucket, amount)
+
+
+def _histogram(game_mode, period):
+    return ScoreHistogram.objects.filter(game_mode=game_mode, period=period).values_list('bucket', 'count')
+
+
+def _estimate(counts, score):
+    """(approximate rank, total) from the histogram counts."""
+    total = sum(counts.values())
+    target = bucket_of(score)
+
+    better = sum(count for bucket, count in counts.items() if bucket > target)
+    if counts.get(target):
+        low, high = bucket_bounds(target)
+        above = (high - score) / (high - low) if high > low else 0.0
+        better += counts[target] * min(max(above, 0.0), 1.0)
+    return int(better) + 1, total
+
+
+def _better_games(game_mode, score, period):
+    qs = ranked_games(game_mode=game_mode, score__gt=score)
+    if period != PERIOD_ALL:
+        start, end = day_range(period)
+        qs = qs.filter(created_at__gte=start, created_at__lt=end)
+    return qs
+
+
+def _result(position, total, exact):
+    position = min(position, max(total, 1))
+    percentile = 100.0 * (total - position) / (total - 1) if total > 1 else 100.0
+    return {'rank': position, 'total': total, 'percentile': round(percentile, 1), 'exact': exact}
+
+
+def rank(game_mode, score, period=PERIOD_ALL):
+    """Rank of ``score`` among the games of a mode/period.
+
+    Returns {'rank', 'total', 'percentile', 'exact'}; rank 1 is the best,
+    percentile is the share of other games this score beats.
+    """
+    position, total = _estimate(dict(_histogram(game_mode, period)), score)
+    exact = position <= EXACT_RANK_TOP
+    if exact:
+        position = _better_games(game_mode, score, period).count() + 1
+    return _result(position, total, exact)
+
+
+async def arank(game_mode, score, period=PERIOD_ALL):
+    counts = {bucket: count async for bucket, count in _histogram(game_mode, period)}
+    position, total = _estimate(counts, score)
+    exact = position <= EXACT_RANK_TOP
+    if exact:
+        position = await _better_games(game_mode, score, period).acount() + 1
+    return _result(position, total, exact)
+
+
+def rebuild():
+    """Recompute every histogram row from GameScore. Returns the number of games counted."""
+    counts = {}
+    games = 0
+    rows = (ranked_games()
+            .values_list('game_mode', 'score', 'created_at').iterator(chunk_size=5000))
+    for game_mode, score, created_at in rows:
+        bucket = bucket_of(score)
+        for period in (PERIOD_ALL, day_period(created_at)):
+            key = (game_mode, period, bucket)
+            counts[key] = counts.get(key, 0) + 1
+        games += 1
+
+    with transaction.atomic():
+        ScoreHistogram.objects.all().delete()
+        ScoreHistogram.objects.bulk_create(
+            [ScoreHistogram(game_mode=m, period=p, bucket=b, count=c) for (m, p, b), c in counts.items()],
+            batch_size=1000,
+        )
+    return games
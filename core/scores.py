@@ -0,0 +1,179 @@
+"""Validation and storage of submitted game scores.
+
+Both the single-score API and the batch API go through parse_score(), so a
+payload is accepted or rejected the same way whichever endpoint it hits.
+
+A score may carry a ``client_id`` (a UUID made by the client when the game
+ends). (user, client_id) is unique, so a client that retries a request it
+never got an answer for cannot create the same game twice: the retried
+items come back as 'duplicate' instead.
+"""
+from asgiref.sync import sync_to_async
+import base64
+import binascii
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import leaderboard, ranking, verification
+from .models import GameScore, BOARD_SIZES, GAME_MODES, PENDING, STANDARD_BOARD_SIZE, UNVERIFIED
+
+MAX_BATCH_SIZE = 500  # Scores per batch request
+MAX_CLIENT_ID_LENGTH = GameScore._meta.get_field('client_id').max_length
+MAX_MOVE_LOG_BYTES = 64 * 1024  # A packed log takes at most ~1 byte per 4 moves
+MAX_SEED = 2 ** 53
+
+
+def _datetime(value, field):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"{field} must be an ISO 8601 datetime")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_score(data):
+    """Check one submitted score and return the GameScore field values.
+
+    Raises ValueError with a message for the client on bad input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("score must be a JSON object")
+
+    score = data.get('score')
+    if isinstance(score, bool) or not isinstance(score, int) or score < 0:
+        raise ValueError("score must be a non-negative integer")
+    duration = data.get('duration')
+    if isinstance(duration, bool) or not isinstance(duration, (int, float)) or duration < 0:
+        raise ValueError("duration must be a non-negative number")
+    game_mode = data.get('game_mode', 'EASY')
+    if game_mode not in GAME_MODES:
+        raise ValueError(f"game_mode must be one of {', '.join(GAME_MODES)}")
+    client_id = data.get('client_id')
+    if client_id is not None and (not isinstance(client_id, str) or not 0 < len(client_id) <= MAX_CLIENT_ID_LENGTH):
+        raise ValueError(f"client_id must be a string of 1 to {MAX_CLIENT_ID_LENGTH} characters")
+    board_size = data.get('board_size', STANDARD_BOARD_SIZE)
+    if isinstance(board_size, bool) or board_size not in BOARD_SIZES:
+        raise ValueError(f"board_size must be one of {', '.join(map(str, BOARD_SIZES))}")
+    if board_size != STANDARD_BOARD_SIZE and game_mode != 'EASY':
+        raise ValueError(f"{game_mode} is only played on a {STANDARD_BOARD_SIZE}x{STANDARD_BOARD_SIZE} board")
+    seed, move_log = _recording(data)
+
+    return {
+        'score': score,
+        'start_time': _datetime(data.get('start_time'), 'start_time'),
+        'end_time': _datetime(data.get('end_time'), 'end_time'),
+        'duration_seconds': duration,
+        'game_mode': game_mode,
+        'board_size': board_size,
+        'client_id': client_id,
+        'seed': seed,
+        'move_log': move_log,
+        'verification': PENDING if move_log is not None else UNVERIFIED,
+    }
+
+
+def _recording(data):
+    """(seed, packed move log) of a recorded game, (None, None) for a game sent without one."""
+    seed, move_log = data.get('seed'), data.get('move_log')
+    if seed is None and move_log is None:
+        return None, None
+    if isinstance(seed, bool) or not isinstance(seed, int) or not 0 <= seed < MAX_SEED:
+        raise ValueError("seed must be an integer between 0 and 2**53")
+    if not isinstance(move_log, str):
+        raise ValueError("move_log must be a base64 string")
+    try:
+        packed = base64.b64decode(move_log, validate=True)
+    except binascii.Error:
+        raise ValueError("move_log must be a base64 string")
+    if len(packed) > MAX_MOVE_LOG_BYTES:
+        raise ValueError(f"move_log is larger than {MAX_MOVE_LOG_BYTES} bytes")
+    return seed, packed
+
+
+def save_scores(user, items):
+    """Store a batch of submitted scores for ``user`` in one transaction.
+
+    ``items`` is a list of raw payloads. Every item is validated before
+    anything is written. Returns one result per item, in order:
+    {'status': 'created', 'id': ...}, {'status': 'duplicate', 'id': ...}
+    or {'status': 'error', 'message': ...}.
+    """
+    results = [None] * len(items)
+    valid = []
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, parse_score(item)))
+        except ValueError as e:
+            results[i] = {'status': 'error', 'message': str(e)}
+
+    for attempt in range(2):
+        try:
+            created = _insert(user, valid, results)
+            break
+        except IntegrityError:
+            # A concurrent request stored one of our client_ids between the lookup and the insert:
+            # look the keys up again, they now come back as duplicates
+            if attempt:
+                raise
+
+    # After the commit: inside the writer thread's group transaction the rows are not visible yet,
+    # and a group that rolls back must not leave them on the cached boards
+    transaction.on_commit(lambda: leaderboard.record_scores(created))
+    transaction.on_commit(lambda: verification.submit(created))
+    return results
+
+
+def _insert(user, valid, results):
+    with transaction.atomic():
+        client_ids = {fields['client_id'] for _, fields in valid if fields['client_id']}
+        existing = dict(GameScore.objects
+                        .filter(user=user, client_id__in=client_ids)
+                        .values_list('client_id', 'id')) if client_ids else {}
+
+        pending = []
+        seen = {}
+        for i, fields in valid:
+            client_id = fields['client_id']
+            if client_id in existing:
+                results[i] = {'status': 'duplicate', 'id': existing[client_id]}
+            elif client_id in seen:
+                # Same key twice in one batch: keep the first one
+                seen[client_id].append(i)
+            else:
+                if client_id:
+                    seen[client_id] = []
+                pending.append((i, GameScore(user=user, **fields)))
+
+        created = GameScore.objects.bulk_create([game_score for _, game_score in pending])
+        for i, game_score in pending:
+            results[i] = {'status': 'created', 'id': game_score.pk}
+            for repeat in seen.get(game_score.client_id, ()):
+                results[repeat] = {'status': 'duplicate', 'id': game_score.pk}
+        ranking.record_scores(created)
+    return created
+
+
+async def asave_score(user, fields):
+    """Store one parse_score() result with the async ORM. Returns (id, created)."""
+    client_id = fields['client_id']
+    stored = GameScore.objects.filter(user=user, client_id=client_id).values_list('id', flat=True)
+    if client_id:
+        existing = await stored.afirst()
+        if existing is not None:
+            return existing, False
+    try:
+        game_score = await GameScore.objects.acreate(user=user, **fields)
+    except IntegrityError:
+        if not client_id:
+            raise
+        return await stored.aget(), False  # Stored by a concurrent request since the lookup
+
+    await leaderboard.arecord_score(game_score)
+    # The histogram bump needs a transaction, which the async ORM does not have
+    await sync_to_async(ranking.record_score)(game_score)
+    # Replays inline with VERIFY_WORKERS=0, else may start the process pool: neither on the event loop
+    await sync_to_async(verification.submit)([game_score])
+    return game_score.pk, True
@@ -0,0 +1,29 @@
+import json
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+
+register = template.Library()
+
+MANIFEST_PATH = settings.BASE_DIR / 'static' / 'game_dist' / 'manifest.json'
+
+_manifest = {'mtime': None, 'files': {}}
+
+
+def load_manifest():
+    # Re-read only when build_game_dist rewrote the file
+    try:
+        mtime = MANIFEST_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return {}
+    if mtime != _manifest['mtime']:
+        _manifest['files'] = json.loads(MANIFEST_PATH.read_text())
+        _manifest['mtime'] = mtime
+    return _manifest['files']
+
+
+@register.simple_tag
+def game_dist_url(name):
+    """URL of a game bundle file, content-hashed if the manifest knows it."""
+    return static(f"game_dist/{load_manifest().get(name, name)}")
@@ -1,3 +1,683 @@
-from django.test import TestCase
+import base64
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from game_source import engine
+
+from . import leaderboard, metrics, ranking, scores, verification
+from .middleware import MetricsMiddleware
+from .models import GameScore, ScoreHistogram, PENDING, REJECTED, VERIFIED
+from .verification import replay
+
+
+def naive_move(grid, direction, max_tile):
+    """(grid, gain) after a move, merged on plain lists (reference for the engine tables)."""
+    size = len(grid)
+
+    def slide(cells):
+        tiles = [value for value in cells if value]
+        merged, gain, i = [], 0, 0
+        while i < len(tiles):
+            if i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and tiles[i] < max_tile:
+                merged.append(tiles[i] * 2)
+                gain += tiles[i] * 2
+                i += 2
+            else:
+                merged.append(tiles[i])
+                i += 1
+        return merged + [0] * (size - len(merged)), gain
+
+    columns = direction in (engine.UP, engine.DOWN)
+    lines = [list(line) for line in zip(*grid)] if columns else [list(row) for row in grid]
+    backwards = direction in (engine.RIGHT, engine.DOWN)
+    result, total = [], 0
+    for line in lines:
+        moved, gain = slide(line[::-1] if backwards else line)
+        result.append(moved[::-1] if backwards else moved)
+        total += gain
+    return ([list(row) for row in zip(*result)] if columns else result), total
+
+
+def make_game(user, score, created_at=None, **fields):
+    """A stored GameScore; created_at (auto_now_add) is set afterwards when given."""
+    now = timezone.now()
+    game_score = GameScore.objects.create(user=user, score=score, start_time=now, end_time=now,
+                                          duration_seconds=60, **fields)
+    if created_at is not None:
+        GameScore.objects.filter(pk=game_score.pk).update(created_at=created_at)
+        game_score.created_at = created_at
+    return game_score
+
+
+class GamePageQueryTests(TestCase):
+    """Trang game chỉ cần một query DB (trạng thái đăng nhập) khi session, user và fragment đã nằm trong cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('player', password='game-password')
+        self.client.force_login(self.user)
+
+    def test_game_page_needs_one_query_once_cached(self):
+        self.client.get(reverse('game'))  # Warms the session, user and fragment caches
+        with self.assertNumQueries(1):  # password / is_active / is_staff / is_superuser, never cached
+            response = self.client.get(reverse('game'))
+        self.assertContains(response, 'Hello, player!')
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_score_queue_is_per_user(self):
+        first = self.client.get(reverse('game'))
+        other = User.objects.create_user('other')
+        self.client.force_login(other)
+        second = self.client.get(reverse('game'))
+        self.assertContains(first, f'data-user-id="{self.user.pk}"')
+        self.assertContains(second, f'data-user-id="{other.pk}"')
+        # The cached script is the same for everyone and reads the key from the page
+        self.assertContains(second, "'scoreQueue:' + document.getElementById('gameFrame').dataset.userId")
+
+    def test_root_page_needs_one_query_once_cached(self):
+        self.client.get('/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cold_cache_reads_user_once(self):
+        self.client.get(reverse('game'))
+        cache.clear()  # Session and user gone from the cache
+        with self.assertNumQueries(2):  # django_session + auth_user
+            self.client.get(reverse('game'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('game'))
+
+    def test_saving_the_user_refreshes_the_cached_copy(self):
+        self.client.get(reverse('game'))
+        self.user.username = 'renamed'
+        self.user.save()
+        with self.assertNumQueries(1):  # auth_user only, the session is still cached
+            response = self.client.get(reverse('game'))
+        self.assertContains(response, 'Hello, renamed!')
+
+    def test_deactivated_user_is_logged_out(self):
+        self.client.get(reverse('game'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('game'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('game')}", fetch_redirect_response=False)
+
+    def test_user_changed_without_signals_is_logged_out(self):
+        # QuerySet.update() sends no post_save, and another worker's cache is never told anyway
+        self.client.get(reverse('game'))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get(reverse('game'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('game')}", fetch_redirect_response=False)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.client.force_login(self.user)
+        self.client.get(reverse('game'))
+        User.objects.filter(pk=self.user.pk).update(password='changed elsewhere')
+        response = self.client.get(reverse('game'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('game')}", fetch_redirect_response=False)
+
+    async def test_async_lookup_reads_is_active(self):
+        await self.async_client.aforce_login(self.user)
+        await self.async_client.get(reverse('async_leaderboard_me'))
+        await User.objects.filter(pk=self.user.pk).aupdate(is_active=False)
+        self.assertEqual((await self.async_client.get(reverse('async_leaderboard_me'))).status_code, 302)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache')
+    def test_cache_only_sessions(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('game'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('game'))
+        self.assertContains(response, 'Hello, player!')
+
+
+class LeaderboardQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_leaderboard_needs_no_queries(self):
+        self.client.get(reverse('leaderboard'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response.json()['results'], [])
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+
+    def test_keyset_pages_cover_the_board_once(self):
+        games = [make_game(self.alice, score) for score in (300, 500, 400, 400, 400, 100)]
+        expected = [g.pk for g in sorted(games, key=lambda g: (-g.score, g.pk))]
+        seen = []
+        params = {'limit': 2}
+        while True:
+            page = self.client.get(reverse('leaderboard'), params).json()
+            seen.extend(entry['id'] for entry in page['results'])
+            if not page['next']:
+                break
+            params['after'] = page['next']
+        self.assertEqual(seen, expected)
+        # The 400 tie is split between pages on the id
+        self.assertEqual(leaderboard.parse_cursor(leaderboard.top_scores('EASY', limit=2)[1]), (400, expected[1]))
+
+    @mock.patch.object(leaderboard, 'CACHED_TOP_N', 3)
+    def test_record_score_updates_the_cached_board(self):
+        for score in (100, 200, 300):
+            make_game(self.alice, score)
+        leaderboard.cached_top('EASY')
+        leaderboard.record_score(make_game(self.bob, 250))
+        leaderboard.record_score(make_game(self.bob, 50))  # Below the cutoff
+        with self.assertNumQueries(0):
+            top = leaderboard.cached_top('EASY')
+        self.assertEqual([entry['score'] for entry in top], [300, 250, 200])
+        self.assertEqual(top, [leaderboard.to_entry(row) for row in leaderboard._query('EASY')[:3]])
+
+    def test_user_best(self):
+        self.assertIsNone(leaderboard.user_best(self.alice, 'EASY'))
+        with self.assertNumQueries(0):  # "No score yet" is cached too
+            self.assertIsNone(leaderboard.user_best(self.alice, 'EASY'))
+        leaderboard.record_score(make_game(self.alice, 200))
+        leaderboard.record_score(make_game(self.alice, 100))
+        make_game(self.bob, 900)
+        with self.assertNumQueries(0):
+            self.assertEqual(leaderboard.user_best(self.alice, 'EASY')['score'], 200)
+        self.assertIsNone(leaderboard.user_best(self.alice, 'HARD'))
+
+    def test_only_standard_unrejected_games_are_ranked(self):
+        ranked = make_game(self.alice, 100)
+        big = make_game(self.alice, 5000, board_size=6)
+        make_game(self.alice, 9000, verification=REJECTED)
+        self.assertEqual(list(leaderboard.ranked_games()), [ranked])
+        leaderboard.cached_top('EASY')
+        leaderboard.record_score(big)
+        self.assertEqual([entry['id'] for entry in leaderboard.cached_top('EASY')], [ranked.pk])
+        self.assertEqual(leaderboard.user_best(self.alice, 'EASY')['id'], ranked.pk)
+
+
+@override_settings(VERIFY_WORKERS=0)
+class BatchScoreTests(TestCase):
+    """API gửi nhiều điểm: JSON, NDJSON, sendBeacon, giới hạn kích thước, lỗi từng mục, client_id"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('player', password='game-password')
+        self.client.force_login(self.user)
+
+    def item(self, score, client_id=None, **fields):
+        return {'score': score, 'start_time': '2025-11-28T10:00:00', 'end_time': '2025-11-28T10:05:00',
+                'duration': 300, 'game_mode': 'EASY', 'client_id': client_id, **fields}
+
+    def post(self, body, content_type='application/json'):
+        return self.client.post(reverse('save_scores'), body, content_type=content_type)
+
+    def test_payload_formats(self):
+        items = [self.item(100), self.item(200)]
+        self.assertEqual(self.post(json.dumps(items)).json()['created'], 2)
+        self.assertEqual(self.post(json.dumps({'scores': items})).json()['created'], 2)
+        ndjson = '\n'.join(json.dumps(item) for item in items) + '\n\n'
+        self.assertEqual(self.post(ndjson, 'application/x-ndjson').json()['created'], 2)
+        # navigator.sendBeacon(url, FormData) on page unload
+        beacon = self.client.post(reverse('save_scores'), {'payload': json.dumps(items)})
+        self.assertEqual(beacon.json()['created'], 2)
+        self.assertEqual(GameScore.objects.filter(user=self.user).count(), 8)
+        self.assertEqual(self.post('{"scores": 3}').status_code, 400)
+        self.assertEqual(self.post('not json').status_code, 400)
+
+    def test_too_many_scores(self):
+        response = self.post(json.dumps([self.item(1)] * (scores.MAX_BATCH_SIZE + 1)))
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(GameScore.objects.exists())
+
+    def test_invalid_items_do_not_block_the_rest(self):
+        response = self.post(json.dumps([self.item(100), self.item(-1), 'score', self.item(300, game_mode='X')]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['created'], data['duplicate'], data['error']), (1, 0, 3))
+        self.assertEqual([r['status'] for r in data['results']], ['created', 'error', 'error', 'error'])
+        self.assertIn('score', data['results'][1]['message'])
+        self.assertEqual(list(GameScore.objects.values_list('score', flat=True)), [100])
+
+    def test_malformed_ndjson_line_does_not_block_the_rest(self):
+        ndjson = '\n'.join([json.dumps(self.item(100)), '{"score": 2', '', json.dumps(self.item(300))])
+        response = self.post(ndjson, 'application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['created'], data['error']), (2, 1))
+        self.assertEqual([r['status'] for r in data['results']], ['created', 'error', 'created'])
+        self.assertEqual(data['results'][1]['index'], 1)
+        self.assertIn('error', data['results'][1])
+        self.assertEqual(sorted(GameScore.objects.values_list('score', flat=True)), [100, 300])
+
+    def test_client_ids_are_idempotent(self):
+        items = [self.item(100, 'game-a'), self.item(200, 'game-b'), self.item(100, 'game-a'), self.item(50)]
+        first = self.post(json.dumps(items)).json()
+        self.assertEqual([r['status'] for r in first['results']], ['created', 'created', 'duplicate', 'created'])
+        self.assertEqual(first['results'][2]['id'], first['results'][0]['id'])
+        # The client never got the answer and sends the same batch again
+        retry = self.post(json.dumps(items[:3])).json()
+        self.assertEqual([r['status'] for r in retry['results']], ['duplicate'] * 3)
+        self.assertEqual([r['id'] for r in retry['results']], [r['id'] for r in first['results'][:3]])
+        self.assertEqual(GameScore.objects.count(), 3)
+        # Keys are per user
+        self.client.force_login(User.objects.create_user('other'))
+        self.assertEqual(self.post(json.dumps(items[:1])).json()['created'], 1)
+
+    def test_rolled_back_group_leaves_the_cached_board_alone(self):
+        # Writer thread (SCORE_WRITER): every request's scores inside one group transaction
+        self.client.get(reverse('leaderboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                scores.save_scores(self.user, [self.item(100)])
+                raise RuntimeError("group commit failed")
+        self.assertEqual(self.client.get(reverse('leaderboard')).json()['results'], [])
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            scores.save_scores(self.user, [self.item(200)])
+        self.assertEqual([e['score'] for e in self.client.get(reverse('leaderboard')).json()['results']], [200])
+
+
+def score_payload(score, client_id=None):
+    return json.dumps({'score': score, 'start_time': '2025-11-28T10:00:00', 'end_time': '2025-11-28T10:05:00',
+                       'duration': 300, 'game_mode': 'EASY', 'client_id': client_id})
+
+
+@override_settings(VERIFY_WORKERS=0)
+class AsyncApiTests(TestCase):
+    """Các API async (/api/async/) trả về giống bản sync"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('player', password='game-password')
+
+    async def save(self, score, client_id=None):
+        return await self.async_client.post(reverse('async_save_score'), score_payload(score, client_id),
+                                            content_type='application/json')
+
+    async def test_save_leaderboard_and_rank(self):
+        await self.async_client.aforce_login(self.user)
+        await self.async_client.get(reverse('async_leaderboard'))  # Cached, the saves must update it
+        first = (await self.save(300, 'game-a')).json()
+        self.assertEqual(first['duplicate'], False)
+        await self.save(100)
+        replayed = (await self.save(300, 'game-a')).json()
+        self.assertEqual((replayed['id'], replayed['duplicate']), (first['id'], True))
+        self.assertEqual(await GameScore.objects.acount(), 2)
+
+        board = (await self.async_client.get(reverse('async_leaderboard'), {'limit': 1})).json()
+        self.assertEqual([e['score'] for e in board['results']], [300])
+        page = (await self.async_client.get(reverse('async_leaderboard'), {'limit': 1, 'after': board['next']})).json()
+        self.assertEqual(([e['score'] for e in page['results']], page['next']), ([100], None))
+        self.assertEqual(board, (await sync_to_async(self.client.get)(reverse('leaderboard'), {'limit': 1})).json())
+
+        best = (await self.async_client.get(reverse('async_leaderboard_me'))).json()['best']
+        self.assertEqual((best['EASY']['score'], best['HARD']), (300, None))
+        rank = (await self.async_client.get(reverse('async_rank'), {'mode': 'EASY', 'score': 200})).json()
+        self.assertEqual((rank['rank'], rank['total'], rank['exact']), (2, 2, True))
+
+    async def test_bad_requests(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(reverse('async_save_score'), '{"score": -1}',
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((await self.async_client.get(reverse('async_rank'), {'score': 'x'})).status_code, 400)
+        self.assertEqual((await self.async_client.get(reverse('async_leaderboard'), {'mode': 'X'})).status_code, 400)
+        await self.async_client.alogout()
+        self.assertEqual((await self.save(100)).status_code, 302)
+
+
+class AsgiStaticFilesTests(SimpleTestCase):
+    """Dưới ASGI static vẫn qua WhiteNoise: cache immutable cho file có hash, bản nén sẵn .br"""
+
+    async def get(self, path, headers=()):
+        with mock.patch.dict(os.environ):  # asgi.py sets DJANGO_ASGI
+            from mysite.asgi import application
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': list(headers)}
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(5)
+        body = b''
+        while True:
+            message = await communicator.receive_output(5)
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return start['status'], {key.lower(): value for key, value in start['headers']}, body
+
+    async def test_hashed_game_files(self):
+        with open(Path(__file__).resolve().parent.parent / 'static' / 'game_dist' / 'manifest.json') as f:
+            apk = json.load(f)['game_source.apk']
+        status, headers, body = await self.get(f'/static/game_dist/{apk}', [(b'accept-encoding', b'gzip, br')])
+        self.assertEqual(status, 200)
+        self.assertIn(b'immutable', headers[b'cache-control'])
+        self.assertEqual(headers[b'content-encoding'], b'br')
+        self.assertEqual(int(headers[b'content-length']), len(body))
+        self.assertEqual((await self.get('/static/game_dist/missing.apk'))[0], 404)
+
+
+@override_settings(VERIFY_WORKERS=0)
+class AsyncSaveRaceTests(TransactionTestCase):
+    """Hai request cùng client_id: request thua nhận IntegrityError và trả về bản đã lưu"""
+
+    async def test_concurrent_duplicate_returns_the_stored_score(self):
+        user = await User.objects.acreate(username='player')
+        stored = await sync_to_async(make_game)(user, 300, client_id='game-a')
+        fields = scores.parse_score(json.loads(score_payload(300, 'game-a')))
+        # The other request stores its row between our lookup and our insert
+        with mock.patch('django.db.models.query.QuerySet.afirst', mock.AsyncMock(return_value=None)):
+            self.assertEqual(await scores.asave_score(user, fields), (stored.pk, False))
+        self.assertEqual(await GameScore.objects.acount(), 1)
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTests(TestCase):
+    """Middleware đo từng request và endpoint /metrics/ (định dạng Prometheus)"""
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('leaderboard'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries", tpl;dur=[\d.]+$')
+
+    def test_counts_per_view(self):
+        for _ in range(3):
+            self.client.get(reverse('leaderboard'))
+        self.client.get(reverse('rank'), {'score': 10})
+        self.client.get('/no-such-page/')
+        data = metrics.snapshot()
+        self.assertEqual({view: entry['count'] for view, entry in data.items()},
+                         {'leaderboard': 3, 'rank': 1, 'unresolved': 1})
+        # Cached after the first request: one query in total
+        self.assertEqual(data['leaderboard']['db_queries']['sum'], 1)
+        self.assertEqual(data['leaderboard']['db_queries']['p99'], 1)
+        self.assertGreater(data['leaderboard']['response_bytes']['p50'], 0)
+
+    def test_metrics_page_is_for_staff_only(self):
+        self.client.get(reverse('leaderboard'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 302)
+        self.client.force_login(User.objects.create_user('player'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 302)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE django_request_duration_seconds summary', body)
+        self.assertIn('django_request_duration_seconds_count{view="leaderboard"} 1', body)
+        self.assertIn('django_db_queries{view="leaderboard",quantile="0.99"} 1', body)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_middleware_is_skipped(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            MetricsMiddleware(lambda request: None)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('leaderboard')))
+        self.assertEqual(metrics.snapshot(), {})
+
+
+class RankingTests(TestCase):
+    """Thứ hạng từ histogram: nội suy trong bucket, đếm chính xác ở top, cập nhật khi bị loại"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('player')
+        self.today = timezone.now()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def play(self, score, created_at=None):
+        game_score = make_game(self.user, score, created_at)
+        ranking.record_score(game_score)
+        return game_score
+
+    def counts(self):
+        return set(ScoreHistogram.objects.filter(count__gt=0).values_list('game_mode', 'period', 'bucket', 'count'))
+
+    def test_rank_is_interpolated_inside_the_bucket(self):
+        bucket = ranking.bucket_of(1000)
+        for offset, amount in ((1, 4000), (0, 2000), (-1, 1000)):
+            ranking.bump('EASY', ranking.PERIOD_ALL, bucket + offset, amount)
+        low, high = ranking.bucket_bounds(bucket)
+        score = int((low + high) / 2)
+        better = 4000 + int(2000 * (high - score) / (high - low))
+        self.assertEqual(ranking.rank('EASY', score), {
+            'rank': better + 1, 'total': 7000, 'percentile': round(100 * (7000 - better - 1) / 6999, 1), 'exact': False,
+        })
+        self.assertEqual(ranking.rank('EASY', 10 ** 9)['rank'], 1)
+
+    def test_top_ranks_are_counted_exactly(self):
+        for score in (100, 300, 300, 400, 1000):
+            self.play(score)
+        self.assertEqual(ranking.rank('EASY', 350), {'rank': 3, 'total': 5, 'percentile': 50.0, 'exact': True})
+        self.assertEqual(ranking.rank('EASY', 300)['rank'], 3)  # Ties share the rank
+        self.assertEqual(ranking.rank('EASY', 50)['rank'], 5)
+        with mock.patch.object(ranking, 'EXACT_RANK_TOP', 0):
+            self.assertFalse(ranking.rank('EASY', 350)['exact'])
+
+    def test_day_and_all_time_periods(self):
+        self.play(500, self.yesterday)
+        self.play(200)
+        self.assertEqual(ranking.rank('EASY', 300)['total'], 2)
+        self.assertEqual(ranking.rank('EASY', 300)['rank'], 2)
+        today = ranking.rank('EASY', 300, ranking.day_period(self.today))
+        self.assertEqual((today['rank'], today['total']), (1, 1))
+        response = self.client.get(reverse('rank'), {'mode': 'EASY', 'score': 300, 'period': 'day'}).json()
+        self.assertEqual((response['rank'], response['total']), (1, 1))
+
+    def test_rejected_and_forgotten_games_are_taken_out(self):
+        kept = self.play(100)
+        forgotten = self.play(200)
+        rejected = self.play(300)
+        ranking.forget_score(forgotten)
+        verification.store([(rejected.pk, False, 'score mismatch'), (kept.pk, True, None)])
+        self.assertEqual(ranking.rank('EASY', 150), {'rank': 1, 'total': 1, 'percentile': 100.0, 'exact': True})
+        ranking.forget_score(forgotten)  # Never below zero
+        self.assertFalse(ScoreHistogram.objects.filter(count__lt=0).exists())
+        self.assertEqual(ranking.rank('EASY', 150)['total'], 1)
+
+    def test_rebuild_matches_the_incremental_counts(self):
+        for score, created_at in ((4, self.yesterday), (2048, None), (2050, None), (0, None), (700, self.yesterday)):
+            self.play(score, created_at)
+        ranking.record_scores([make_game(self.user, score) for score in (16, 16, 90000)])
+        ranking.record_score(make_game(self.user, 5000, board_size=5))  # Not counted either way
+        incremental = self.counts()
+        call_command('rebuild_score_histogram', stdout=StringIO())
+        self.assertEqual(self.counts(), incremental)
+
+
+@override_settings(VERIFY_WORKERS=0)
+class ReplayVerificationTests(TestCase):
+    """Ván có seed + move log được chơi lại trên server, điểm sai bị loại khỏi bảng xếp hạng"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('player', password='game-password')
+        self.client.force_login(self.user)
+        self.seed = 12345
+        self.moves, self.score = self.play()
+
+    def play(self, spawner=None, size=4):
+        # First legal move each turn until the game ends
+        spec = replay.engine.board_spec(size)
+        rng = replay.engine.SplitMix64(self.seed)
+        board = spec.new_board(rng)
+        moves = bytearray()
+        score = 0
+        while spec.legal_moves(board):
+            direction = spec.legal_moves(board)[0]
+            board, gain = spec.move(board, direction)
+            board = spawner.spawn(board)[0] if spawner else spec.spawn(board, rng)[0]
+            score += gain
+            moves.append(replay.CODES[direction])
+        return moves, score
+
+    def submit(self, score, game_mode='EASY', board_size=4):
+        with self.captureOnCommitCallbacks(execute=True):  # Verification starts after the commit
+            return self.post(score, game_mode, board_size)
+
+    def post(self, score, game_mode='EASY', board_size=4):
+        return self.client.post(reverse('save_score'), self.payload(score, game_mode, board_size),
+                                content_type='application/json')
+
+    def payload(self, score, game_mode='EASY', board_size=4):
+        return json.dumps({
+            'score': score,
+            'start_time': '2025-11-28T10:00:00',
+            'end_time': '2025-11-28T10:05:00',
+            'duration': 300,
+            'game_mode': game_mode,
+            'board_size': board_size,
+            'seed': self.seed,
+            'move_log': base64.b64encode(replay.encode(self.moves)).decode(),
+        })
+
+    def test_honest_score_is_verified(self):
+        self.assertEqual(self.submit(self.score).status_code, 200)
+        self.assertEqual(GameScore.objects.get().verification, VERIFIED)
+
+    async def test_async_save_verifies_off_the_event_loop(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(reverse('async_save_score'), self.payload(self.score),
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await GameScore.objects.aget()).verification, VERIFIED)
+
+    def test_inflated_score_is_rejected(self):
+        self.client.get(reverse('leaderboard'))  # Cache the board, the rejection must update it
+        self.submit(self.score + 1000)
+        self.assertEqual(GameScore.objects.get().verification, REJECTED)
+        self.assertEqual(self.client.get(reverse('leaderboard')).json()['results'], [])
+
+    def test_hard_game_replays_with_the_adversarial_spawner(self):
+        self.moves, self.score = self.play(replay.ai.AdversarialSpawner())
+        self.submit(self.score, 'HARD')
+        self.assertEqual(GameScore.objects.get().verification, VERIFIED)
+
+    def test_bigger_board_is_verified_but_not_ranked(self):
+        self.moves, self.score = self.play(size=6)
+        self.submit(self.score, board_size=6)
+        self.assertEqual(GameScore.objects.get().verification, VERIFIED)
+        self.assertEqual(self.client.get(reverse('leaderboard')).json()['results'], [])
+        self.assertEqual(self.post(self.score, 'HARD', 6).status_code, 400)
+
+    def test_verify_scores_command_survives_a_corrupt_log(self):
+        honest = make_game(self.user, self.score, seed=self.seed, move_log=replay.encode(self.moves),
+                           verification=PENDING)
+        corrupt = make_game(self.user, 500, seed=self.seed, move_log=replay.encode(self.moves)[:-3],
+                            verification=PENDING)
+        out = StringIO()
+        call_command('verify_scores', workers=0, stdout=out)
+        self.assertEqual(GameScore.objects.get(pk=honest.pk).verification, VERIFIED)
+        self.assertEqual(GameScore.objects.get(pk=corrupt.pk).verification, REJECTED)
+        self.assertIn(f"2 games ({len(self.moves)} moves)", out.getvalue())
+        self.assertIn("1 verified, 1 rejected.", out.getvalue())
+
+    def test_admin_replay_needs_the_view_permission(self):
+        self.submit(self.score)
+        pk = GameScore.objects.get().pk
+        urls = [reverse(f'admin:core_gamescore_{name}', args=[pk])
+                for name in ('replay', 'replay_frames', 'replay_download')]
+        self.client.force_login(User.objects.create_superuser('admin', password='admin-password'))
+        self.assertEqual([self.client.get(url).status_code for url in urls], [200] * 3)  # The replay is now cached
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.assertEqual([self.client.get(url).status_code for url in urls], [403] * 3)
+
+    def test_game_modules_load_as_a_package(self):
+        self.assertEqual(replay.__name__, 'game_source.replay')
+        self.assertFalse([path for path in sys.path if path.rstrip('/').endswith('game_source')])
+        self.assertFalse({'main', 'assets', 'fonts', 'engine', 'ai', 'replay'} & set(sys.modules))
+
+    def test_admin_replay_seeks_to_any_position(self):
+        self.submit(self.score)
+        pk = GameScore.objects.get().pk
+        self.client.force_login(User.objects.create_superuser('admin', password='admin-password'))
+        url = reverse('admin:core_gamescore_replay_frames', args=[pk])
+        middle = len(self.moves) // 2
+        data = self.client.get(url, {'from': middle, 'count': 2}).json()
+        expected = list(replay.Replay(self.seed, self.moves).positions(middle, middle + 2))
+        self.assertEqual(data['frames'], [[f'{board:016x}', score] for board, score in expected])
+        last = self.client.get(url, {'from': len(self.moves), 'count': 10}).json()['frames']
+        self.assertEqual(last, [[f'{replay.replay(self.seed, self.moves)[0]:016x}', self.score]])
+        self.assertContains(self.client.get(reverse('admin:core_gamescore_replay', args=[pk])), 'Replay')
+        download = self.client.get(reverse('admin:core_gamescore_replay_download', args=[pk]))
+        self.assertEqual(len(replay.Replay.unpack(download.content)), len(self.moves))
+
+
+@skipUnless(importlib.util.find_spec('pygame'), "pygame is needed to pack the game assets")
+class GameAssetPackTests(SimpleTestCase):
+    """Bundle web: ô đã thu nhỏ sẵn cho mọi kích thước bàn cờ (4x4 .. 8x8 và bàn AI MATCH)"""
+
+    def test_sheets_cover_every_board_size(self):
+        from game_source import assets, engine
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = Path(tmp) / 'bundle'
+            call_command('pack_game_assets', '--atlas', '--dest', str(dest), stdout=StringIO())
+            sheets = json.loads((dest / 'assets' / 'sheets.json').read_text())
+        # Game2048.tile_width: 600 px boards at every size, 370 px AI_MATCH boards (4x4 only)
+        cells = {600 // size for size in range(engine.MIN_SIZE, engine.MAX_SIZE + 1)} | {370 // 4}
+        self.assertEqual(set(sheets), {f'{cell}x{cell}' for cell in cells})
+        values = [assets.BACKGROUND] + assets.VALUES
+        shipped = {str(value) for value in values if os.path.exists(assets.image_path(value))}
+        for sheet in sheets.values():
+            self.assertEqual(set(sheet['tiles']), shipped)
+
+
+class EngineTests(SimpleTestCase):
+    """Bảng tra của engine so với cách gộp ô đơn giản trên list"""
+
+    def random_grid(self, size, max_exponent, rng):
+        # Mostly small tiles so that merges are common, with a few at the cap
+        exponents = [0] * 6 + [1, 1, 2, 2, 3, 4, max_exponent - 1, max_exponent]
+        return [[1 << e if e else 0 for e in (rng.choice(exponents) for _ in range(size))] for _ in range(size)]
+
+    def check_moves(self, spec, max_exponent, boards):
+        rng = random.Random(2048)
+        for _ in range(boards):
+            grid = self.random_grid(spec.size, max_exponent, rng)
+            board = spec.from_grid(grid)
+            self.assertEqual(spec.to_grid(board), grid)
+            for direction in engine.DIRECTIONS:
+                expected, gain = naive_move(grid, direction, 1 << max_exponent)
+                moved, score = spec.move(board, direction)
+                self.assertEqual((spec.to_grid(moved), score), (expected, gain), (grid, direction))
+
+    def test_moves_match_a_naive_merge(self):
+        self.check_moves(engine.board_spec(4), engine.MAX_EXPONENT, 3000)
+        grid = [[2, 2, 4, 4], [2, 2, 2, 0], [8, 0, 0, 8], [0, 0, 0, 0]]
+        self.assertEqual(engine.move(engine.from_grid(grid), engine.LEFT),
+                         (engine.from_grid([[4, 8, 0, 0], [4, 2, 0, 0], [16, 0, 0, 0], [0, 0, 0, 0]]), 32))
+
+    def test_biggest_tiles_do_not_merge(self):
+        top = 1 << engine.MAX_EXPONENT
+        capped = engine.from_grid([[top, top, 0, 0], [0] * 4, [0] * 4, [0] * 4])
+        self.assertEqual(engine.move(capped, engine.LEFT), (capped, 0))
+        self.assertNotIn(engine.LEFT, engine.legal_moves(capped))
+        below = engine.from_grid([[top // 2, top // 2, 0, 0], [0] * 4, [0] * 4, [0] * 4])
+        self.assertEqual(engine.to_grid(engine.move(below, engine.LEFT)[0])[0], [top, 0, 0, 0])
+
+    def test_bigger_board(self):
+        spec = engine.board_spec(6)
+        self.check_moves(spec, spec.max_exponent_value, 500)
+        top = 1 << spec.max_exponent_value
+        capped = spec.from_grid([[top, top] + [0] * 4] + [[0] * 6] * 5)
+        self.assertEqual(spec.move(capped, engine.RIGHT), (spec.from_grid([[0] * 4 + [top, top]] + [[0] * 6] * 5), 0))
@@ -1,6 +1,6 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('register/', views.register_view, name='register'),
@@ -8,5 +8,18 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
     path('game/', views.game_view, name='game'),
     path('api/save_score/', views.save_score_api, name='save_score'),
+    path('api/save_scores/', views.save_scores_api, name='save_scores'),
+    path('api/leaderboard/', views.leaderboard_api, name='leaderboard'),
+    path('api/leaderboard/me/', views.my_best_api, name='leaderboard_me'),
+    path('api/rank/', views.rank_api, name='rank'),
+
+    # Bản async của các API trên (chạy dưới ASGI: uvicorn mysite.asgi:application)
+    path('api/async/save_score/', async_views.save_score_api, name='async_save_score'),
+    path('api/async/leaderboard/', async_views.leaderboard_api, name='async_leaderboard'),
+    path('api/async/leaderboard/me/', async_views.my_best_api, name='async_leaderboard_me'),
+    path('api/async/rank/', async_views.rank_api, name='async_rank'),
+
+    # Số liệu hiệu năng (chỉ staff)
+    path('metrics/', views.metrics_view, name='metrics'),
     path('', views.game_view), # Mặc định vào game
 ]
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""Replay verification of recorded games, off the request path.
+
+A score sent with a seed and a move log is saved as 'pending', then
+submit() hands it to a process pool (VERIFY_WORKERS processes) that replays
+it with the headless engine (game_source/replay.py) and compares the
+replayed score with the claimed one. The request does not wait: the result
+is written back from the pool's callback thread. A rejected score is taken
+off the leaderboard and out of the rank histogram.
+
+With VERIFY_WORKERS = 0 games are verified inline, in the request. Games
+left 'pending' by a restart are picked up by ``manage.py verify_scores``.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from game_source import replay
+
+from . import leaderboard, ranking
+from .models import GameScore, PENDING, REJECTED, VERIFIED
+
+CHUNK = 200  # Games per pool task
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn: forking a process that already runs threads (server, writer) is not safe
+            _pool = ProcessPoolExecutor(settings.VERIFY_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def jobs_for(game_scores):
+    return [(g.pk, g.seed, bytes(g.move_log), g.score, g.game_mode == 'HARD', g.board_size)
+            for g in game_scores if g.move_log is not None]
+
+
+def submit(game_scores):
+    """Verify the recorded games among ``game_scores`` in the background."""
+    jobs = jobs_for(game_scores)
+    if not jobs:
+        return
+    if not settings.VERIFY_WORKERS:
+        store(replay.verify_all(jobs))
+        return
+    for i in range(0, len(jobs), CHUNK):
+        future = _executor().submit(replay.verify_all, jobs[i:i + CHUNK])
+        future.add_done_callback(_stored)
+
+
+def _stored(future):
+    close_old_connections()
+    try:
+        store(future.result())
+    finally:
+        close_old_connections()
+
+
+def store(results):
+    """Write back [(pk, ok, reason)] from replay.verify_all. Returns the number of rejected games."""
+    verified = [pk for pk, ok, _ in results if ok]
+    rejected = [pk for pk, ok, _ in results if not ok]
+    GameScore.objects.filter(pk__in=verified, verification=PENDING).update(verification=VERIFIED)
+    if rejected:
+        game_scores = list(GameScore.objects.filter(pk__in=rejected).exclude(verification=REJECTED)
+                           .select_related('user'))
+        GameScore.objects.filter(pk__in=[g.pk for g in game_scores]).update(verification=REJECTED)
+        for game_score in game_scores:
+            leaderboard.forget_score(game_score)
+            ranking.forget_score(game_score)
+    return len(rejected)
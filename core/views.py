@@ -3,10 +3,13 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-from django.utils.dateparse import parse_datetime
-from .models import GameScore
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+from django.utils import timezone
+from . import leaderboard, metrics, ranking, scores, writer
+from .models import GAME_MODES
 
 def register_view(request):
     if request.method == "POST":
@@ -20,8 +23,9 @@ def register_view(request):
     return render(request, 'register.html', {'form': form})
 
 @login_required
+@ensure_csrf_cookie
 def game_view(request):
-    # Trang này sẽ chứa iframe game
+    # Trang này sẽ chứa iframe game (JS đọc CSRF token từ cookie)
     return render(request, 'game_container.html')
 
 @login_required
@@ -30,21 +34,94 @@ def save_score_api(request):
     if request.method == "POST":
         try:
             data = json.loads(request.body)
-            score = data.get('score')
-            start_time = data.get('start_time') # ISO format string
-            end_time = data.get('end_time')     # ISO format string
-            duration = data.get('duration')
-            game_mode = data.get('game_mode', 'EASY')
-            
-            GameScore.objects.create(
-                user=request.user,
-                score=score,
-                start_time=parse_datetime(start_time),
-                end_time=parse_datetime(end_time),
-                duration_seconds=duration,
-                game_mode=game_mode
-            )
-            return JsonResponse({'status': 'success'})
-        except Exception as e:
+            result, = writer.save_scores(request.user, [data])
+        except ValueError as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
-    return JsonResponse({'status': 'invalid method'}, status=405)
\ No newline at end of file
+        if result['status'] == 'error':
+            return JsonResponse(result, status=400)
+        # 'duplicate' = client gửi lại điểm đã lưu, vẫn coi là thành công
+        return JsonResponse({'status': 'success', 'id': result['id'], 'duplicate': result['status'] == 'duplicate'})
+    return JsonResponse({'status': 'invalid method'}, status=405)
+
+@login_required
+@require_POST
+def save_scores_api(request):
+    """Nhận nhiều điểm một lúc: mảng JSON, {"scores": [...]}, NDJSON (application/x-ndjson)
+    hoặc form có trường payload (navigator.sendBeacon khi đóng trang)"""
+    bad_lines = {}
+    try:
+        if request.content_type in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+            items = json.loads(request.POST.get('payload', ''))
+        elif request.content_type == 'application/x-ndjson':
+            # Mỗi dòng một điểm: dòng hỏng chỉ báo lỗi ở vị trí của nó, các dòng khác vẫn được lưu
+            items = []
+            for i, line in enumerate(l for l in request.body.decode('utf-8').splitlines() if l.strip()):
+                try:
+                    items.append(json.loads(line))
+                except ValueError as e:
+                    bad_lines[i] = str(e)
+                    items.append(None)
+        else:
+            items = json.loads(request.body)
+            if isinstance(items, dict):
+                items = items.get('scores')
+        if not isinstance(items, list):
+            raise ValueError("expected a list of scores")
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    if len(items) > scores.MAX_BATCH_SIZE:
+        return JsonResponse({'status': 'error', 'message': f"at most {scores.MAX_BATCH_SIZE} scores per request"},
+                            status=413)
+
+    good = [i for i in range(len(items)) if i not in bad_lines]
+    results = [{'status': 'error', 'index': i, 'error': bad_lines.get(i)} for i in range(len(items))]
+    for i, result in zip(good, writer.save_scores(request.user, [items[i] for i in good])):
+        results[i] = result
+    counts = {status: sum(r['status'] == status for r in results) for status in ('created', 'duplicate', 'error')}
+    return JsonResponse({'status': 'success', **counts, 'results': results})
+
+@require_GET
+def leaderboard_api(request):
+    """Bảng xếp hạng: ?mode=EASY&window=all|daily|weekly&limit=10&after=<score>:<id>"""
+    mode = request.GET.get('mode', 'EASY')
+    window = request.GET.get('window', 'all')
+    if mode not in GAME_MODES or window not in leaderboard.WINDOWS:
+        return JsonResponse({'status': 'error', 'message': 'invalid mode or window'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', 10))
+        after = request.GET.get('after')
+        after = leaderboard.parse_cursor(after) if after else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'invalid limit or cursor'}, status=400)
+
+    entries, next_cursor = leaderboard.top_scores(mode, window, limit, after)
+    return JsonResponse({'mode': mode, 'window': window, 'results': entries, 'next': next_cursor})
+
+@login_required
+@require_GET
+def my_best_api(request):
+    """Điểm cao nhất của người chơi hiện tại cho từng mode"""
+    return JsonResponse({'best': {mode: leaderboard.user_best(request.user, mode) for mode in GAME_MODES}})
+
+@require_GET
+def rank_api(request):
+    """Thứ hạng / phần trăm của một điểm số: ?mode=EASY&score=1234&period=all|day|YYYY-MM-DD"""
+    mode = request.GET.get('mode', 'EASY')
+    period = request.GET.get('period', ranking.PERIOD_ALL)
+    if period == 'day':
+        period = ranking.day_period(timezone.now())
+    try:
+        score = int(request.GET['score'])
+        if period != ranking.PERIOD_ALL:
+            ranking.day_range(period)
+    except (KeyError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'invalid score or period'}, status=400)
+    if mode not in GAME_MODES:
+        return JsonResponse({'status': 'error', 'message': 'invalid mode'}, status=400)
+
+    return JsonResponse({'mode': mode, 'period': period, 'score': score, **ranking.rank(mode, score, period)})
+
+@staff_member_required
+def metrics_view(request):
+    """Số liệu từng view theo định dạng text của Prometheus (cần METRICS_ENABLED)"""
+    return HttpResponse(metrics.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,70 @@
+"""Optional single writer thread for score inserts (settings.SCORE_WRITER).
+
+With the writer on, request threads hand their scores to one background
+thread per process instead of each opening a write transaction. The thread
+drains whatever is queued and stores it in a single transaction (group
+commit), so the SQLite write lock is taken once per group of requests and
+request threads only read. Between processes SQLite's own locking (WAL,
+busy timeout) still applies.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import scores
+
+MAX_GROUP = 64     # Requests stored per transaction
+WAIT_TIMEOUT = 30  # Seconds a request waits for its scores to be stored
+
+_queue = queue.Queue()
+_thread = None
+_lock = threading.Lock()
+
+
+def _run():
+    while True:
+        jobs = [_queue.get()]
+        while len(jobs) < MAX_GROUP:
+            try:
+                jobs.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        close_old_connections()
+        done = []
+        try:
+            with transaction.atomic():
+                for user, items, future in jobs:
+                    try:
+                        # Own savepoint: a failing request does not roll back the others
+                        with transaction.atomic():
+                            done.append((future, scores.save_scores(user, items)))
+                    except Exception as e:
+                        future.set_exception(e)
+        except Exception as e:
+            for future, _ in done:
+                future.set_exception(e)
+        else:
+            for future, results in done:
+                future.set_result(results)
+
+
+def _start():
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name='score-writer', daemon=True)
+            _thread.start()
+
+
+def save_scores(user, items):
+    """scores.save_scores(), through the writer thread when SCORE_WRITER is on."""
+    if not settings.SCORE_WRITER:
+        return scores.save_scores(user, items)
+    _start()
+    future = Future()
+    _queue.put((user, items, future))
+    return future.result(WAIT_TIMEOUT)
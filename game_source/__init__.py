@@ -0,0 +1,7 @@
+"""The game, importable from the server as a package (from game_source import replay).
+
+The game itself runs from this folder (python main.py, pygbag) and imports
+its modules as top-level names. The modules the server uses (engine, ai,
+replay, assets) try a relative import of their siblings first, so loading
+them from here never puts game_source on sys.path.
+"""
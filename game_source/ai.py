@@ -0,0 +1,545 @@
+"""Expectimax AI for the 2048 engine (no pygame).
+
+Max nodes try the four moves, chance nodes average over every possible
+2/4 spawn. The board evaluation is a sum of per-row heuristics
+(monotonicity, empty cells, merges) looked up in a 65536-entry table for
+each row and each column, so a leaf costs eight table lookups.
+
+AdversarialSpawner turns the same evaluation around for HARD mode: it picks
+the 2/4 spawn that is worst for the player with an alpha-beta search.
+"""
+import time
+from collections import OrderedDict
+
+try:
+    from . import engine
+except ImportError:  # Run from game_source (main.py, tools): the game modules are top-level
+    import engine
+
+# --- HEURISTIC WEIGHTS ---
+LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+
+# Search depth (player moves looked ahead) per bot difficulty
+DIFFICULTY_DEPTH = {
+    "EASY": 1,
+    "NORMAL": 2,
+    "HARD": 3,
+}
+
+ROW_HEURISTIC = None  # Built lazily, only games with an AI pay for it
+INT_HEURISTIC = None  # Rounded copy for the HARD spawner (see AdversarialSpawner)
+
+
+def _build_heuristic_table():
+    table = [0.0] * 65536
+    for row in range(65536):
+        line = [(row >> (4 * i)) & 0xF for i in range(engine.COLS)]
+
+        total = 0.0
+        empty = 0
+        merges = 0
+        prev = 0
+        counter = 0
+        for rank in line:
+            total += rank ** SUM_POWER
+            if rank == 0:
+                empty += 1
+                continue
+            if prev == rank:
+                counter += 1
+            elif counter > 0:
+                merges += 1 + counter
+                counter = 0
+            prev = rank
+        if counter > 0:
+            merges += 1 + counter
+
+        mono_left = 0.0
+        mono_right = 0.0
+        for i in range(1, engine.COLS):
+            a = line[i - 1] ** MONOTONICITY_POWER
+            b = line[i] ** MONOTONICITY_POWER
+            if line[i - 1] > line[i]:
+                mono_left += a - b
+            else:
+                mono_right += b - a
+
+        table[row] = (LOST_PENALTY
+                      + EMPTY_WEIGHT * empty
+                      + MERGES_WEIGHT * merges
+                      - MONOTONICITY_WEIGHT * min(mono_left, mono_right)
+                      - SUM_WEIGHT * total)
+    return table
+
+
+def heuristic_table():
+    global ROW_HEURISTIC
+    if ROW_HEURISTIC is None:
+        ROW_HEURISTIC = _build_heuristic_table()
+    return ROW_HEURISTIC
+
+
+def integer_heuristic_table():
+    global INT_HEURISTIC
+    if INT_HEURISTIC is None:
+        INT_HEURISTIC = [round(value) for value in heuristic_table()]
+    return INT_HEURISTIC
+
+
+def evaluate(board):
+    """Heuristic value of a board: rows plus columns (via transpose)."""
+    h = heuristic_table()
+    t = engine.transpose(board)
+    return (h[board & 0xFFFF] + h[(board >> 16) & 0xFFFF]
+            + h[(board >> 32) & 0xFFFF] + h[(board >> 48) & 0xFFFF]
+            + h[t & 0xFFFF] + h[(t >> 16) & 0xFFFF]
+            + h[(t >> 32) & 0xFFFF] + h[(t >> 48) & 0xFFFF])
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class ExpectimaxAI:
+    """Depth-limited expectimax with an LRU transposition table.
+
+    ``depth`` is the number of player moves looked ahead (1 = greedy on the
+    heuristic). Chance branches whose cumulative probability drops below
+    ``prob_threshold`` are cut and evaluated directly. If ``time_limit``
+    (seconds) is set, the search deepens iteratively and returns the best
+    move of the deepest fully searched level.
+    """
+
+    CHECK_EVERY = 256  # Nodes between two clock checks
+
+    def __init__(self, depth=2, cache_size=100000, prob_threshold=0.0001,
+                 time_limit=None, four_probability=engine.FOUR_PROBABILITY):
+        self.depth = depth
+        self.cache_size = cache_size
+        self.prob_threshold = prob_threshold
+        self.time_limit = time_limit
+        self.four_probability = four_probability
+        self.cache = OrderedDict()  # board -> (depth, value)
+        self.deadline = None
+        heuristic_table()
+        self.reset_stats()
+
+    @classmethod
+    def for_difficulty(cls, difficulty, **kwargs):
+        return cls(depth=DIFFICULTY_DEPTH[difficulty], **kwargs)
+
+    # --- STATS ---
+
+    def reset_stats(self):
+        self.nodes = 0
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self.search_time = 0.0
+        self.searches = 0
+        self.last_depth = 0
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.search_time if self.search_time else 0.0
+
+    @property
+    def cache_hit_rate(self):
+        return self.cache_hits / self.cache_lookups if self.cache_lookups else 0.0
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "searches": self.searches,
+            "nodes": self.nodes,
+            "nodes_per_sec": round(self.nodes_per_sec),
+            "cache_hit_rate": round(self.cache_hit_rate, 3),
+            "cache_size": len(self.cache),
+            "last_depth": self.last_depth,
+        }
+
+    # --- TRANSPOSITION TABLE ---
+
+    def _cache_get(self, board, depth):
+        self.cache_lookups += 1
+        entry = self.cache.get(board)
+        if entry is not None and entry[0] >= depth:
+            self.cache_hits += 1
+            self.cache.move_to_end(board)
+            return entry[1]
+        return None
+
+    def _cache_put(self, board, depth, value):
+        self.cache[board] = (depth, value)
+        self.cache.move_to_end(board)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    # --- SEARCH ---
+
+    def _tick(self):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % self.CHECK_EVERY == 0:
+            if time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+
+    def _max_node(self, board, depth, prob):
+        self._tick()
+        best = 0.0  # No legal move left: the game is lost
+        for direction in engine.DIRECTIONS:
+            new, _ = engine.move(board, direction)
+            if new != board:
+                value = self._chance_node(new, depth, prob)
+                if value > best:
+                    best = value
+        return best
+
+    def _chance_node(self, board, depth, prob):
+        self._tick()
+        if depth <= 1 or prob < self.prob_threshold:
+            return evaluate(board)
+
+        cached = self._cache_get(board, depth)
+        if cached is not None:
+            return cached
+
+        free = engine.empty_cells(board)
+        p4 = self.four_probability
+        p2 = 1.0 - p4
+        n = len(free)
+        total = 0.0
+        for index in free:
+            shift = 4 * index
+            if p2:
+                total += p2 * self._max_node(board | (1 << shift), depth - 1, prob * p2 / n)
+            if p4:
+                total += p4 * self._max_node(board | (2 << shift), depth - 1, prob * p4 / n)
+        value = total / n
+
+        self._cache_put(board, depth, value)
+        return value
+
+    def score_moves(self, board, depth):
+        """Expected value of each legal move at the given depth."""
+        scores = {}
+        for direction in engine.DIRECTIONS:
+            new, _ = engine.move(board, direction)
+            if new != board:
+                scores[direction] = self._chance_node(new, depth, 1.0)
+        return scores
+
+    def best_move(self, board):
+        """Best direction for this board, or None if no move is legal."""
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit if self.time_limit else None
+        best = None
+        # Without a time limit we go straight to full depth
+        depths = range(1, self.depth + 1) if self.deadline else [self.depth]
+        try:
+            for depth in depths:
+                scores = self.score_moves(board, depth)
+                if not scores:
+                    break
+                best = max(scores, key=scores.get)
+                self.last_depth = depth
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+            self.search_time += time.perf_counter() - start
+            self.searches += 1
+        if best is None:
+            # Out of time before depth 1 finished: any legal move beats none
+            legal = engine.legal_moves(board)
+            best = legal[0] if legal else None
+        return best
+
+
+class IncrementalSearch:
+    """Expectimax that runs in small slices across frames.
+
+    The search is split into work units (one reply move after one spawn
+    under one root move) and iteratively deepened up to ``ai.depth``. ``step(budget)`` runs
+    units until ``budget`` seconds are spent, then returns so the frame loop
+    can render; a single unit may overrun the budget slightly. ``best_move``
+    always holds the best move of the deepest fully searched level, so the
+    caller can commit it whenever its own timer expires.
+    """
+
+    def __init__(self, ai, board, max_depth=None):
+        self.ai = ai
+        self.board = board
+        self.max_depth = max_depth or ai.depth
+        legal = engine.legal_moves(board)
+        self.best_move = legal[0] if legal else None
+        self.completed_depth = 0
+        self.done = not legal
+        self._work = self._units()
+        ai.searches += 1
+
+    def _units(self):
+        ai = self.ai
+        p4 = ai.four_probability
+        p2 = 1.0 - p4
+        for depth in range(1, self.max_depth + 1):
+            scores = {}
+            for direction in engine.DIRECTIONS:
+                new, _ = engine.move(self.board, direction)
+                if new == self.board:
+                    continue
+                if depth <= 1:
+                    scores[direction] = evaluate(new)
+                    yield
+                    continue
+                free = engine.empty_cells(new)
+                n = len(free)
+                total = 0.0
+                for index in free:
+                    shift = 4 * index
+                    for exponent, p in ((1, p2), (2, p4)):
+                        if not p:
+                            continue
+                        # Unrolled max node: one unit per reply move
+                        child = new | (exponent << shift)
+                        best = 0.0
+                        for reply in engine.DIRECTIONS:
+                            moved, _ = engine.move(child, reply)
+                            if moved != child:
+                                best = max(best, ai._chance_node(moved, depth - 1, p / n))
+                                yield
+                        total += p * best
+                scores[direction] = total / n
+            self.best_move = max(scores, key=scores.get)
+            self.completed_depth = depth
+            ai.last_depth = depth
+
+    def step(self, budget):
+        """Search for about ``budget`` seconds. Returns True once the search is complete."""
+        if self.done:
+            return True
+        start = time.perf_counter()
+        end = start + budget
+        try:
+            while time.perf_counter() < end:
+                next(self._work)
+        except StopIteration:
+            self.done = True
+        self.ai.search_time += time.perf_counter() - start
+        return self.done
+
+
+class SearchBudget(Exception):
+    pass
+
+
+class AdversarialSpawner:
+    """HARD mode spawner: places the 2 or 4 that is worst for the player.
+
+    Minimax with alpha-beta pruning, the spawner minimizing and the player
+    maximizing the board evaluation. ``depth`` is the number of player
+    replies looked ahead. The search deepens iteratively and stops after ``node_budget``
+    nodes, keeping the spawn of the deepest complete level (depth 1 always
+    completes). The budget counts nodes rather than seconds, so the choice
+    only depends on the board: a replay on another machine picks the same
+    spawns. The same goes for the cache, which is emptied before each spawn.
+
+    The evaluation uses the heuristic table rounded to integers: the float
+    table comes from pow(), which may differ in the last bit between the
+    browser build and the server, and a single flipped comparison would
+    change a spawn. Changing the weights or the defaults below changes which
+    tiles HARD games get, so recorded HARD games would no longer verify.
+
+    Move ordering: the best child found at the previous depth (kept in the
+    cache) is tried first, then spawns from the lowest and replies from the
+    highest static evaluation, which lets alpha-beta cut most siblings.
+    With the default budget a spawn takes a few ms, well inside a frame.
+    """
+
+    def __init__(self, depth=4, node_budget=800, cache_size=20000):
+        self.depth = depth
+        self.node_budget = node_budget
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (board, is_spawn) -> (depth, value, bound, best child)
+        self.values = {}  # board -> evaluation, the same boards come back through many spawns
+        self.budget = None
+        self.table = integer_heuristic_table()
+        self.nodes = 0
+        self.searches = 0
+        self.search_time = 0.0
+        self.last_depth = 0
+
+    def stats(self):
+        return {
+            "searches": self.searches,
+            "nodes": self.nodes,
+            "nodes_per_search": round(self.nodes / self.searches) if self.searches else 0,
+            "ms_per_search": round(1000 * self.search_time / self.searches, 2) if self.searches else 0,
+            "last_depth": self.last_depth,
+        }
+
+    # --- CACHE ---
+
+    def _cache_put(self, key, depth, value, bound, best):
+        self.cache[key] = (depth, value, bound, best)
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _probe(self, key, depth, alpha, beta):
+        """(value or None, best child of an earlier search or None)."""
+        entry = self.cache.get(key)
+        if entry is None:
+            return None, None
+        entry_depth, value, bound, best = entry
+        if entry_depth >= depth and (bound == 0 or (bound < 0 and value <= alpha) or (bound > 0 and value >= beta)):
+            return value, best
+        return None, best
+
+    def _evaluate(self, board):
+        """evaluate() on the integer table."""
+        value = self.values.get(board)
+        if value is None:
+            h = self.table
+            t = engine.transpose(board)
+            value = self.values[board] = (
+                h[board & 0xFFFF] + h[(board >> 16) & 0xFFFF]
+                + h[(board >> 32) & 0xFFFF] + h[(board >> 48) & 0xFFFF]
+                + h[t & 0xFFFF] + h[(t >> 16) & 0xFFFF]
+                + h[(t >> 32) & 0xFFFF] + h[(t >> 48) & 0xFFFF])
+        return value
+
+    # --- SEARCH ---
+
+    def _tick(self):
+        self.nodes += 1
+        if self.budget is not None and self.nodes > self.budget:
+            raise SearchBudget()
+
+    def _spawns(self, board, first=None):
+        """Every 2/4 spawn on ``board``, most damaging first (by the two lines the tile lands on)."""
+        h = self.table
+        t = engine.transpose(board)
+        scored = []
+        for index in engine.empty_cells(board):
+            row, col = divmod(index, engine.COLS)
+            row_line = (board >> (16 * row)) & 0xFFFF
+            col_line = (t >> (16 * col)) & 0xFFFF
+            for exponent in (1, 2):
+                # Only this row and this column change, the six other lines add the same to every spawn
+                value = h[row_line | (exponent << (4 * col))] + h[col_line | (exponent << (4 * row))]
+                scored.append((value, board | (exponent << (4 * index))))
+        scored.sort(key=lambda item: item[0])  # Stable: ties keep cell order
+        children = [child for _, child in scored]
+        if first in children:
+            children.remove(first)
+            children.insert(0, first)
+        return children
+
+    def _spawn_node(self, board, depth, alpha, beta):
+        """Value of ``board`` (player just moved) when the spawner plays best."""
+        self._tick()
+        key = (board, True)
+        value, first = self._probe(key, depth, alpha, beta)
+        if value is not None:
+            return value
+        alpha0, beta0 = alpha, beta
+        best_value, best = float("inf"), None
+        for child in self._spawns(board, first):
+            value = self._player_node(child, depth, alpha, beta)
+            if value < best_value:
+                best_value, best = value, child
+            if value < beta:
+                beta = value
+                if alpha >= beta:
+                    break
+        if best is None:
+            return self._evaluate(board)  # Board full after the move: nothing to spawn
+        # -1: upper bound (cut below alpha), 1: lower bound (cut above beta), 0: exact
+        bound = -1 if best_value <= alpha0 else (1 if best_value >= beta0 else 0)
+        self._cache_put(key, depth, best_value, bound, best)
+        return best_value
+
+    def _player_node(self, board, depth, alpha, beta):
+        """Value of ``board`` (tile just spawned) when the player plays best."""
+        self._tick()
+        if depth <= 1:
+            # Leaf: the player's best immediate move, stop as soon as one beats the spawner's best
+            best_value = 0  # No legal move left: the game is lost
+            for direction in engine.DIRECTIONS:
+                moved, _ = engine.move(board, direction)
+                if moved != board:
+                    value = self._evaluate(moved)
+                    if value > best_value:
+                        best_value = value
+                        if value >= beta:
+                            break
+            return best_value
+        key = (board, False)
+        value, first = self._probe(key, depth, alpha, beta)
+        if value is not None:
+            return value
+        alpha0, beta0 = alpha, beta
+        moves = []
+        for direction in engine.DIRECTIONS:
+            moved, _ = engine.move(board, direction)
+            if moved != board:
+                moves.append(moved)
+        best_value, best = 0, None
+        moves.sort(key=self._evaluate, reverse=True)
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        for moved in moves:
+            value = self._spawn_node(moved, depth - 1, alpha, beta)
+            if best is None or value > best_value:
+                best_value, best = value, moved
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+        bound = -1 if best_value <= alpha0 else (1 if best_value >= beta0 else 0)
+        self._cache_put(key, depth, best_value, bound, best)
+        return best_value
+
+    def choose(self, board):
+        """Board after the worst spawn for the player (``board`` unchanged if it is full)."""
+        start = time.perf_counter()
+        self.cache.clear()
+        self.values.clear()
+        start_nodes = self.nodes
+        best = None
+        try:
+            for depth in range(1, self.depth + 1):
+                # Depth 1 is never cut, so there is always a spawn to play
+                self.budget = start_nodes + self.node_budget if depth > 1 else None
+                children = self._spawns(board, best)
+                if not children:
+                    break
+                beta = float("inf")
+                level_best = None
+                for child in children:
+                    value = self._player_node(child, depth, float("-inf"), beta)
+                    if value < beta:
+                        beta, level_best = value, child
+                best = level_best
+                self.last_depth = depth
+        except SearchBudget:
+            pass
+        finally:
+            self.budget = None
+            self.search_time += time.perf_counter() - start
+            self.searches += 1
+        return board if best is None else best
+
+    def spawn(self, board):
+        """Same result as engine.spawn(): (new_board, index, exponent), or (board, None, 0) if full."""
+        new = self.choose(board)
+        if new == board:
+            return board, None, 0
+        index = ((new ^ board).bit_length() - 1) >> 2
+        return new, index, engine.get_cell(new, index)
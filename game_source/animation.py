@@ -0,0 +1,222 @@
+"""Tile animations: slide, merge and spawn tweens on a fixed timestep.
+
+Nothing waits for an animation: Game2048.move_tiles commits the move to the
+engine board at once (input and AI see the new board on the same frame) and
+only hands the paths the tiles took to a BoardAnimation. The Scheduler
+advances every running animation in fixed STEP increments from the frame
+time, so the tweens play at the same speed whatever the frame rate, and the
+renderer interpolates inside the current step.
+
+A frame only redraws the rectangles a moving tile covers now or covered on
+the previous frame: background, then the resting tiles under them, then the
+moving tiles, then the grid lines. A move that arrives while an animation is
+running simply replaces it, the old one's last rectangles are repainted.
+
+FrameStats keeps the frame intervals and the time spent working in each
+frame, to check the loop holds FPS with both AI_MATCH boards animating.
+"""
+from collections import deque
+
+import engine
+
+STEP = 1 / 120  # Fixed animation step (seconds)
+MAX_STEPS = 8  # Steps per frame at most: after a stall the animation skips ahead instead of replaying it
+SLIDE_TIME = 0.08
+POP_TIME = 0.1  # Merge / spawn, after the slide
+POP_SCALE = 1.2  # Peak size of a merged tile
+
+
+def move_paths(spec, board, direction):
+    """Where every tile of ``board`` goes for a move: [(from, to, exponent, merged)].
+
+    Same merge rule as the engine; both tiles of a merge get ``merged`` and
+    the same ``to`` cell.
+    """
+    size = spec.size
+    if direction in (engine.LEFT, engine.RIGHT):
+        lines = [[r * size + c for c in range(size)] for r in range(size)]
+    else:
+        lines = [[r * size + c for r in range(size)] for c in range(size)]
+    if direction in (engine.RIGHT, engine.DOWN):
+        lines = [line[::-1] for line in lines]
+
+    paths = []
+    for line in lines:
+        target = -1
+        open_exponent = None  # Tile at line[target] that can still merge
+        for index in line:
+            exponent = spec.get_cell(board, index)
+            if not exponent:
+                continue
+            if exponent == open_exponent and exponent < spec.max_exponent_value:
+                paths[-1] = paths[-1][:3] + (True,)
+                paths.append((index, line[target], exponent, True))
+                open_exponent = None
+            else:
+                target += 1
+                paths.append((index, line[target], exponent, False))
+                open_exponent = exponent
+    return paths
+
+
+def _ease_out(x):
+    return 1 - (1 - x) * (1 - x)
+
+
+def _pop(x):
+    # 1 -> POP_SCALE -> 1
+    return 1 + (POP_SCALE - 1) * (1 - abs(2 * x - 1))
+
+
+class BoardAnimation:
+    """The tweens of one move on one board."""
+
+    def __init__(self, game, paths, spawned=None, previous=None):
+        self.game = game
+        self.time = 0.0
+        self.duration = SLIDE_TIME + POP_TIME
+        self.slides = [(exponent, game.cell_rect(src).topleft, game.cell_rect(dst).topleft)
+                       for src, dst, exponent, merged in paths if src != dst or merged]
+        self.moved = {dst for src, dst, _, merged in paths if src != dst or merged}
+        self.merged = {dst for _, dst, _, merged in paths if merged}
+        self.spawned = spawned
+        # The first frame repaints the cells the tiles leave, and whatever the animation
+        # this one replaces left half drawn
+        cells = {src for src, dst, _, merged in paths if src != dst or merged}
+        if spawned is not None:
+            cells.add(spawned)
+        self.drawn = []
+        if previous:
+            cells |= previous.moved | previous.merged
+            if previous.spawned is not None:
+                cells.add(previous.spawned)
+            self.drawn = previous.drawn
+        self.drawn = self.drawn + [game.cell_rect(index).move(game.x_offset, game.y_offset) for index in cells]
+        self.hidden = set()  # Cells left to the sprites on the last frame
+
+    @property
+    def done(self):
+        return self.time >= self.duration
+
+    def advance(self, seconds):
+        self.time = min(self.time + seconds, self.duration)
+
+    def _sprites(self, t):
+        """(value, x, y, scale) of the moving tiles at time t, board coordinates."""
+        sprites = []
+        if t >= self.duration:
+            return sprites
+        if t < SLIDE_TIME:
+            k = _ease_out(t / SLIDE_TIME)
+            for exponent, (x0, y0), (x1, y1) in self.slides:
+                sprites.append((1 << exponent, x0 + (x1 - x0) * k, y0 + (y1 - y0) * k, 1.0))
+            return sprites
+        k = (t - SLIDE_TIME) / POP_TIME
+        tiles = self.game.tiles
+        for index in self.merged:
+            x, y = self.game.cell_rect(index).topleft
+            sprites.append((tiles[index].value, x, y, _pop(k)))
+        if self.spawned is not None and self.spawned in tiles:
+            x, y = self.game.cell_rect(self.spawned).topleft
+            sprites.append((tiles[self.spawned].value, x, y, _ease_out(k)))
+        return sprites
+
+    def _hidden(self, t):
+        # Cells drawn by a sprite (or not yet there), not from the resting tiles
+        if t >= self.duration:
+            return set()
+        hidden = set(self.merged)
+        if self.spawned is not None:
+            hidden.add(self.spawned)
+        if t < SLIDE_TIME:
+            hidden |= self.moved
+        return hidden
+
+    def draw(self, window, alpha=0.0):
+        """Redraw the animated area for this frame, returns the updated rects (screen coordinates)."""
+        game = self.game
+        t = min(self.time + alpha * STEP, self.duration)
+        sprites = self._sprites(t)
+        hidden = self._hidden(t)
+        ox, oy = game.x_offset, game.y_offset
+        board_rect = window.get_rect().clip((ox, oy, game.width, game.height))
+        rects = [game.sprite_rect(x, y, scale).move(ox, oy).clip(board_rect) for _, x, y, scale in sprites]
+
+        # A cell handed back to the resting tiles is repainted whole: the sprite that stood
+        # for it (easing, scaling) may not have covered all of it
+        dirty = self.drawn + rects + [game.cell_rect(index).move(ox, oy) for index in self.hidden - hidden]
+        for rect in dirty:
+            game.restore(window, rect, hidden)
+        window.set_clip(board_rect)
+        for value, x, y, scale in sprites:
+            game.draw_value(window, value, ox + x, oy + y, scale)
+        window.set_clip(None)
+        for rect in dirty:
+            window.blit(game.grid_overlay, rect, rect.move(-ox, -oy))
+        self.drawn = rects
+        self.hidden = hidden
+        return dirty
+
+
+class Scheduler:
+    """Fixed-timestep clock for the animations of every board."""
+
+    def __init__(self, step=STEP, max_steps=MAX_STEPS):
+        self.step = step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.alpha = 0.0  # Progress inside the current step, for drawing
+
+    def update(self, dt, animations):
+        """Advance ``animations`` by the whole steps contained in ``dt`` seconds."""
+        if not animations:
+            self.accumulator = self.alpha = 0.0
+            return
+        self.accumulator += dt
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step
+        for animation in animations:
+            for _ in range(steps):
+                animation.advance(self.step)
+        self.alpha = self.accumulator / self.step
+
+
+def _quantile(values, q):
+    """Nearest-rank quantile of sorted values."""
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class FrameStats:
+    """Frame interval and work time (seconds) of the last ``window`` frames."""
+
+    def __init__(self, fps, window=600):
+        self.budget = 1 / fps
+        self.intervals = deque(maxlen=window)
+        self.work = deque(maxlen=window)
+        self.frames = 0
+        self.over_budget = 0  # Frames whose work alone did not fit in 1 / fps
+
+    def record(self, interval, work):
+        self.intervals.append(interval)
+        self.work.append(work)
+        self.frames += 1
+        if work > self.budget:
+            self.over_budget += 1
+
+    def summary(self):
+        if not self.work:
+            return {"frames": 0}
+        intervals = sorted(self.intervals)
+        work = sorted(self.work)
+        mean = sum(intervals) / len(intervals)
+        return {
+            "frames": self.frames,
+            "fps": round(1 / mean, 1) if mean else None,
+            "interval_ms": {f"p{round(q * 100)}": round(_quantile(intervals, q) * 1000, 2) for q in (0.5, 0.95, 0.99)},
+            "work_ms": {f"p{round(q * 100)}": round(_quantile(work, q) * 1000, 2) for q in (0.5, 0.95, 0.99)},
+            "over_budget": self.over_budget,
+        }
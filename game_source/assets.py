@@ -0,0 +1,114 @@
+"""Lazy, shared tile images.
+
+PNGs are decoded on first use (not at import), converted to the display
+format for fast blits, and every scaled copy is kept in one atlas keyed by
+(value, width, height). Two boards of the same size, or a new game on the
+same board, reuse the same surfaces instead of decoding and scaling again.
+
+The packaged web build (``manage.py pack_game_assets``) ships tiles already
+scaled to the board sizes we use, either as ``assets/<W>x<H>/<name>.png``
+or packed into one sprite sheet per size listed in ``assets/sheets.json``.
+Those are used first, the full-size originals are only a fallback.
+"""
+import json
+import os
+
+import pygame
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+BACKGROUND = 0  # Key of the empty-cell background image
+VALUES = [2 ** i for i in range(1, 17)]  # 2 .. 65536, every tile image we ship
+
+_originals = {}  # value -> Surface (None if the file is missing)
+_atlas = {}  # (value, width, height) -> Surface (None if the file is missing)
+
+
+SHEET_INDEX = os.path.join(ASSET_DIR, "sheets.json")
+
+_sheet_index = None  # "WxH" -> {"file": ..., "tiles": {value: [x, y, w, h]}}
+_sheets = {}  # file name -> Surface
+
+
+def image_name(value):
+    return "Tile Background.png" if value == BACKGROUND else f"{value} Tile.png"
+
+
+def image_path(value):
+    return os.path.join(ASSET_DIR, image_name(value))
+
+
+def scaled_path(value, width, height):
+    return os.path.join(ASSET_DIR, f"{width}x{height}", image_name(value))
+
+
+def _prepare(image):
+    # convert() needs a display mode, headless tools may not have one
+    if pygame.display.get_surface() is None:
+        return image
+    if image.get_flags() & pygame.SRCALPHA:
+        return image.convert_alpha()
+    return image.convert()
+
+
+def original(value):
+    if value not in _originals:
+        try:
+            _originals[value] = _prepare(pygame.image.load(image_path(value)))
+        except (pygame.error, FileNotFoundError):
+            _originals[value] = None
+    return _originals[value]
+
+
+def _from_sheet(value, width, height):
+    global _sheet_index
+    if _sheet_index is None:
+        try:
+            with open(SHEET_INDEX) as f:
+                _sheet_index = json.load(f)
+        except FileNotFoundError:
+            _sheet_index = {}
+    sheet = _sheet_index.get(f"{width}x{height}")
+    if not sheet or str(value) not in sheet["tiles"]:
+        return None
+    if sheet["file"] not in _sheets:
+        _sheets[sheet["file"]] = _prepare(pygame.image.load(os.path.join(ASSET_DIR, sheet["file"])))
+    return _sheets[sheet["file"]].subsurface(pygame.Rect(sheet["tiles"][str(value)]))
+
+
+def _prescaled(value, width, height):
+    path = scaled_path(value, width, height)
+    if os.path.exists(path):
+        return _prepare(pygame.image.load(path))
+    return None
+
+
+def tile_image(value, width, height):
+    """Image for a tile value (BACKGROUND for an empty cell) at the given size, or None."""
+    key = (value, width, height)
+    if key not in _atlas:
+        image = _from_sheet(value, width, height) or _prescaled(value, width, height)
+        if image is None:
+            image = original(value)
+            if image is not None and image.get_size() != (width, height):
+                image = pygame.transform.scale(image, (width, height))
+        _atlas[key] = image
+    return _atlas[key]
+
+
+class TileSet:
+    """Tile images at one size, looked up through the shared atlas."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+    def get(self, value):
+        return tile_image(value, self.width, self.height)
+
+
+def clear():
+    global _sheet_index
+    _originals.clear()
+    _atlas.clear()
+    _sheets.clear()
+    _sheet_index = None
@@ -0,0 +1,165 @@
+"""Vectorized batch simulator: N games in one NumPy array.
+
+Uses the same packed 64-bit boards and row tables as ``engine``. Every
+step computes the four moves for all running games at once, which gives
+both the legality mask and the terminal check for free, lets a policy pick
+a direction per game and spawns a 2/4 on a random empty cell of every
+game that moved.
+
+Run ``python batch.py --games 100000`` for a throughput check.
+"""
+import argparse
+import time
+
+import numpy as np
+
+import engine
+
+U64 = np.uint64
+ROW_LEFT = np.array(engine.ROW_LEFT, dtype=np.uint64)
+ROW_RIGHT = np.array(engine.ROW_RIGHT, dtype=np.uint64)
+ROW_SCORE = np.array(engine.ROW_SCORE, dtype=np.int64)
+
+DIRECTIONS = engine.DIRECTIONS  # Index order of the move axis below
+CELL_SHIFTS = (np.arange(engine.CELLS, dtype=np.uint64) * U64(4))
+NIBBLE = U64(0xF)
+ROW_MASK = U64(0xFFFF)
+
+
+def transpose(boards):
+    a1 = boards & U64(0xF0F00F0FF0F00F0F)
+    a2 = boards & U64(0x0000F0F00000F0F0)
+    a3 = boards & U64(0x0F0F00000F0F0000)
+    a = a1 | (a2 << U64(12)) | (a3 >> U64(12))
+    b1 = a & U64(0xFF00FF0000FF00FF)
+    b2 = a & U64(0x00FF00FF00000000)
+    b3 = a & U64(0x00000000FF00FF00)
+    return b1 | (b2 >> U64(24)) | (b3 << U64(24))
+
+
+def _move_rows(boards, table):
+    new = np.zeros_like(boards)
+    gain = np.zeros(boards.shape, dtype=np.int64)
+    for r in range(engine.ROWS):
+        shift = U64(16 * r)
+        row = ((boards >> shift) & ROW_MASK).astype(np.intp)
+        new |= table[row] << shift
+        gain += ROW_SCORE[row]
+    return new, gain
+
+
+def all_moves(boards):
+    """Apply the four moves to every board.
+
+    Returns (moved, gains), both shaped (4, N) in ``DIRECTIONS`` order.
+    """
+    t = transpose(boards)
+    left, g_left = _move_rows(boards, ROW_LEFT)
+    right, g_right = _move_rows(boards, ROW_RIGHT)
+    up, g_up = _move_rows(t, ROW_LEFT)
+    down, g_down = _move_rows(t, ROW_RIGHT)
+    moved = np.stack([left, right, transpose(up), transpose(down)])
+    gains = np.stack([g_left, g_right, g_up, g_down])
+    return moved, gains
+
+
+def cells(boards):
+    """Exponent of every cell, shaped (N, 16)."""
+    return (boards[:, None] >> CELL_SHIFTS) & NIBBLE
+
+
+def spawn(boards, rng, four_probability=engine.FOUR_PROBABILITY):
+    """Place a 2/4 on a uniformly random empty cell of every board (boards must not be full)."""
+    empty = cells(boards) == 0
+    # Random priority on empty cells only, argmax picks one of them uniformly
+    index = np.argmax(rng.random(empty.shape) * empty, axis=1).astype(np.uint64)
+    exponent = np.where(rng.random(len(boards)) < four_probability, U64(2), U64(1))
+    return boards | (exponent << (index * U64(4)))
+
+
+def new_boards(n, rng):
+    """Starting positions: two 2-tiles on random cells per game."""
+    boards = np.zeros(n, dtype=np.uint64)
+    boards = spawn(boards, rng, four_probability=0.0)
+    return spawn(boards, rng, four_probability=0.0)
+
+
+# --- POLICIES ---
+# A policy gets the (4, M) legality mask of the running games plus the rng
+# and returns the direction index to play for each of them.
+
+def random_policy(legal, rng):
+    return np.argmax(rng.random(legal.shape) * legal, axis=0)
+
+
+PREFERENCE_ORDER = [DIRECTIONS.index(d) for d in ("down", "right", "left", "up")]
+
+
+def preference_policy(legal, rng):
+    # First legal move in the fixed order down, right, left, up
+    ordered = legal[PREFERENCE_ORDER]
+    return np.asarray(PREFERENCE_ORDER)[np.argmax(ordered, axis=0)]
+
+
+POLICIES = {
+    "random": random_policy,
+    "preference": preference_policy,
+}
+
+
+def simulate(n_games, policy=random_policy, seed=None, max_moves=None):
+    """Play ``n_games`` to the end. Returns a dict of per-game arrays."""
+    rng = np.random.default_rng(seed)
+    boards = new_boards(n_games, rng)
+    score = np.zeros(n_games, dtype=np.int64)
+    moves = np.zeros(n_games, dtype=np.int64)
+    active = np.arange(n_games)
+
+    while len(active):
+        current = boards[active]
+        moved, gains = all_moves(current)
+        legal = moved != current[None, :]
+        alive = legal.any(axis=0)
+        if max_moves is not None:
+            alive &= moves[active] < max_moves
+        if not alive.all():
+            active, current = active[alive], current[alive]
+            moved, gains, legal = moved[:, alive], gains[:, alive], legal[:, alive]
+            if not len(active):
+                break
+
+        choice = policy(legal, rng)
+        columns = np.arange(len(active))
+        boards[active] = spawn(moved[choice, columns], rng)
+        score[active] += gains[choice, columns]
+        moves[active] += 1
+
+    max_exponent = cells(boards).max(axis=1).astype(np.int64)
+    return {
+        "score": score,
+        "max_tile": np.where(max_exponent > 0, 1 << max_exponent, 0),
+        "moves": moves,
+        "boards": boards,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless 2048 games with NumPy.")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = simulate(args.games, POLICIES[args.policy], seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    tiles, counts = np.unique(result["max_tile"], return_counts=True)
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed * 60:,.0f} games/min, "
+          f"{result['moves'].sum() / elapsed:,.0f} moves/s)")
+    print(f"score: mean {result['score'].mean():.1f}, max {result['score'].max()}")
+    print("max tile:", ", ".join(f"{t}: {c}" for t, c in zip(tiles, counts)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+"""Headless 2048 engine (no pygame).
+
+The board is packed into a single 64-bit integer: 16 cells x 4 bits, each
+cell storing log2 of the tile value (0 = empty, 1 = 2, 2 = 4, ... 15 = 32768).
+Cell ``row * 4 + col`` lives at bits ``4 * (row * 4 + col)``, so every row is
+one 16-bit chunk with column 0 in the lowest nibble.
+
+Left/right moves use 65536-entry tables precomputed per row, up/down moves
+transpose the board and reuse the same tables.
+
+BoardSpec gives the same functions for other sizes (5x5 to 8x8), on boards
+packed the same way into a Python int of any length.
+"""
+import random
+
+ROWS, COLS = 4, 4
+CELLS = ROWS * COLS
+MAX_EXPONENT = 15  # 4 bits per cell -> 32768 is the biggest tile we can store
+FOUR_PROBABILITY = 0.5  # Same as random.choice([2, 4]) in the original game
+WIN_EXPONENT = 11  # 2048
+
+LEFT, RIGHT, UP, DOWN = "left", "right", "up", "down"
+DIRECTIONS = (LEFT, RIGHT, UP, DOWN)
+
+ROW_MASK = 0xFFFF
+NIBBLE_LOW_BITS = 0x1111111111111111  # Lowest bit of every cell
+MASK64 = (1 << 64) - 1
+MIN_SIZE, MAX_SIZE = 4, 8
+MEMO_LIMIT = 1 << 18  # Rows kept per BoardSpec memo before it starts over
+
+
+# --- LOOKUP TABLES ---
+
+def _reverse_row(row):
+    return ((row >> 12) & 0xF) | ((row >> 4) & 0xF0) | ((row << 4) & 0xF00) | ((row << 12) & 0xF000)
+
+
+def _build_tables():
+    row_left = [0] * 65536
+    row_right = [0] * 65536
+    row_score = [0] * 65536
+    for row in range(65536):
+        line = [(row >> (4 * i)) & 0xF for i in range(COLS)]
+
+        # Standard 2048 merge: compact, merge equal neighbours once, compact again
+        tiles = [v for v in line if v]
+        merged = []
+        gain = 0
+        i = 0
+        while i < len(tiles):
+            if i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and tiles[i] < MAX_EXPONENT:
+                merged.append(tiles[i] + 1)
+                gain += 1 << (tiles[i] + 1)
+                i += 2
+            else:
+                merged.append(tiles[i])
+                i += 1
+
+        result = 0
+        for i, v in enumerate(merged):
+            result |= v << (4 * i)
+
+        row_left[row] = result
+        row_score[row] = gain
+
+    # Moving right is moving left on the mirrored row
+    for row in range(65536):
+        row_right[row] = _reverse_row(row_left[_reverse_row(row)])
+
+    return row_left, row_right, row_score
+
+
+ROW_LEFT, ROW_RIGHT, ROW_SCORE = _build_tables()
+
+
+# --- BOARD HELPERS ---
+
+def transpose(board):
+    # Swap nibbles across the diagonal in two block steps (2x2 cells, then 1x1)
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def get_cell(board, index):
+    return (board >> (4 * index)) & 0xF
+
+
+def set_cell(board, index, exponent):
+    shift = 4 * index
+    return (board & ~(0xF << shift)) | (exponent << shift)
+
+
+def from_grid(grid):
+    """Pack a ROWS x COLS grid of tile values (0 for empty) into a board."""
+    board = 0
+    for r in range(ROWS):
+        for c in range(COLS):
+            value = grid[r][c]
+            if value:
+                board |= (value.bit_length() - 1) << (4 * (r * COLS + c))
+    return board
+
+
+def to_grid(board):
+    """Unpack a board into a ROWS x COLS grid of tile values (0 for empty)."""
+    grid = []
+    for r in range(ROWS):
+        row = []
+        for c in range(COLS):
+            exponent = (board >> (4 * (r * COLS + c))) & 0xF
+            row.append(1 << exponent if exponent else 0)
+        grid.append(row)
+    return grid
+
+
+def empty_mask(board):
+    """Bit ``4 * i`` is set for every empty cell ``i`` (a few bit ops, no loop)."""
+    x = board | (board >> 1)
+    x |= x >> 2
+    return ~x & NIBBLE_LOW_BITS
+
+
+def count_empty(board):
+    return empty_mask(board).bit_count()
+
+
+def nth_empty(mask, n):
+    """Index of the n-th (0-based, lowest first) empty cell of an empty_mask()."""
+    for _ in range(n):
+        mask &= mask - 1  # Drop the lowest empty cell
+    return ((mask & -mask).bit_length() - 1) >> 2
+
+
+def empty_cells(board):
+    mask = empty_mask(board)
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append((low.bit_length() - 1) >> 2)
+        mask ^= low
+    return cells
+
+
+def max_exponent(board):
+    best = 0
+    while board:
+        best = max(best, board & 0xF)
+        board >>= 4
+    return best
+
+
+def max_tile(board):
+    exponent = max_exponent(board)
+    return 1 << exponent if exponent else 0
+
+
+def tile_sum(board):
+    total = 0
+    while board:
+        exponent = board & 0xF
+        if exponent:
+            total += 1 << exponent
+        board >>= 4
+    return total
+
+
+# --- MOVES ---
+
+def _move_rows(board, table, score_table):
+    r0 = board & ROW_MASK
+    r1 = (board >> 16) & ROW_MASK
+    r2 = (board >> 32) & ROW_MASK
+    r3 = (board >> 48) & ROW_MASK
+    new = table[r0] | (table[r1] << 16) | (table[r2] << 32) | (table[r3] << 48)
+    gain = score_table[r0] + score_table[r1] + score_table[r2] + score_table[r3]
+    return new, gain
+
+
+def move(board, direction):
+    """Return (new_board, score_gain). new_board == board if nothing moved."""
+    if direction == LEFT:
+        return _move_rows(board, ROW_LEFT, ROW_SCORE)
+    if direction == RIGHT:
+        return _move_rows(board, ROW_RIGHT, ROW_SCORE)
+    if direction == UP:
+        new, gain = _move_rows(transpose(board), ROW_LEFT, ROW_SCORE)
+        return transpose(new), gain
+    if direction == DOWN:
+        new, gain = _move_rows(transpose(board), ROW_RIGHT, ROW_SCORE)
+        return transpose(new), gain
+    raise ValueError(f"Unknown direction: {direction!r}")
+
+
+def legal_moves(board):
+    return [d for d in DIRECTIONS if move(board, d)[0] != board]
+
+
+def is_over(board):
+    return not legal_moves(board)
+
+
+def spawn(board, rng=random, four_probability=FOUR_PROBABILITY):
+    """Place a 2 or 4 on a random empty cell.
+
+    Returns (new_board, index, exponent), or (board, None, 0) if the board is full.
+    """
+    mask = empty_mask(board)
+    free = mask.bit_count()
+    if not free:
+        return board, None, 0
+    index = nth_empty(mask, rng.randrange(free))
+    exponent = 2 if rng.random() < four_probability else 1
+    return set_cell(board, index, exponent), index, exponent
+
+
+def new_board(rng=random):
+    """Starting position: two 2-tiles on random cells (like the original game)."""
+    board = 0
+    for _ in range(2):
+        mask = empty_mask(board)
+        board = set_cell(board, nth_empty(mask, rng.randrange(mask.bit_count())), 1)
+    return board
+
+
+class SplitMix64:
+    """Small seeded RNG whose whole state is one 64-bit counter.
+
+    Recorded games use it for their spawns: the same seed gives the same
+    tiles on every platform, and a saved position only needs the counter
+    (getstate / setstate). Has the two methods spawn() uses.
+    """
+
+    def __init__(self, seed=0):
+        self.state = seed & MASK64
+
+    def next64(self):
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+
+    def randrange(self, n):
+        return self.next64() % n
+
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
+
+
+# --- OTHER BOARD SIZES ---
+
+class BoardSpec:
+    """Moves and helpers for a size x size board, with the module functions' names.
+
+    Same layout as the 4x4 board: cell ``row * size + col`` at bits
+    ``bits * index``, row ``r`` is one ``bits * size``-bit chunk. Bigger
+    boards use 5 bits per cell (up to 2 ** 31), a 4x4 board would never
+    reach that but an 8x8 one can go past 32768.
+
+    A row is moved with a lookup table when one fits (the 4x4 spec simply
+    is the module functions and their 65536-entry tables). Longer rows (25
+    to 40 bits) cannot be tabulated, so each row is worked out the first
+    time it is seen and kept in a dict: a game only meets a small fraction
+    of the possible rows, and the hit rate is high after a few moves.
+    Transposing goes through a second memo of the same kind, one lookup per
+    row instead of a loop over every cell.
+    """
+
+    # The 4x4 spec uses these module-level functions as they are
+    FUNCTIONS = ("get_cell", "set_cell", "from_grid", "to_grid", "transpose", "empty_mask", "count_empty",
+                 "nth_empty", "empty_cells", "max_exponent", "max_tile", "tile_sum", "move", "legal_moves",
+                 "is_over", "spawn", "new_board")
+
+    def __init__(self, size):
+        if not MIN_SIZE <= size <= MAX_SIZE:
+            raise ValueError(f"board size must be between {MIN_SIZE} and {MAX_SIZE}")
+        self.size = self.rows = self.cols = size
+        self.cells = size * size
+        self.bits = 4 if size == ROWS else 5
+        self.max_exponent_value = (1 << self.bits) - 1
+        self.cell_mask = (1 << self.bits) - 1
+        self.row_bits = self.bits * size
+        self.row_mask = (1 << self.row_bits) - 1
+        self.low_bits = sum(1 << (self.bits * i) for i in range(self.cells))  # Lowest bit of every cell
+        self.board_bytes = (self.bits * self.cells + 7) // 8
+        self._left = {}  # row -> (moved row, gain)
+        self._right = {}
+        self._spread = {}  # row -> its cells placed down column 0
+        if size == ROWS:
+            for name in self.FUNCTIONS:
+                setattr(self, name, globals()[name])
+
+    def __repr__(self):
+        return f"BoardSpec({self.size})"
+
+    # --- CELLS ---
+
+    def get_cell(self, board, index):
+        return (board >> (self.bits * index)) & self.cell_mask
+
+    def set_cell(self, board, index, exponent):
+        shift = self.bits * index
+        return (board & ~(self.cell_mask << shift)) | (exponent << shift)
+
+    def from_grid(self, grid):
+        board = 0
+        for r in range(self.size):
+            for c in range(self.size):
+                value = grid[r][c]
+                if value:
+                    board |= (value.bit_length() - 1) << (self.bits * (r * self.size + c))
+        return board
+
+    def to_grid(self, board):
+        return [[1 << e if e else 0 for e in (self.get_cell(board, r * self.size + c) for c in range(self.size))]
+                for r in range(self.size)]
+
+    def empty_mask(self, board):
+        """Bit ``bits * i`` is set for every empty cell ``i``."""
+        x = board
+        for shift in range(1, self.bits):
+            x |= board >> shift
+        return ~x & self.low_bits
+
+    def count_empty(self, board):
+        return self.empty_mask(board).bit_count()
+
+    def nth_empty(self, mask, n):
+        for _ in range(n):
+            mask &= mask - 1
+        return ((mask & -mask).bit_length() - 1) // self.bits
+
+    def empty_cells(self, board):
+        mask = self.empty_mask(board)
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append((low.bit_length() - 1) // self.bits)
+            mask ^= low
+        return cells
+
+    def max_exponent(self, board):
+        best = 0
+        while board:
+            best = max(best, board & self.cell_mask)
+            board >>= self.bits
+        return best
+
+    def max_tile(self, board):
+        exponent = self.max_exponent(board)
+        return 1 << exponent if exponent else 0
+
+    def tile_sum(self, board):
+        total = 0
+        while board:
+            exponent = board & self.cell_mask
+            if exponent:
+                total += 1 << exponent
+            board >>= self.bits
+        return total
+
+    # --- ROWS ---
+
+    def _line(self, row):
+        return [(row >> (self.bits * i)) & self.cell_mask for i in range(self.size)]
+
+    def _pack(self, line):
+        row = 0
+        for i, v in enumerate(line):
+            row |= v << (self.bits * i)
+        return row
+
+    def _slide_left(self, row):
+        # Same merge as _build_tables: compact, merge equal neighbours once, compact again
+        tiles = [v for v in self._line(row) if v]
+        merged = []
+        gain = 0
+        i = 0
+        while i < len(tiles):
+            if i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and tiles[i] < self.max_exponent_value:
+                merged.append(tiles[i] + 1)
+                gain += 1 << (tiles[i] + 1)
+                i += 2
+            else:
+                merged.append(tiles[i])
+                i += 1
+        return self._pack(merged), gain
+
+    def _row_left(self, row):
+        result = self._left.get(row)
+        if result is None:
+            if len(self._left) >= MEMO_LIMIT:
+                self._left.clear()
+            result = self._left[row] = self._slide_left(row)
+        return result
+
+    def _row_right(self, row):
+        result = self._right.get(row)
+        if result is None:
+            if len(self._right) >= MEMO_LIMIT:
+                self._right.clear()
+            moved, gain = self._slide_left(self._pack(self._line(row)[::-1]))
+            result = self._right[row] = (self._pack(self._line(moved)[::-1]), gain)
+        return result
+
+    def transpose(self, board):
+        spread = self._spread
+        bits, mask = self.row_bits, self.row_mask
+        result = 0
+        shift = 0
+        while board:
+            row = board & mask
+            column = spread.get(row)
+            if column is None:
+                if len(spread) >= MEMO_LIMIT:
+                    spread.clear()
+                # Cell c of the row goes to row c, column 0
+                column = spread[row] = sum(v << (bits * c) for c, v in enumerate(self._line(row)))
+            result |= column << shift
+            board >>= bits
+            shift += self.bits
+        return result
+
+    def _move_rows(self, board, memo, row_move):
+        new = 0
+        gain = 0
+        bits, mask = self.row_bits, self.row_mask
+        shift = 0
+        while board:
+            row = board & mask
+            result = memo.get(row) or row_move(row)
+            new |= result[0] << shift
+            gain += result[1]
+            board >>= bits
+            shift += bits
+        return new, gain
+
+    # --- MOVES ---
+
+    def move(self, board, direction):
+        if direction == LEFT:
+            return self._move_rows(board, self._left, self._row_left)
+        if direction == RIGHT:
+            return self._move_rows(board, self._right, self._row_right)
+        if direction == UP:
+            new, gain = self._move_rows(self.transpose(board), self._left, self._row_left)
+            return self.transpose(new), gain
+        if direction == DOWN:
+            new, gain = self._move_rows(self.transpose(board), self._right, self._row_right)
+            return self.transpose(new), gain
+        raise ValueError(f"Unknown direction: {direction!r}")
+
+    def legal_moves(self, board):
+        return [d for d in DIRECTIONS if self.move(board, d)[0] != board]
+
+    def is_over(self, board):
+        return not self.legal_moves(board)
+
+    def spawn(self, board, rng=random, four_probability=FOUR_PROBABILITY):
+        mask = self.empty_mask(board)
+        free = mask.bit_count()
+        if not free:
+            return board, None, 0
+        index = self.nth_empty(mask, rng.randrange(free))
+        exponent = 2 if rng.random() < four_probability else 1
+        return self.set_cell(board, index, exponent), index, exponent
+
+    def new_board(self, rng=random):
+        board = 0
+        for _ in range(2):
+            mask = self.empty_mask(board)
+            board = self.set_cell(board, self.nth_empty(mask, rng.randrange(mask.bit_count())), 1)
+        return board
+
+
+_specs = {}
+
+
+def board_spec(size=ROWS):
+    """The shared BoardSpec of a size (its row memos are reused by every game of that size)."""
+    spec = _specs.get(size)
+    if spec is None:
+        spec = _specs[size] = BoardSpec(size)
+    return spec
+
+
+class Engine:
+    """A single headless game: board, score and move counter, no rendering."""
+
+    def __init__(self, seed=None, board=None):
+        self.rng = random.Random(seed)
+        self.board = new_board(self.rng) if board is None else board
+        self.score = 0  # Standard 2048 score (sum of merged tiles)
+        self.moves = 0
+
+    def step(self, direction):
+        """Apply a move and spawn a tile. Returns False if the move was illegal."""
+        new, gain = move(self.board, direction)
+        if new == self.board:
+            return False
+        self.board, _, _ = spawn(new, self.rng)
+        self.score += gain
+        self.moves += 1
+        return True
+
+    def legal_moves(self):
+        return legal_moves(self.board)
+
+    def is_over(self):
+        return is_over(self.board)
+
+    def max_tile(self):
+        return max_tile(self.board)
+
+    def won(self):
+        return max_exponent(self.board) >= WIN_EXPONENT
@@ -0,0 +1,43 @@
+"""Shared fonts and rendered-text cache.
+
+pygame.font.SysFont does a system font lookup (slow, especially under
+WASM), so every (name, size, bold) font is created once. Rendered text
+surfaces are cached by (font, text, color) with LRU eviction, so static
+labels and button captions are rendered once, not every frame.
+"""
+from collections import OrderedDict
+
+import pygame
+
+FONT_NAME = "comicsans"
+TEXT_CACHE_SIZE = 256
+
+_fonts = {}
+_text_cache = OrderedDict()
+
+
+def get_font(size, bold=False, name=FONT_NAME):
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+
+def render_text(text, size, color, bold=False, name=FONT_NAME):
+    """Antialiased text surface, cached. Do not draw onto the returned surface."""
+    key = (name, size, bold, text, color)
+    surf = _text_cache.get(key)
+    if surf is not None:
+        _text_cache.move_to_end(key)
+        return surf
+    surf = get_font(size, bold, name).render(text, True, color)
+    _text_cache[key] = surf
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surf
+
+
+def clear():
+    _text_cache.clear()
+    _fonts.clear()
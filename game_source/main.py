@@ -1,19 +1,29 @@
 import pygame
 import random
-import math
 import asyncio
 import sys
 import time
 import datetime
+import base64
+
+import ai
+import animation
+import assets
+import engine
+import fonts
+import replay
 
 # --- CONFIG ---
 FPS = 60
 WIDTH, HEIGHT = 800, 800 # Keep standard resolution
-ROWS, COLS = 4, 4
+ROWS, COLS = engine.ROWS, engine.COLS # Default board, Game2048(size=...) for 5x5 .. 8x8
 OUTLINE_COLOR = (187, 173, 160)
 OUTLINE_THICKNESS = 10
 BACKGROUND_COLOR = (205, 193, 180)
 FONT_COLOR = (119, 110, 101)
+AI_DIFFICULTY = "HARD" # EASY, NORMAL or HARD (search depth of the AI bot)
+AI_SEARCH_BUDGET = 0.012 # seconds for a blocking ai_move_logic() call, keeps it inside one frame
+AI_FRAME_BUDGET = 0.004 # seconds of AI search per frame in AI_MATCH (see IncrementalSearch)
 
 pygame.display.init()
 pygame.font.init()
@@ -22,43 +32,6 @@ pygame.mixer.quit()
 WINDOW = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("2048 Web")
 
-# --- ASSETS MANAGEMENT ---
-ASSETS = {}
-ASSETS_SMALL = {} # For AI Match mode
-VALUES = [2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192]
-ORIGINAL_IMAGES = {} # Cache original images
-
-def load_original_assets():
-    # Load raw images once
-    try:
-        bg_img = pygame.image.load("assets/Tile Background.png")
-        ORIGINAL_IMAGES[0] = bg_img
-    except:
-        ORIGINAL_IMAGES[0] = None
-        
-    for val in VALUES:
-        try:
-            img = pygame.image.load(f"assets/{val} Tile.png")
-            ORIGINAL_IMAGES[val] = img
-        except:
-            # print(f"Warning: Missing image for {val}")
-            ORIGINAL_IMAGES[val] = None
-
-def scale_assets(tile_width, tile_height, destination_dict):
-    # Scale originals to target size
-    if 0 in ORIGINAL_IMAGES and ORIGINAL_IMAGES[0]:
-         destination_dict[0] = pygame.transform.scale(ORIGINAL_IMAGES[0], (tile_width, tile_height))
-    else:
-         destination_dict[0] = None
-         
-    for val in VALUES:
-        if val in ORIGINAL_IMAGES and ORIGINAL_IMAGES[val]:
-            destination_dict[val] = pygame.transform.scale(ORIGINAL_IMAGES[val], (tile_width, tile_height))
-        else:
-            destination_dict[val] = None
-
-load_original_assets()
-
 # --- CLASS DEFINITIONS ---
 
 class Button:
@@ -67,17 +40,35 @@ class Button:
         self.text = text
         self.color = color
         self.text_color = text_color
-        self.font = pygame.font.SysFont("comicsans", 40, bold=True)
 
     def draw(self, window):
         pygame.draw.rect(window, self.color, self.rect, border_radius=10)
-        text_surf = self.font.render(self.text, 1, self.text_color)
+        text_surf = fonts.render_text(self.text, 40, self.text_color, bold=True)
         window.blit(text_surf, (self.rect.x + (self.rect.width/2 - text_surf.get_width()/2), 
                                 self.rect.y + (self.rect.height/2 - text_surf.get_height()/2)))
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
+def draw_tile(window, tile_set, value, x, y, width, height, scale=1.0):
+    # Tile image at (x, y), scaled around the cell center for the merge/spawn animations
+    if scale != 1.0:
+        w, h = int(width * scale), int(height * scale)
+        if w <= 0 or h <= 0:
+            return
+        x += (width - w) / 2
+        y += (height - h) / 2
+        width, height = w, h
+    image = tile_set.get(value)
+    if image:
+        if image.get_size() != (width, height):
+            image = pygame.transform.smoothscale(image, (width, height))
+        window.blit(image, (x, y))
+    else:
+        pygame.draw.rect(window, (238, 228, 218), (x, y, width, height))
+        text = fonts.render_text(str(value), int(tile_set.height * 0.4), FONT_COLOR, bold=True)
+        window.blit(text, (x + (width / 2 - text.get_width() / 2), y + (height / 2 - text.get_height() / 2)))
+
 class Tile:
     def __init__(self, value, row, col, rect_width, rect_height):
         self.value = value
@@ -88,320 +79,287 @@ class Tile:
         # Relative position in grid
         self.x = col * rect_width
         self.y = row * rect_height
-        self.font = pygame.font.SysFont("comicsans", int(rect_height * 0.4), bold=True)
-
-    def draw(self, window, offset_x, offset_y, asset_dict):
-        draw_x = offset_x + self.x
-        draw_y = offset_y + self.y
-        
-        if self.value in asset_dict and asset_dict[self.value]:
-            window.blit(asset_dict[self.value], (draw_x, draw_y))
-        else:
-            pygame.draw.rect(window, (238, 228, 218), (draw_x, draw_y, self.rect_width, self.rect_height))
-            text = self.font.render(str(self.value), 1, FONT_COLOR)
-            window.blit(
-                text,
-                (
-                    draw_x + (self.rect_width / 2 - text.get_width() / 2),
-                    draw_y + (self.rect_height / 2 - text.get_height() / 2),
-                ),
-            )
-
-    def set_pos(self, ceil=False):
-        if ceil:
-            self.row = math.ceil(self.y / self.rect_height)
-            self.col = math.ceil(self.x / self.rect_width)
-        else:
-            self.row = math.floor(self.y / self.rect_height)
-            self.col = math.floor(self.x / self.rect_width)
 
-    def move(self, delta):
-        self.x += delta[0]
-        self.y += delta[1]
+    def draw(self, window, offset_x, offset_y, tile_set):
+        draw_tile(window, tile_set, self.value, offset_x + self.x, offset_y + self.y, self.rect_width, self.rect_height)
 
 class Game2048:
-    def __init__(self, x, y, width, height, is_ai=False, name="Player"):
+    def __init__(self, x, y, width, height, is_ai=False, name="Player", ai_difficulty=AI_DIFFICULTY, hard=False,
+                 size=ROWS, animated=False):
+        if size != ROWS and (is_ai or hard):
+            raise ValueError(f"the AI and HARD mode only play on a {ROWS}x{COLS} board")
         self.x_offset = x
         self.y_offset = y
         self.width = width
         self.height = height
-        self.tile_width = width // COLS
-        self.tile_height = height // ROWS
+        self.size = size
+        self.spec = engine.board_spec(size) # Moves and helpers for this size (the engine functions on 4x4)
+        self.tile_width = width // size
+        self.tile_height = height // size
         self.is_ai = is_ai
         self.name = name
+        self.ai = ai.ExpectimaxAI.for_difficulty(ai_difficulty, time_limit=AI_SEARCH_BUDGET) if is_ai else None
+        self.board = 0 # Packed engine board, self.tiles (cell index -> Tile) is only used for drawing
+        # Recorded game: spawns come from the seed, so seed + moves is enough to replay it (replay.py)
+        self.seed = replay.new_seed()
+        self.rng = engine.SplitMix64(self.seed)
+        self.moves = bytearray() # Direction codes of the moves that changed the board
+        # HARD mode: the worst tile for the player instead of a random one (same search on replay)
+        self.spawner = ai.AdversarialSpawner() if hard else None
         self.tiles = {}
         self.score = 0
         self.won = False
         self.lost = False
         self.over = False
-        self.move_vel = 20 # Speed of animation
-        # Scale assets for this instance
-        self.assets = {}
-        scale_assets(self.tile_width, self.tile_height, self.assets)
+        # Tweens of the last move (animation.py), the board itself is already updated
+        self.animated = animated
+        self.animation = None
+        self.spawned = None # Cell of the last spawned tile
+        # Tile images at this board's size (shared atlas, loaded on first draw)
+        self.assets = assets.TileSet(self.tile_width, self.tile_height)
         
+        # Render cache (see draw / draw_dirty)
+        self.background = None
+        self.grid_overlay = None
+        self.drawn = None # cell index -> value currently on screen, None = never drawn
+        self.drawn_label = None
+        self.label_rect = None
+
         self.generate_tiles()
-        
-        self.font_score = pygame.font.SysFont("comicsans", 30, bold=True)
 
     def get_random_pos(self):
-        row = None
-        col = None
-        while True:
-            row = random.randrange(0, ROWS)
-            col = random.randrange(0, COLS)
-            if f"{row}{col}" not in self.tiles:
-                break
-        return row, col
+        # One pick among the free cells of the board, None if the board is full
+        mask = self.spec.empty_mask(self.board)
+        free = mask.bit_count()
+        if not free:
+            return None
+        return divmod(self.spec.nth_empty(mask, self.rng.randrange(free)), self.size)
 
     def generate_tiles(self):
         for _ in range(2):
             row, col = self.get_random_pos()
-            self.tiles[f"{row}{col}"] = Tile(2, row, col, self.tile_width, self.tile_height)
-
-    def draw_grid(self, window):
+            self.board = self.spec.set_cell(self.board, row * self.size + col, 1)
+        self.sync_tiles()
+
+    def sync_tiles(self):
+        # Rebuild the Tile objects from the engine board (keep the ones that did not change)
+        tiles = {}
+        spec = self.spec
+        occupied = ~spec.empty_mask(self.board) & spec.low_bits
+        while occupied:
+            low = occupied & -occupied
+            occupied ^= low
+            index = (low.bit_length() - 1) // spec.bits
+            value = 1 << spec.get_cell(self.board, index)
+            tile = self.tiles.get(index)
+            if tile is None or tile.value != value:
+                row, col = divmod(index, self.size)
+                tile = Tile(value, row, col, self.tile_width, self.tile_height)
+            tiles[index] = tile
+        self.tiles = tiles
+
+    def show(self, board, score):
+        # Display a given position (replay viewer), the next draw_dirty only redraws the cells that differ
+        self.board = board
+        self.score = score
+        self.sync_tiles()
+
+    def draw_grid(self, window, origin=None):
+        x0, y0 = origin if origin else (self.x_offset, self.y_offset)
         # Outline
-        pygame.draw.rect(window, OUTLINE_COLOR, (self.x_offset, self.y_offset, self.width, self.height), OUTLINE_THICKNESS)
-        for row in range(1, ROWS):
-            y = self.y_offset + row * self.tile_height
-            pygame.draw.line(window, OUTLINE_COLOR, (self.x_offset, y), (self.x_offset + self.width, y), OUTLINE_THICKNESS)
-        for col in range(1, COLS):
-            x = self.x_offset + col * self.tile_width
-            pygame.draw.line(window, OUTLINE_COLOR, (x, self.y_offset), (x, self.y_offset + self.height), OUTLINE_THICKNESS)
+        pygame.draw.rect(window, OUTLINE_COLOR, (x0, y0, self.width, self.height), OUTLINE_THICKNESS)
+        for row in range(1, self.size):
+            y = y0 + row * self.tile_height
+            pygame.draw.line(window, OUTLINE_COLOR, (x0, y), (x0 + self.width, y), OUTLINE_THICKNESS)
+        for col in range(1, self.size):
+            x = x0 + col * self.tile_width
+            pygame.draw.line(window, OUTLINE_COLOR, (x, y0), (x, y0 + self.height), OUTLINE_THICKNESS)
+
+    def build_background(self):
+        # Static part of the board, composed once: tile backgrounds + grid, and the grid alone
+        # (transparent) to put the lines back on top of a redrawn tile
+        self.background = pygame.Surface((self.width, self.height)).convert()
+        tile_background = self.assets.get(assets.BACKGROUND)
+        if tile_background:
+            for r in range(self.size):
+                for c in range(self.size):
+                    self.background.blit(tile_background, (c * self.tile_width, r * self.tile_height))
+        else:
+            self.background.fill(BACKGROUND_COLOR)
+        self.draw_grid(self.background, (0, 0))
+
+        self.grid_overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA).convert_alpha()
+        self.draw_grid(self.grid_overlay, (0, 0))
+
+    def cell_rect(self, index):
+        row, col = divmod(index, self.size)
+        return pygame.Rect(col * self.tile_width, row * self.tile_height, self.tile_width, self.tile_height)
+
+    def draw_label(self, window):
+        # Name and score above the board, returns the area to update on screen
+        label = f"{self.name}: {self.score}"
+        text = fonts.render_text(label, 30, FONT_COLOR, bold=True)
+        rect = window.blit(text, (self.x_offset, self.y_offset - 40))
+        dirty = rect.union(self.label_rect) if self.label_rect else rect
+        self.label_rect = rect
+        self.drawn_label = label
+        return dirty
 
     def draw(self, window):
-        # Draw background for tiles
-        if 0 in self.assets and self.assets[0]:
-            for r in range(ROWS):
-                for c in range(COLS):
-                    window.blit(self.assets[0], (self.x_offset + c * self.tile_width, self.y_offset + r * self.tile_height))
-        else:
-             pygame.draw.rect(window, BACKGROUND_COLOR, (self.x_offset, self.y_offset, self.width, self.height))
+        # Full redraw of the board, returns the area to update on screen
+        if self.background is None:
+            self.build_background()
+        window.blit(self.background, (self.x_offset, self.y_offset))
 
         for tile in self.tiles.values():
             tile.draw(window, self.x_offset, self.y_offset, self.assets)
         
-        self.draw_grid(window)
-        
-        # Draw Name and Score
-        label = f"{self.name}: {self.score}"
-        text = self.font_score.render(label, 1, FONT_COLOR)
-        window.blit(text, (self.x_offset, self.y_offset - 40))
+        window.blit(self.grid_overlay, (self.x_offset, self.y_offset))
+        self.drawn = {index: tile.value for index, tile in self.tiles.items()}
+        self.animation = None # Shows the final board already
 
-    def move_tiles(self, direction, clock):
-        updated = True
-        blocks = set()
-        
-        # Animation loop logic (simplified from original)
-        # Note: To keep it smooth in Async loop, we iterate physics here
-        # But since this is called inside main loop, we need to be careful not to block too long.
-        # However, original code blocked in a while loop with clock.tick.
-        
-        if direction == "left":
-            sort_func = lambda x: x.col
-            reverse = False
-            delta = (-self.move_vel, 0)
-            boundary_check = lambda tile: tile.col == 0
-            get_next_tile = lambda tile: self.tiles.get(f"{tile.row}{tile.col - 1}")
-            merge_check = lambda tile, next_tile: tile.x > next_tile.x + self.move_vel
-            move_check = lambda tile, next_tile: tile.x > next_tile.x + self.tile_width + self.move_vel
-            ceil = True
-        elif direction == "right":
-            sort_func = lambda x: x.col
-            reverse = True
-            delta = (self.move_vel, 0)
-            boundary_check = lambda tile: tile.col == COLS - 1
-            get_next_tile = lambda tile: self.tiles.get(f"{tile.row}{tile.col + 1}")
-            merge_check = lambda tile, next_tile: tile.x < next_tile.x - self.move_vel
-            move_check = lambda tile, next_tile: tile.x + self.tile_width + self.move_vel < next_tile.x
-            ceil = False
-        elif direction == "up":
-            sort_func = lambda x: x.row
-            reverse = False
-            delta = (0, -self.move_vel)
-            boundary_check = lambda tile: tile.row == 0
-            get_next_tile = lambda tile: self.tiles.get(f"{tile.row - 1}{tile.col}")
-            merge_check = lambda tile, next_tile: tile.y > next_tile.y + self.move_vel
-            move_check = lambda tile, next_tile: tile.y > next_tile.y + self.tile_height + self.move_vel
-            ceil = True
-        elif direction == "down":
-            sort_func = lambda x: x.row
-            reverse = True
-            delta = (0, self.move_vel)
-            boundary_check = lambda tile: tile.row == ROWS - 1
-            get_next_tile = lambda tile: self.tiles.get(f"{tile.row + 1}{tile.col}")
-            merge_check = lambda tile, next_tile: tile.y < next_tile.y - self.move_vel
-            move_check = lambda tile, next_tile: tile.y + self.tile_height + self.move_vel < next_tile.y
-            ceil = False
-
-        # --- SIMPLIFIED MOVEMENT LOGIC (NO ANIMATION LOOP) ---
+        # Draw Name and Score
+        self.label_rect = None
+        label_rect = self.draw_label(window)
+        return pygame.Rect(self.x_offset, self.y_offset, self.width, self.height).union(label_rect)
+
+    def draw_value(self, window, value, x, y, scale=1.0):
+        draw_tile(window, self.assets, value, x, y, self.tile_width, self.tile_height, scale)
+
+    def sprite_rect(self, x, y, scale=1.0):
+        # Area of a tile drawn at (x, y) in the board, scaled around its center
+        w, h = int(self.tile_width * scale), int(self.tile_height * scale)
+        return pygame.Rect(int(x + (self.tile_width - w) / 2), int(y + (self.tile_height - h) / 2), w + 1, h + 1)
+
+    def restore(self, window, rect, hidden=()):
+        # Background and resting tiles (except the cells in hidden) inside a screen rect
+        area = rect.move(-self.x_offset, -self.y_offset)
+        window.blit(self.background, rect, area)
+        window.set_clip(rect)
+        for row in range(max(0, area.top // self.tile_height), min(self.size, (area.bottom - 1) // self.tile_height + 1)):
+            for col in range(max(0, area.left // self.tile_width), min(self.size, (area.right - 1) // self.tile_width + 1)):
+                index = row * self.size + col
+                tile = self.tiles.get(index)
+                if tile and index not in hidden:
+                    tile.draw(window, self.x_offset, self.y_offset, self.assets)
+        window.set_clip(None)
+
+    def draw_dirty(self, window, alpha=0.0):
+        # Redraw only the cells and label that changed since the last draw, returns the updated rects
+        if self.drawn is None:
+            return [self.draw(window)]
+        rects = []
+        if self.animation:
+            # Only the moving tiles, alpha = progress inside the current animation step
+            rects = self.animation.draw(window, alpha)
+            if self.animation.done:
+                self.animation = None
+                self.drawn = {index: tile.value for index, tile in self.tiles.items()}
+            if self.drawn_label != f"{self.name}: {self.score}":
+                window.fill(BACKGROUND_COLOR, self.label_rect)
+                rects.append(self.draw_label(window))
+            return rects
+        for index in set(self.drawn) | set(self.tiles):
+            tile = self.tiles.get(index)
+            if self.drawn.get(index) == (tile.value if tile else None):
+                continue
+            area = self.cell_rect(index)
+            screen_pos = (self.x_offset + area.x, self.y_offset + area.y)
+            window.blit(self.background, screen_pos, area)
+            if tile:
+                tile.draw(window, self.x_offset, self.y_offset, self.assets)
+                self.drawn[index] = tile.value
+            else:
+                del self.drawn[index]
+            window.blit(self.grid_overlay, screen_pos, area)
+            rects.append(pygame.Rect(screen_pos, area.size))
 
-        
-        moved = False
-        merged_flags = set() # Track merged positions in this turn to avoid double merge
+        if self.drawn_label != f"{self.name}: {self.score}":
+            window.fill(BACKGROUND_COLOR, self.label_rect)
+            rects.append(self.draw_label(window))
+        return rects
 
-        
-        if direction == "left":
-             for r in range(ROWS):
-                 # Get tiles in this row, sorted by col index (0 to 3)
-                 row_tiles = sorted([t for t in self.tiles.values() if t.row == r], key=lambda t: t.col)
-                 
-                 # Compact to left
-                 target_col = 0
-                 for i, tile in enumerate(row_tiles):
-                     # Check for merge with previous tile in this processed row
-                     # Note: we need to track the 'current' state of the row being built
-                     pass
-                     
-        # Actually, easier to implement standard 2048 algorithm on a 4x4 grid logic
-        # then update the Tile objects to match the new grid.
-        
-        grid = [[None for _ in range(COLS)] for _ in range(ROWS)]
-        for t in self.tiles.values():
-            grid[t.row][t.col] = t
-            
-        new_tiles = {}
-        
-        # Helper to process a line (row or col)
-        def process_line(line):
-            nonlocal moved
-            # Remove Nones
-            compact = [t for t in line if t is not None]
-            merged = []
-            skip = False
-            for i in range(len(compact)):
-                if skip:
-                    skip = False
-                    continue
-                if i + 1 < len(compact) and compact[i].value == compact[i+1].value:
-                    # Merge
-                    doubled_val = compact[i].value * 2
-                    # Create a new tile object or update one? 
-                    # We keep compact[i] and update value
-                    compact[i].value = doubled_val
-                    merged.append(compact[i])
-                    moved = True # Logic moved (merge count as move)
-                    skip = True # Skip next one as it is consumed
-                else:
-                    merged.append(compact[i])
-            
-            # Pad with Nones
-            while len(merged) < len(line):
-                merged.append(None)
-            return merged
-
-        if direction == "left":
-            for r in range(ROWS):
-                line = grid[r] # [T, T, None, T]
-                new_line = process_line(line)
-                # If line changed, moved=True
-                if line != new_line: moved = True # Simple check might fail if objects same but pos diff?
-                # Actually we rely on process_line to set moved if merge, 
-                # but we also need to check if position changed.
-                
-                for c in range(COLS):
-                    if new_line[c]:
-                        t = new_line[c]
-                        # Update tile position
-                        if t.row != r or t.col != c:
-                            moved = True
-                            t.row = r
-                            t.col = c
-                            t.x = c * self.tile_width
-                            t.y = r * self.tile_height
-                        new_tiles[f"{r}{c}"] = t
-                        
-        elif direction == "right":
-            for r in range(ROWS):
-                line = grid[r][::-1] # Process from right
-                new_line = process_line(line)
-                new_line = new_line[::-1] # Reverse back
-                
-                for c in range(COLS):
-                    if new_line[c]:
-                        t = new_line[c]
-                        if t.row != r or t.col != c:
-                            moved = True
-                            t.row = r
-                            t.col = c
-                            t.x = c * self.tile_width
-                            t.y = r * self.tile_height
-                        new_tiles[f"{r}{c}"] = t
-
-        elif direction == "up":
-            for c in range(COLS):
-                line = [grid[r][c] for r in range(ROWS)]
-                new_line = process_line(line)
-                
-                for r in range(ROWS):
-                    if new_line[r]:
-                        t = new_line[r]
-                        if t.row != r or t.col != c:
-                            moved = True
-                            t.row = r
-                            t.col = c
-                            t.x = c * self.tile_width
-                            t.y = r * self.tile_height
-                        new_tiles[f"{r}{c}"] = t
-
-        elif direction == "down":
-            for c in range(COLS):
-                line = [grid[r][c] for r in range(ROWS)][::-1]
-                new_line = process_line(line)
-                new_line = new_line[::-1]
-                
-                for r in range(ROWS):
-                    if new_line[r]:
-                        t = new_line[r]
-                        if t.row != r or t.col != c:
-                            moved = True
-                            t.row = r
-                            t.col = c
-                            t.x = c * self.tile_width
-                            t.y = r * self.tile_height
-                        new_tiles[f"{r}{c}"] = t
-        
-        if moved:
-            self.tiles = new_tiles
-            self.update_tiles([]) # Argument ignored in new logic
-            return self.end_move()
-        
-        return "continue"
+    def move_tiles(self, direction, clock):
+        # All the game logic lives in the engine, we only mirror the result.
+        # The move is committed at once, the animation only replays it on screen
+        old_board = self.board
+        new_board, gain = self.spec.move(self.board, direction)
+        if new_board == self.board:
+            return "continue"
+        self.board = new_board
+        self.score += gain # Running score: value of every merged tile
+        self.moves.append(replay.CODES[direction])
+        self.update_tiles([]) # Argument ignored in new logic
+        result = self.end_move()
+        if self.animated and self.drawn is not None:
+            self.animation = animation.BoardAnimation(self, animation.move_paths(self.spec, old_board, direction),
+                                                      self.spawned, self.animation)
+        return result
 
     def update_tiles(self, sorted_tiles):
         # Simplified: Just check for win condition
-        for tile in self.tiles.values():
-            if tile.value == 2048:
-                self.won = True
+        if self.spec.max_exponent(self.board) >= engine.WIN_EXPONENT:
+            self.won = True
 
     def end_move(self):
-        self.score = sum(t.value for t in self.tiles.values())
-        if len(self.tiles) == 16:
+        if self.spawner:
+            self.board, self.spawned, _ = self.spawner.spawn(self.board)
+        else:
+            self.board, self.spawned, _ = self.spec.spawn(self.board, self.rng)
+        self.sync_tiles()
+        if self.spec.is_over(self.board):
             self.lost = True
             return "lost"
-        row, col = self.get_random_pos()
-        self.tiles[f"{row}{col}"] = Tile(random.choice([2, 4]), row, col, self.tile_width, self.tile_height)
         return "continue"
     
     def ai_move_logic(self):
-        # Simple AI: Try preferred directions
+        # Expectimax search on the engine board
+        if self.ai:
+            move = self.ai.best_move(self.board)
+            if move:
+                return move
+        # Fallback (no AI attached / no legal move): random direction
         moves = ["down", "right", "left", "up"]
-        # TODO: Add smarter logic (copy grid and simulate?)
-        # For now: Random valid move
         return random.choice(moves)
 
+    def start_ai_search(self):
+        # Time-sliced search for the current board, driven by main() one slice per frame
+        return ai.IncrementalSearch(self.ai, self.board)
+
 # --- JS COMMUNICATION ---
-def send_score_to_web(score, start_time, end_time, game_mode):
+def send_score_to_web(score, start_time, end_time, game_mode, seed=None, moves=None, board_size=ROWS):
+    # seed + packed moves let the server replay the game and check the score
+    move_log = base64.b64encode(replay.encode(moves)).decode("ascii") if moves is not None else None
     if sys.platform == "emscripten":
         from platform import window
         s_time_iso = datetime.datetime.fromtimestamp(start_time).isoformat()
         e_time_iso = datetime.datetime.fromtimestamp(end_time).isoformat()
         duration = end_time - start_time
         try:
-            window.parent.handleGameover(score, s_time_iso, e_time_iso, duration, game_mode)
+            # Queued by the page (localStorage), which sends it in the background and retries
+            window.parent.enqueueScore(score, s_time_iso, e_time_iso, duration, game_mode, seed, move_log, board_size)
         except Exception as e:
             print(f"Error calling JS: {e}")
     else:
-        print(f"Game Over ({game_mode})! Score: {score}")
+        print(f"Game Over ({game_mode}, {board_size}x{board_size})! Score: {score}" + (f", move log: {len(move_log)} chars" if move_log else ""))
+
+def score_sync_status():
+    """Upload status of the page's score queue ("Score saved", "2 score(s) waiting", ...), None outside the browser."""
+    if sys.platform != "emscripten":
+        return None
+    from platform import window
+    try:
+        status = window.parent.scoreSyncStatus
+        return str(status) if status else None
+    except Exception:
+        return None
+
+def load_replay(argv):
+    """Replay given with --replay FILE (packed replay.Replay, e.g. downloaded from the admin), None otherwise."""
+    if "--replay" not in argv or sys.platform == "emscripten":
+        return None
+    with open(argv[argv.index("--replay") + 1], "rb") as f:
+        return replay.Replay.unpack(f.read())
 
 # --- MAIN ---
 
@@ -412,13 +370,17 @@ async def main():
     STATE_MENU = 0
     STATE_PLAYING = 1
     STATE_GAMEOVER = 2
+    STATE_REPLAY = 3
     
     state = STATE_MENU
-    game_mode = "EASY" # EASY or AI_MATCH
+    game_mode = "EASY" # EASY, HARD or AI_MATCH
     
     # UI Elements
     btn_easy = Button(WIDTH//2 - 100, 300, 200, 60, "EASY MODE")
     btn_ai = Button(WIDTH//2 - 100, 400, 200, 60, "AI MATCH")
+    btn_hard = Button(WIDTH//2 - 100, 500, 200, 60, "HARD MODE")
+    board_size = ROWS # EASY board, changed with the size button (HARD and AI_MATCH stay 4x4)
+    btn_size = Button(WIDTH//2 - 100, 200, 200, 60, f"BOARD {board_size}x{board_size}")
     
     # User asked: "Start button -> then 2 modes".
     btn_main_start = Button(WIDTH//2 - 100, 350, 200, 80, "START GAME")
@@ -433,10 +395,33 @@ async def main():
     # AI Timer
     ai_move_timer = 0
     AI_DELAY = 500 # ms
+    ai_search = None
+
+    drawn_screen = None # (state, menu_phase, games) currently on screen
+    sync_status = None # Score upload status shown on the game over screen
+    sync_rect = None
+    SYNC_POLL = 500 # ms
+    sync_polled = 0
+
+    # Replay viewer (R on the game over screen, or --replay FILE on desktop)
+    player = None # replay.Player driving the viewer board
+    viewer = None
+    replay_status = None
+    replay_rect = None
+    animations = animation.Scheduler()
+    frame_stats = animation.FrameStats(FPS) # Printed at game over on desktop
+
+    loaded = load_replay(sys.argv)
+    if loaded:
+        player = replay.Player(loaded)
+        viewer = Game2048(100, 100, 600, 600, name="Replay", size=loaded.size)
+        viewer.show(player.board, player.score)
+        state = STATE_REPLAY
 
     run = True
     while run:
         clock.tick(FPS)
+        frame_start = time.perf_counter()
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -451,15 +436,24 @@ async def main():
                     elif menu_phase == 1:
                         if btn_easy.is_clicked(pos):
                             game_mode = "EASY"
-                            games = [Game2048(100, 100, 600, 600, is_ai=False, name="Player")]
+                            games = [Game2048(100, 100, 600, 600, is_ai=False, name="Player", size=board_size,
+                                              animated=True)]
+                            state = STATE_PLAYING
+                            start_timestamp = time.time()
+                        elif btn_size.is_clicked(pos):
+                            board_size = board_size + 1 if board_size < engine.MAX_SIZE else engine.MIN_SIZE
+                            btn_size = Button(WIDTH//2 - 100, 200, 200, 60, f"BOARD {board_size}x{board_size}")
+                        elif btn_hard.is_clicked(pos):
+                            game_mode = "HARD"
+                            games = [Game2048(100, 100, 600, 600, is_ai=False, name="Player", hard=True, animated=True)]
                             state = STATE_PLAYING
                             start_timestamp = time.time()
                         elif btn_ai.is_clicked(pos):
                             game_mode = "AI_MATCH"
 
                             games = [
-                                Game2048(20, 200, 370, 370, is_ai=False, name="You"),
-                                Game2048(410, 200, 370, 370, is_ai=True, name="AI Bot")
+                                Game2048(20, 200, 370, 370, is_ai=False, name="You", animated=True),
+                                Game2048(410, 200, 370, 370, is_ai=True, name="AI Bot", animated=True)
                             ]
                             state = STATE_PLAYING
                             start_timestamp = time.time()
@@ -478,6 +472,30 @@ async def main():
                         if move:
                             player_game.move_tiles(move, clock)
 
+                elif state == STATE_GAMEOVER and event.key == pygame.K_r:
+                    # Watch the player's game again, rebuilt from seed + moves
+                    player = replay.Player(replay.Replay(games[0].seed, games[0].moves,
+                                                         hard=games[0].spawner is not None, size=games[0].size))
+                    viewer = Game2048(100, 100, 600, 600, name="Replay", size=games[0].size)
+                    viewer.show(player.board, player.score)
+                    state = STATE_REPLAY
+
+                elif state == STATE_REPLAY:
+                    if event.key == pygame.K_SPACE: player.toggle()
+                    elif event.key == pygame.K_RIGHT: player.step(1)
+                    elif event.key == pygame.K_LEFT: player.step(-1)
+                    elif event.key == pygame.K_UP: player.faster()
+                    elif event.key == pygame.K_DOWN: player.slower()
+                    elif event.key == pygame.K_t: player.turbo = not player.turbo
+                    elif event.key == pygame.K_HOME: player.seek(0)
+                    elif event.key == pygame.K_END: player.seek(len(player.replay))
+                    elif pygame.K_0 <= event.key <= pygame.K_9:
+                        # 0-9: jump to 0%..90% of the game
+                        player.seek(len(player.replay) * (event.key - pygame.K_0) // 10)
+                    elif event.key == pygame.K_ESCAPE:
+                        state = STATE_GAMEOVER if games else STATE_MENU
+                        menu_phase = 0
+
         # Logic Update
         if state == STATE_PLAYING:
             # AI Logic
@@ -485,8 +503,12 @@ async def main():
                 ai_game = games[1]
                 current_time = pygame.time.get_ticks()
                 if not ai_game.over and not ai_game.won:
+                     # Think a few ms every frame, play the best move found so far when the delay is over
+                     if ai_search is None or ai_search.ai is not ai_game.ai or ai_search.board != ai_game.board:
+                         ai_search = ai_game.start_ai_search()
+                     ai_search.step(AI_FRAME_BUDGET)
                      if current_time - ai_move_timer > AI_DELAY:
-                         ai_move = ai_game.ai_move_logic()
+                         ai_move = ai_search.best_move or ai_game.ai_move_logic()
                          ai_game.move_tiles(ai_move, clock)
                          ai_move_timer = current_time
             
@@ -511,39 +533,106 @@ async def main():
                 state = STATE_GAMEOVER
                 end_timestamp = time.time()
                 # Send score of Player
-                send_score_to_web(games[0].score, start_timestamp, end_timestamp, game_mode)
+                send_score_to_web(games[0].score, start_timestamp, end_timestamp, game_mode,
+                                  games[0].seed, games[0].moves, games[0].size)
+                for g in games:
+                    if g.ai and sys.platform != "emscripten":
+                        print(f"{g.name} search stats: {g.ai.stats()}")
+                if sys.platform != "emscripten":
+                    print(f"Frame stats: {frame_stats.summary()}")
                 # Wait and restart
                 # logic handled below
 
-        # Draw
-        WINDOW.fill(BACKGROUND_COLOR)
-        
-        if state == STATE_MENU:
-            if menu_phase == 0:
-                btn_main_start.draw(WINDOW)
-            else:
-                btn_easy.draw(WINDOW)
-                btn_ai.draw(WINDOW)
-                
-        elif state == STATE_PLAYING or state == STATE_GAMEOVER:
+        if state == STATE_PLAYING:
+            # Fixed-timestep tweens, the boards above are already up to date
+            animations.update(clock.get_time() / 1000, [g.animation for g in games if g.animation])
+
+        if state == STATE_REPLAY:
+            # Turbo only asks for a redraw every few frames, the moves in between are never drawn
+            if player.update(clock.get_time() / 1000):
+                viewer.show(player.board, player.score)
+
+        # Draw: everything when the screen changes, otherwise only what changed
+        screen = (state, menu_phase, id(games), board_size)
+        if screen != drawn_screen:
+            drawn_screen = screen
+            WINDOW.fill(BACKGROUND_COLOR)
+            
+            if state == STATE_MENU:
+                if menu_phase == 0:
+                    btn_main_start.draw(WINDOW)
+                else:
+                    btn_easy.draw(WINDOW)
+                    btn_ai.draw(WINDOW)
+                    btn_hard.draw(WINDOW)
+                    btn_size.draw(WINDOW)
+                    
+            elif state == STATE_PLAYING or state == STATE_GAMEOVER:
+                for g in games:
+                    g.draw(WINDOW)
+                    
+                if state == STATE_GAMEOVER:
+                    msg = f"GAME OVER! {winner} Wins!" if winner else "GAME OVER!"
+                    text = fonts.render_text(msg, 50, (255, 0, 0), bold=True)
+                    WINDOW.blit(text, (WIDTH/2 - text.get_width()/2, 50))
+                    
+                    inst = fonts.render_text("Press SPACE to Menu, R to watch the replay", 30, FONT_COLOR)
+                    WINDOW.blit(inst, (WIDTH/2 - inst.get_width()/2, 120))
+                    sync_status = sync_rect = None
+                    sync_polled = 0
+
+            elif state == STATE_REPLAY:
+                viewer.draw(WINDOW)
+                hint = "SPACE play/pause, LEFT/RIGHT step, UP/DOWN speed, T turbo, 0-9 seek, ESC back"
+                text = fonts.render_text(hint, 18, FONT_COLOR)
+                WINDOW.blit(text, (WIDTH/2 - text.get_width()/2, 20))
+                replay_status = replay_rect = None
+
+            pygame.display.update()
+        elif state == STATE_PLAYING:
+            dirty = []
             for g in games:
-                g.draw(WINDOW)
-                
-            if state == STATE_GAMEOVER:
-                msg = f"GAME OVER! {winner} Wins!" if winner else "GAME OVER!"
-                font = pygame.font.SysFont("comicsans", 50, bold=True)
-                text = font.render(msg, 1, (255, 0, 0))
-                WINDOW.blit(text, (WIDTH/2 - text.get_width()/2, 50))
-                
-                inst = pygame.font.SysFont("comicsans", 30).render("Press SPACE to Menu", 1, FONT_COLOR)
-                WINDOW.blit(inst, (WIDTH/2 - inst.get_width()/2, 120))
-                
-                keys = pygame.key.get_pressed()
-                if keys[pygame.K_SPACE]:
-                    state = STATE_MENU
-                    menu_phase = 0
-
-        pygame.display.update()
+                dirty.extend(g.draw_dirty(WINDOW, animations.alpha))
+            if dirty:
+                pygame.display.update(dirty)
+        elif state == STATE_REPLAY:
+            dirty = viewer.draw_dirty(WINDOW)
+            mode = "turbo" if player.turbo else f"x{player.speed}/s"
+            status = f"Move {player.position}/{len(player.replay)}  {mode}  {'playing' if player.playing else 'paused'}"
+            if status != replay_status:
+                replay_status = status
+                if replay_rect:
+                    WINDOW.fill(BACKGROUND_COLOR, replay_rect)
+                    dirty.append(replay_rect)
+                text = fonts.render_text(status, 24, FONT_COLOR)
+                replay_rect = WINDOW.blit(text, (WIDTH/2 - text.get_width()/2, HEIGHT - 70))
+                dirty.append(replay_rect)
+            if dirty:
+                pygame.display.update(dirty)
+
+        if state == STATE_GAMEOVER and pygame.time.get_ticks() - sync_polled > SYNC_POLL:
+            # Poll the page's upload queue, redraw the status line only when it changes
+            sync_polled = pygame.time.get_ticks()
+            status = score_sync_status()
+            if status != sync_status:
+                sync_status = status
+                dirty = []
+                if sync_rect:
+                    WINDOW.fill(BACKGROUND_COLOR, sync_rect)
+                    dirty.append(sync_rect)
+                if status:
+                    text = fonts.render_text(status, 24, FONT_COLOR)
+                    sync_rect = WINDOW.blit(text, (WIDTH/2 - text.get_width()/2, HEIGHT - 60)) # Below the boards
+                    dirty.append(sync_rect)
+                pygame.display.update(dirty)
+
+        if state == STATE_GAMEOVER:
+            keys = pygame.key.get_pressed()
+            if keys[pygame.K_SPACE]:
+                state = STATE_MENU
+                menu_phase = 0
+
+        frame_stats.record(clock.get_time() / 1000, time.perf_counter() - frame_start)
         await asyncio.sleep(0)
 
     pygame.quit()
@@ -0,0 +1,365 @@
+"""Recorded games: packed move logs and their replay (no pygame).
+
+A recorded game is a seed plus the list of moves. The spawns come from
+engine.SplitMix64(seed), so the moves alone rebuild every board and the
+score, without storing any board. Only moves that changed the board are
+logged: an illegal move spawns nothing.
+
+Move log format (bytes):
+    version byte, number of moves (varint), then a sequence of tokens
+    0nnnnnnn + ceil((n + 1) / 4) bytes   literal block of n + 1 moves, 2 bits
+                                          each, first move in the low bits
+    100000dd + varint k                   run of k + RUN_MIN moves in direction dd
+Moves are direction codes: the index in engine.DIRECTIONS.
+
+HARD games take their spawns from ai.AdversarialSpawner instead of the RNG
+(the seed still places the two starting tiles). The spawner only depends on
+the board, so the same moves replay the same way: pass hard=True. Games on
+other board sizes replay with engine.board_spec(size): pass size=.
+
+Replay adds keyframes for seeking: every KEYFRAME_INTERVAL moves the board,
+score and RNG state, so any position is at most KEYFRAME_INTERVAL - 1 moves
+away from a stored one. Player is the playback clock used by the viewer.
+"""
+import random
+import struct
+import time
+
+try:
+    from . import ai, engine
+except ImportError:  # Run from game_source (main.py, tools): the game modules are top-level
+    import ai
+    import engine
+
+VERSION = 1
+RUN_MIN = 8  # Shorter repeats stay in literal blocks (2 bits per move is already cheaper)
+MAX_LITERAL = 128
+MAX_MOVES = 1000000
+SEED_BITS = 53  # Fits a JSON / JavaScript number exactly
+KEYFRAME_INTERVAL = 64
+KEYFRAME = struct.Struct("<QQ")  # score, RNG state, after the board (spec.board_bytes, little-endian)
+REPLAY_VERSION = 3
+
+CODES = {direction: code for code, direction in enumerate(engine.DIRECTIONS)}
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def new_seed():
+    return random.getrandbits(SEED_BITS)
+
+
+# --- PACKING ---
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data) or shift > 63:
+            raise ReplayError("truncated move log")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _write_literal(out, moves):
+    for start in range(0, len(moves), MAX_LITERAL):
+        block = moves[start:start + MAX_LITERAL]
+        out.append(len(block) - 1)
+        for i in range(0, len(block), 4):
+            byte = 0
+            for shift, code in enumerate(block[i:i + 4]):
+                byte |= code << (2 * shift)
+            out.append(byte)
+
+
+def encode(moves):
+    """Pack a sequence of direction codes."""
+    out = bytearray([VERSION])
+    _write_varint(out, len(moves))
+    literal = []
+    i = 0
+    while i < len(moves):
+        j = i + 1
+        while j < len(moves) and moves[j] == moves[i]:
+            j += 1
+        if j - i >= RUN_MIN:
+            _write_literal(out, literal)
+            literal = []
+            out.append(0x80 | moves[i])
+            _write_varint(out, j - i - RUN_MIN)
+        else:
+            literal.extend(moves[i:j])
+        i = j
+    _write_literal(out, literal)
+    return bytes(out)
+
+
+def decode(data):
+    """Unpack a move log into a bytearray of direction codes. Raises ReplayError if malformed."""
+    if not data or data[0] != VERSION:
+        raise ReplayError("unknown move log version")
+    count, pos = _read_varint(data, 1)
+    if count > MAX_MOVES:
+        raise ReplayError("too many moves")
+    moves = bytearray()
+    while pos < len(data):
+        token = data[pos]
+        pos += 1
+        if token & 0x80:
+            if token & 0x7C:
+                raise ReplayError("bad token")
+            length, pos = _read_varint(data, pos)
+            length += RUN_MIN
+            if len(moves) + length > count:
+                raise ReplayError("more moves than announced")
+            moves.extend(bytes([token & 3]) * length)
+        else:
+            length = token + 1
+            end = pos + (length + 3) // 4
+            if end > len(data) or len(moves) + length > count:
+                raise ReplayError("truncated move log")
+            for i in range(length):
+                moves.append((data[pos + (i >> 2)] >> (2 * (i & 3))) & 3)
+            pos = end
+    if len(moves) != count:
+        raise ReplayError("fewer moves than announced")
+    return moves
+
+
+# --- REPLAY ---
+
+def spawner_for(hard):
+    return ai.AdversarialSpawner() if hard else None
+
+
+def replay(seed, moves, hard=False, size=engine.ROWS):
+    """Final (board, score) of a recorded game. Raises ReplayError on a move that changes nothing."""
+    spec = engine.board_spec(size)
+    rng = engine.SplitMix64(seed)
+    board = spec.new_board(rng)
+    score = 0
+    move, spawn, directions = spec.move, spec.spawn, engine.DIRECTIONS
+    spawner = spawner_for(hard)
+    for i, code in enumerate(moves):
+        new, gain = move(board, directions[code])
+        if new == board:
+            raise ReplayError(f"move {i} ({directions[code]}) does not change the board")
+        board = spawner.spawn(new)[0] if spawner else spawn(new, rng)[0]
+        score += gain
+    return board, score
+
+
+def verify(seed, data, score, hard=False, size=engine.ROWS):
+    """Replay a packed game and compare with the claimed score. Returns (ok, reason)."""
+    try:
+        _, replayed = replay(seed, decode(data), hard, size)
+    except ReplayError as e:
+        return False, str(e)
+    if replayed != score:
+        return False, f"score {score} claimed, {replayed} replayed"
+    return True, ""
+
+
+def verify_all(jobs):
+    """verify() for a list of (key, seed, data, score, hard, size). Returns [(key, ok, reason)], runs in pool workers."""
+    return [(key, *verify(seed, data, score, hard, size)) for key, seed, data, score, hard, size in jobs]
+
+
+# --- SEEKABLE REPLAY ---
+
+class Replay:
+    """A recorded game with a keyframe every ``interval`` moves.
+
+    Positions go from 0 (the starting board) to len(replay) (after the last
+    move). seek() starts from the closest keyframe at or before the position,
+    so it costs at most ``interval - 1`` moves whatever the game length.
+    """
+
+    def __init__(self, seed, moves, interval=KEYFRAME_INTERVAL, keyframes=None, hard=False, size=engine.ROWS):
+        self.seed = seed
+        self.moves = bytes(moves)
+        self.interval = interval
+        self.hard = hard
+        self.size = size
+        self.spec = engine.board_spec(size)
+        self.spawner = spawner_for(hard)
+        self.keyframes = keyframes if keyframes is not None else self._build_keyframes()
+
+    def step(self, board, rng, code):
+        """Play one recorded move: (new_board, gain). Raises ReplayError if it changes nothing."""
+        new, gain = self.spec.move(board, engine.DIRECTIONS[code])
+        if new == board:
+            raise ReplayError(f"move {engine.DIRECTIONS[code]} does not change the board")
+        return (self.spawner.spawn(new)[0] if self.spawner else self.spec.spawn(new, rng)[0]), gain
+
+    def _build_keyframes(self):
+        rng = engine.SplitMix64(self.seed)
+        board = self.spec.new_board(rng)
+        score = 0
+        keyframes = []
+        for i, code in enumerate(self.moves):
+            if i % self.interval == 0:
+                keyframes.append((board, score, rng.getstate()))
+            board, gain = self.step(board, rng, code)
+            score += gain
+        if len(self.moves) % self.interval == 0:
+            keyframes.append((board, score, rng.getstate()))
+        return keyframes
+
+    def __len__(self):
+        return len(self.moves)
+
+    def _cursor(self, position):
+        if not 0 <= position <= len(self.moves):
+            raise IndexError(f"position {position} outside 0..{len(self.moves)}")
+        board, score, state = self.keyframes[position // self.interval]
+        rng = engine.SplitMix64()
+        rng.setstate(state)
+        for code in self.moves[position - position % self.interval:position]:
+            board, gain = self.step(board, rng, code)
+            score += gain
+        return board, score, rng
+
+    def seek(self, position):
+        """(board, score) after ``position`` moves."""
+        board, score, _ = self._cursor(position)
+        return board, score
+
+    def positions(self, start=0, stop=None):
+        """(board, score) for every position in start..stop - 1, one seek then one move per position."""
+        stop = len(self.moves) + 1 if stop is None else min(stop, len(self.moves) + 1)
+        if start >= stop:
+            return
+        board, score, rng = self._cursor(start)
+        yield board, score
+        for code in self.moves[start:stop - 1]:
+            board, gain = self.step(board, rng, code)
+            score += gain
+            yield board, score
+
+    def pack(self):
+        """Bytes: version, hard flag, size, interval, seed, packed move log, then the keyframes."""
+        out = bytearray([REPLAY_VERSION, self.hard, self.size])
+        log = encode(self.moves)
+        for value in (self.interval, self.seed, len(log)):
+            _write_varint(out, value)
+        out += log
+        _write_varint(out, len(self.keyframes))
+        for board, score, state in self.keyframes:
+            out += board.to_bytes(self.spec.board_bytes, "little")
+            out += KEYFRAME.pack(score, state)
+        return bytes(out)
+
+    @classmethod
+    def unpack(cls, data):
+        if not data or data[0] != REPLAY_VERSION:
+            raise ReplayError("unknown replay version")
+        if len(data) < 3 or data[1] > 1 or not engine.MIN_SIZE <= data[2] <= engine.MAX_SIZE:
+            raise ReplayError("bad replay flags")
+        hard, size = bool(data[1]), data[2]
+        interval, pos = _read_varint(data, 3)
+        seed, pos = _read_varint(data, pos)
+        length, pos = _read_varint(data, pos)
+        moves = decode(data[pos:pos + length])
+        count, pos = _read_varint(data, pos + length)
+        board_bytes = engine.board_spec(size).board_bytes
+        record = board_bytes + KEYFRAME.size
+        if interval < 1 or count != len(moves) // interval + 1 or len(data) != pos + count * record:
+            raise ReplayError("bad keyframes")
+        keyframes = []
+        for start in range(pos, len(data), record):
+            board = int.from_bytes(data[start:start + board_bytes], "little")
+            keyframes.append((board, *KEYFRAME.unpack_from(data, start + board_bytes)))
+        return cls(seed, moves, interval, keyframes, hard=hard, size=size)
+
+
+class Player:
+    """Playback clock over a Replay: play / pause, seek, variable speed and turbo.
+
+    Normal playback advances ``speed`` moves per second. Turbo plays as many
+    moves as fit in TURBO_BUDGET per frame and only asks for a redraw every
+    TURBO_REDRAW seconds, for skimming long games to the interesting part.
+    """
+    SPEEDS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+    TURBO_BUDGET = 0.008  # seconds of replay per frame
+    TURBO_REDRAW = 0.1  # seconds between redraws
+
+    def __init__(self, replay, speed=4):
+        self.replay = replay
+        self.speed = speed
+        self.playing = False
+        self.turbo = False
+        self.position = 0
+        self.board, self.score = replay.seek(0)
+        self._carry = 0.0
+        self._rng = None  # RNG at self.position while stepping forward
+        self._redrawn = 0.0
+
+    @property
+    def done(self):
+        return self.position >= len(self.replay)
+
+    def seek(self, position):
+        position = max(0, min(position, len(self.replay)))
+        self.board, self.score, self._rng = self.replay._cursor(position)
+        self.position = position
+        self._carry = 0.0
+
+    def step(self, count=1):
+        """Move the position by ``count`` (negative = backwards)."""
+        if count < 0 or self._rng is None:
+            self.seek(self.position + count)
+            return
+        for code in self.replay.moves[self.position:self.position + count]:
+            self.board, gain = self.replay.step(self.board, self._rng, code)
+            self.score += gain
+            self.position += 1
+
+    def toggle(self):
+        if self.done:
+            self.seek(0)
+        self.playing = not self.playing
+        self._carry = 0.0
+
+    def faster(self):
+        self.speed = next((s for s in self.SPEEDS if s > self.speed), self.SPEEDS[-1])
+
+    def slower(self):
+        self.speed = next((s for s in reversed(self.SPEEDS) if s < self.speed), self.SPEEDS[0])
+
+    def update(self, dt):
+        """Advance the clock by ``dt`` seconds. Returns True if the screen should be redrawn."""
+        if not self.playing:
+            return False
+        before = self.position
+        if self.turbo:
+            deadline = time.perf_counter() + self.TURBO_BUDGET
+            while not self.done and time.perf_counter() < deadline:
+                self.step(1 if self.replay.hard else 16)  # A HARD move runs a spawner search
+        else:
+            self._carry += dt * self.speed
+            steps = int(self._carry)
+            self._carry -= steps
+            if steps:
+                self.step(steps)
+        if self.done:
+            self.playing = False
+            return True
+        if self.turbo:
+            now = time.perf_counter()
+            if now - self._redrawn < self.TURBO_REDRAW:
+                return False
+            self._redrawn = now
+        return self.position != before
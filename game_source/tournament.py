@@ -0,0 +1,179 @@
+"""Headless tournament / benchmark runner for AI strategies.
+
+Plays games with the engine in a ProcessPoolExecutor (one worker per core)
+and streams one JSON line per game to the results file, followed by one
+summary line per strategy (win rate, score distribution, max tile
+histogram, moves/sec).
+
+    python tournament.py random preference expectimax-HARD --games 200 --out results.jsonl
+
+A strategy is either a name from STRATEGIES or ``module:factory``, where
+``factory(seed)`` returns a callable ``policy(board) -> direction``.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ai
+import engine
+
+PREFERENCE_ORDER = ["down", "right", "left", "up"]
+
+
+# --- STRATEGIES ---
+
+def random_strategy(seed):
+    # Original ai_move_logic: a random direction (illegal ones do nothing, so draw among legal ones)
+    rng = random.Random(seed)
+
+    def policy(board):
+        legal = engine.legal_moves(board)
+        return rng.choice(legal) if legal else None
+    return policy
+
+
+def preference_strategy(seed):
+    # Fixed preference order hinted at in ai_move_logic
+    def policy(board):
+        for direction in PREFERENCE_ORDER:
+            if engine.move(board, direction)[0] != board:
+                return direction
+        return None
+    return policy
+
+
+def expectimax_strategy(difficulty):
+    def factory(seed):
+        return ai.ExpectimaxAI.for_difficulty(difficulty).best_move
+    return factory
+
+
+STRATEGIES = {
+    "random": random_strategy,
+    "preference": preference_strategy,
+}
+for _difficulty in ai.DIFFICULTY_DEPTH:
+    STRATEGIES[f"expectimax-{_difficulty}"] = expectimax_strategy(_difficulty)
+
+
+def load_strategy(name):
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    if ":" in name:
+        module, attr = name.split(":", 1)
+        return getattr(importlib.import_module(module), attr)
+    raise ValueError(f"Unknown strategy: {name!r} (choose from {', '.join(STRATEGIES)} or module:factory)")
+
+
+# --- WORKER ---
+
+def play_games(strategy, seeds, max_moves):
+    """Worker entry point: play one game per seed, return one record per game."""
+    factory = load_strategy(strategy)
+    records = []
+    for seed in seeds:
+        game = engine.Engine(seed=seed)
+        policy = factory(seed)
+        start = time.perf_counter()
+        while game.moves < max_moves:
+            direction = policy(game.board)
+            if direction is None or not game.step(direction):
+                break
+        records.append({
+            "strategy": strategy,
+            "seed": seed,
+            "score": game.score,
+            "max_tile": game.max_tile(),
+            "moves": game.moves,
+            "seconds": round(time.perf_counter() - start, 6),
+        })
+    return records
+
+
+# --- SUMMARY ---
+
+def summarize(strategy, records):
+    scores = sorted(r["score"] for r in records)
+    quantiles = statistics.quantiles(scores, n=20) if len(scores) > 1 else scores * 19
+    moves = sum(r["moves"] for r in records)
+    seconds = sum(r["seconds"] for r in records)
+    histogram = Counter(r["max_tile"] for r in records)
+    return {
+        "type": "summary",
+        "strategy": strategy,
+        "games": len(records),
+        "win_rate": round(sum(r["max_tile"] >= 2048 for r in records) / len(records), 4),
+        "score": {
+            "mean": round(statistics.fmean(scores), 1),
+            "stdev": round(statistics.pstdev(scores), 1),
+            "min": scores[0],
+            "p25": quantiles[4],
+            "p50": quantiles[9],
+            "p75": quantiles[14],
+            "p95": quantiles[18],
+            "max": scores[-1],
+        },
+        "max_tile": {str(tile): histogram[tile] for tile in sorted(histogram)},
+        "moves_per_sec": round(moves / seconds) if seconds else 0,
+    }
+
+
+def run(strategies, games, seed=0, workers=None, chunk=10, max_moves=100000, out=None):
+    """Play ``games`` games per strategy. Every strategy gets the same game seeds."""
+    for name in strategies:
+        load_strategy(name)  # Fail early on typos, before starting the pool
+    seeds = [seed * 1000003 + i for i in range(games)]
+    results = {name: [] for name in strategies}
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(play_games, name, seeds[i:i + chunk], max_moves)
+            for name in strategies
+            for i in range(0, games, chunk)
+        ]
+        for future in as_completed(futures):
+            for record in future.result():
+                results[record["strategy"]].append(record)
+                if out:
+                    out.write(json.dumps({"type": "game", **record}, separators=(",", ":")) + "\n")
+            if out:
+                out.flush()
+
+    summaries = [summarize(name, results[name]) for name in strategies]
+    if out:
+        for summary in summaries:
+            out.write(json.dumps(summary, separators=(",", ":")) + "\n")
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pit 2048 AI strategies against each other.")
+    parser.add_argument("strategies", nargs="+", help=f"{', '.join(STRATEGIES)} or module:factory")
+    parser.add_argument("--games", type=int, default=100, help="games per strategy")
+    parser.add_argument("--seed", type=int, default=0, help="base seed, game i uses a seed derived from it")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=10, help="games per worker task")
+    parser.add_argument("--max-moves", type=int, default=100000)
+    parser.add_argument("--out", default="tournament_results.jsonl", help="results file (JSON lines)")
+    args = parser.parse_args()
+
+    with open(args.out, "w") as out:
+        summaries = run(args.strategies, args.games, args.seed, args.workers, args.chunk, args.max_moves, out)
+
+    print(f"{'strategy':<20} {'games':>6} {'win%':>6} {'mean':>9} {'p50':>9} {'max':>9} {'moves/s':>10}  max tile")
+    for s in summaries:
+        tiles = " ".join(f"{tile}:{count}" for tile, count in s["max_tile"].items())
+        print(f"{s['strategy']:<20} {s['games']:>6} {s['win_rate'] * 100:>5.1f}% {s['score']['mean']:>9} "
+              f"{s['score']['p50']:>9} {s['score']['max']:>9} {s['moves_per_sec']:>10}  {tiles}")
+    print(f"Results written to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
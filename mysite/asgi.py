@@ -9,8 +9,36 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
+from django.http import Http404
+from whitenoise.middleware import WhiteNoiseMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+# Lets settings drop the sync-only WhiteNoise middleware, so async views stay on the event loop
+os.environ['DJANGO_ASGI'] = '1'
 
-application = get_asgi_application()
+
+class WhiteNoiseStaticFilesHandler(ASGIStaticFilesHandler):
+    """Static files through WhiteNoise, in front of the Django middleware chain.
+
+    Same responses as WhiteNoiseMiddleware under WSGI: immutable Cache-Control
+    on hashed names and the precompressed .br/.gz variants. Only requests under
+    STATIC_URL take the sync path (on a worker thread); everything else goes
+    straight to the async application.
+    """
+
+    def __init__(self, application):
+        super().__init__(application)
+        self.whitenoise = WhiteNoiseMiddleware(self.not_found)
+
+    @staticmethod
+    def not_found(request):
+        raise Http404(request.path)
+
+    def serve(self, request):
+        return self.whitenoise(request)
+
+
+# Run with: uvicorn mysite.asgi:application --workers 1
+application = WhiteNoiseStaticFilesHandler(get_asgi_application())
@@ -16,13 +16,16 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic', # runserver cũng phục vụ static qua WhiteNoise
     'django.contrib.staticfiles',
     'core', # App của chúng ta
 ]
 
 # --- MIDDLEWARE ---
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware', # Đầu tiên để đo cả các middleware khác, tắt bằng METRICS_ENABLED
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -31,8 +34,17 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Dưới ASGI (mysite/asgi.py) bỏ WhiteNoise khỏi chuỗi middleware: middleware này chỉ chạy sync,
+# Django sẽ phải đẩy mọi view async sang thread. asgi.py vẫn phục vụ static qua WhiteNoise
+# (cùng header immutable, bản nén .br/.gz) trước khi request vào Django.
+if os.environ.get('DJANGO_ASGI') == '1':
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'mysite.urls'
 
+# Đo thời gian từng view (Server-Timing header, /metrics/ cho Prometheus, chỉ staff xem được)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+
 # --- TEMPLATES ---
 TEMPLATES = [
     {
@@ -52,14 +64,71 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
 
-# --- DATABASE (Đoạn bạn đang thiếu) ---
+# --- DATABASE ---
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# DB_PROFILE=production: SQLite chịu được nhiều worker (gunicorn) ghi cùng lúc
+# - WAL: người đọc không bị chặn khi có người ghi, synchronous=NORMAL đủ an toàn với WAL
+# - timeout = busy_timeout: chờ khóa thay vì báo "database is locked" ngay
+# - IMMEDIATE: giành khóa ghi ngay đầu transaction, tránh lỗi khi nâng khóa đọc lên ghi
+# - kết nối được giữ lại giữa các request (CONN_MAX_AGE)
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'OPTIONS': {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=134217728;'  # 128 MB
+                'PRAGMA cache_size=-20000;'    # ~20 MB
+            ),
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+# Số process chơi lại các ván đã ghi để kiểm tra điểm (core/verification.py), 0 = kiểm tra ngay trong request
+VERIFY_WORKERS = int(os.environ.get('VERIFY_WORKERS', '1'))
+
+# Ghi điểm qua một thread duy nhất trong mỗi process (core/writer.py), gộp nhiều request vào một transaction
+SCORE_WRITER = os.environ.get('SCORE_WRITER', '0') == '1'
+
+# --- CACHE / SESSION ---
+# CACHE_BACKEND=file: cache trên đĩa (CACHE_DIR), dùng chung giữa các worker, không cần server ngoài.
+# Mặc định locmem: riêng từng process, nhanh nhất.
+if os.environ.get('CACHE_BACKEND', 'locmem') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# SESSION_MODE: cached_db (mặc định: đọc từ cache, ghi cả cache lẫn DB), cache (chỉ cache) hoặc db
+SESSION_ENGINE = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}[os.environ.get('SESSION_MODE', 'cached_db')]
+
+# request.user lấy từ cache thay vì query auth_user mỗi request (core/backends.py);
+# password / is_active / is_staff / is_superuser vẫn đọc lại từ DB mỗi request
+AUTHENTICATION_BACKENDS = ['core.backends.CachedModelBackend']
+
 # --- MẬT KHẨU ---
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -85,6 +154,12 @@ USE_TZ = True
 # --- STATIC FILES ---
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles' # collectstatic khi deploy
+
+# WhiteNoise: file có hash trong tên (build_game_dist) được cache vĩnh viễn,
+# tự chọn bản .br / .gz nén sẵn nếu trình duyệt hỗ trợ
+WHITENOISE_USE_FINDERS = True
+WHITENOISE_IMMUTABLE_FILE_TEST = r'\.[0-9a-f]{12}\.\w+$'
 
 # --- CẤU HÌNH RIÊNG CHO GAME ---
 # Cho phép nhúng iframe từ cùng domain
@@ -95,10 +170,3 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = '/game/'
 LOGOUT_REDIRECT_URL = '/login/'
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from core import views
+from core import async_views, views
 
 urlpatterns = [
     # Trang admin
@@ -21,6 +21,21 @@ urlpatterns = [
     
     # API để game gửi điểm về
     path('api/save_score/', views.save_score_api, name='save_score'),
+    path('api/save_scores/', views.save_scores_api, name='save_scores'),
+
+    # Bảng xếp hạng
+    path('api/leaderboard/', views.leaderboard_api, name='leaderboard'),
+    path('api/leaderboard/me/', views.my_best_api, name='leaderboard_me'),
+    path('api/rank/', views.rank_api, name='rank'),
+
+    # Bản async của các API trên (chạy dưới ASGI: uvicorn mysite.asgi:application)
+    path('api/async/save_score/', async_views.save_score_api, name='async_save_score'),
+    path('api/async/leaderboard/', async_views.leaderboard_api, name='async_leaderboard'),
+    path('api/async/leaderboard/me/', async_views.my_best_api, name='async_leaderboard_me'),
+    path('api/async/rank/', async_views.rank_api, name='async_rank'),
+
+    # Số liệu hiệu năng (chỉ staff)
+    path('metrics/', views.metrics_view, name='metrics'),
     
     # Mặc định vào game (nếu chưa login sẽ bị đẩy về login)
     path('', views.game_view), 